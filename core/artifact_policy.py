@@ -0,0 +1,245 @@
+"""Which artifacts a run captures, and how often passing runs keep theirs.
+
+Capture levels:
+    none             nothing is captured
+    failure-minimal  a screenshot of each failure
+    failure-full     screenshot, page analysis, console and network errors
+                     of each failure (the default)
+    trace            failure-full plus a full set after every passing step
+
+Settings resolve per run, then per flow, then per project:
+    ARTIFACT_LEVEL / ARTIFACT_SUCCESS_SAMPLE            environment of the run
+    "ARTIFACTS": {"level": ..., "success_sample": N}    in the flow JSON
+    <PROJECT>_ARTIFACT_LEVEL / <PROJECT>_ARTIFACT_SUCCESS_SAMPLE
+A success sample of N keeps final-success artifacts for 1 in N passing runs
+(1 = every run, 0 = never).
+
+Screenshots are shaped the same way, by SCREENSHOT_* variables or a
+"screenshot" object inside the flow's ARTIFACTS block: format (png, jpeg,
+webp), quality, max dimension, and clipping to the failing element. The
+opt-in failure screencast reads SCREENCAST_* or ARTIFACTS.screencast, and
+the streaming HAR capture HAR_* or ARTIFACTS.har. Network record/replay
+(core/network_replay.py) reads NETWORK_MODE, NETWORK_ARCHIVE, REPLAY_* or
+ARTIFACTS.replay.
+"""
+
+import os
+import random
+from dataclasses import dataclass
+
+from core.utils import normalize_prefix
+
+CAPTURE_LEVELS = ("none", "failure-minimal", "failure-full", "trace")
+
+# CDP Page.captureScreenshot formats mapped to file extensions
+SCREENSHOT_FORMATS = {"png": "png", "jpeg": "jpg", "webp": "webp"}
+
+NETWORK_MODES = ("off", "record", "replay")
+
+
+def _first_int(values, default: int) -> int:
+    """First value that parses as a non-negative int, else default."""
+    for value in values:
+        try:
+            if value is not None and value != "" and int(value) >= 0:
+                return int(value)
+        except (TypeError, ValueError):
+            continue
+    return default
+
+
+@dataclass
+class ArtifactPolicy:
+    level: str = "failure-full"
+    success_sample: int = 1
+
+    @classmethod
+    def resolve(cls, project_name: str = None, flow_settings: dict = None):
+        """Pick each setting from the run env, the flow, the project env."""
+        flow_settings = flow_settings or {}
+        prefix = normalize_prefix(project_name)
+        candidates = {
+            "level": [
+                os.getenv("ARTIFACT_LEVEL"),
+                flow_settings.get("level"),
+                os.getenv(f"{prefix}_ARTIFACT_LEVEL") if prefix else None,
+            ],
+            "success_sample": [
+                os.getenv("ARTIFACT_SUCCESS_SAMPLE"),
+                flow_settings.get("success_sample"),
+                os.getenv(f"{prefix}_ARTIFACT_SUCCESS_SAMPLE") if prefix else None,
+            ],
+        }
+        policy = cls()
+        for value in candidates["level"]:
+            if value in CAPTURE_LEVELS:
+                policy.level = value
+                break
+        policy.success_sample = _first_int(
+            candidates["success_sample"], policy.success_sample
+        )
+        return policy
+
+    @property
+    def on_failure(self) -> bool:
+        return self.level != "none"
+
+    @property
+    def full(self) -> bool:
+        return self.level in ("failure-full", "trace")
+
+    @property
+    def every_step(self) -> bool:
+        return self.level == "trace"
+
+    def keep_success(self) -> bool:
+        """Decide (once per run) whether this passing run keeps its artifacts."""
+        if self.level == "none" or self.success_sample <= 0:
+            return False
+        return random.randrange(self.success_sample) == 0
+
+
+@dataclass
+class ScreenshotOptions:
+    format: str = "png"
+    quality: int = 80
+    max_dim: int = 0
+    clip_element: bool = False
+    clip_margin: int = 40
+
+    @classmethod
+    def resolve(cls, flow_settings: dict = None):
+        """Run env first (SCREENSHOT_*), then the flow's ARTIFACTS.screenshot."""
+        flow = (flow_settings or {}).get("screenshot") or {}
+        env = {
+            "format": os.getenv("SCREENSHOT_FORMAT"),
+            "quality": os.getenv("SCREENSHOT_QUALITY"),
+            "max_dim": os.getenv("SCREENSHOT_MAX_DIM"),
+            "clip_element": os.getenv("SCREENSHOT_CLIP"),
+            "clip_margin": os.getenv("SCREENSHOT_CLIP_MARGIN"),
+        }
+        options = cls()
+        fmt = (env["format"] or flow.get("format") or "png").lower()
+        options.format = "jpeg" if fmt == "jpg" else fmt
+        if options.format not in SCREENSHOT_FORMATS:
+            options.format = "png"
+        for key in ("quality", "max_dim", "clip_margin"):
+            values = (env[key], flow.get(key))
+            setattr(options, key, _first_int(values, getattr(options, key)))
+        options.quality = min(options.quality, 100)
+        clip = env["clip_element"] or flow.get("clip")
+        options.clip_element = str(clip).lower() in {"element", "1", "true"}
+        return options
+
+    @property
+    def extension(self) -> str:
+        return SCREENSHOT_FORMATS[self.format]
+
+    @property
+    def plain(self) -> bool:
+        """True when a default full-window PNG is wanted (no CDP needed)."""
+        return self.format == "png" and not self.max_dim and not self.clip_element
+
+    def cdp_params(self, region: dict) -> dict:
+        """Page.captureScreenshot parameters for a region in CSS pixels."""
+        params = {"format": self.format, "fromSurface": True}
+        if self.format != "png":
+            params["quality"] = self.quality
+        longest = max(region["width"], region["height"], 1)
+        scale = min(1.0, self.max_dim / longest) if self.max_dim else 1.0
+        params["clip"] = {
+            "x": region["x"],
+            "y": region["y"],
+            "width": region["width"],
+            "height": region["height"],
+            "scale": scale,
+        }
+        return params
+
+
+@dataclass
+class ScreencastOptions:
+    enabled: bool = False
+    fps: int = 5
+    seconds: int = 20
+    max_width: int = 800
+    max_height: int = 600
+    quality: int = 60
+
+    @classmethod
+    def resolve(cls, flow_settings: dict = None):
+        """Run env first (SCREENCAST_*), then the flow's ARTIFACTS.screencast."""
+        flow = (flow_settings or {}).get("screencast") or {}
+        options = cls()
+        enabled = os.getenv("SCREENCAST") or flow.get("enabled")
+        options.enabled = str(enabled).lower() in {"1", "true"}
+        for key in ("fps", "seconds", "max_width", "max_height", "quality"):
+            values = (os.getenv(f"SCREENCAST_{key.upper()}"), flow.get(key))
+            setattr(options, key, _first_int(values, getattr(options, key)))
+        options.fps = max(options.fps, 1)
+        options.quality = min(options.quality, 100)
+        return options
+
+
+@dataclass
+class HarOptions:
+    enabled: bool = False
+    bodies: bool = False
+    body_max_kb: int = 64
+
+    @classmethod
+    def resolve(cls, flow_settings: dict = None):
+        """Run env first (HAR_CAPTURE, HAR_BODIES, ...), then ARTIFACTS.har."""
+        flow = (flow_settings or {}).get("har") or {}
+        options = cls()
+        enabled = os.getenv("HAR_CAPTURE") or flow.get("enabled")
+        options.enabled = str(enabled).lower() in {"1", "true"}
+        bodies = os.getenv("HAR_BODIES") or flow.get("bodies")
+        options.bodies = str(bodies).lower() in {"1", "true"}
+        options.body_max_kb = _first_int(
+            (os.getenv("HAR_BODY_MAX_KB"), flow.get("body_max_kb")), options.body_max_kb
+        )
+        return options
+
+
+@dataclass
+class ReplayOptions:
+    mode: str = "off"
+    archive: str = ""
+    ignore_params: tuple = ()
+    match_body: bool = False
+    latency_ms: int = 0
+    recorded_latency: bool = False
+    unmatched: str = "fail"
+
+    @classmethod
+    def resolve(cls, project_name: str = None, flow_settings: dict = None):
+        """Run env first (NETWORK_MODE, REPLAY_*, ...), then ARTIFACTS.replay."""
+        flow = (flow_settings or {}).get("replay") or {}
+        options = cls()
+        mode = (os.getenv("NETWORK_MODE") or flow.get("mode") or "off").lower()
+        options.mode = mode if mode in NETWORK_MODES else "off"
+        options.archive = (
+            os.getenv("NETWORK_ARCHIVE")
+            or flow.get("archive")
+            or os.path.join(
+                "recordings", f"{normalize_prefix(project_name) or 'RUN'}.zip"
+            )
+        )
+        ignore = os.getenv("REPLAY_IGNORE_PARAMS") or flow.get("ignore_params") or ()
+        if isinstance(ignore, str):
+            ignore = [p.strip() for p in ignore.split(",") if p.strip()]
+        options.ignore_params = tuple(ignore)
+        match_body = os.getenv("REPLAY_MATCH_BODY") or flow.get("match_body")
+        options.match_body = str(match_body).lower() in {"1", "true"}
+        latency = os.getenv("REPLAY_LATENCY_MS") or flow.get("latency_ms")
+        options.recorded_latency = str(latency).lower() == "recorded"
+        options.latency_ms = _first_int((latency,), options.latency_ms)
+        unmatched = os.getenv("REPLAY_UNMATCHED") or flow.get("unmatched") or ""
+        if unmatched.lower() == "passthrough":
+            options.unmatched = "passthrough"
+        return options
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
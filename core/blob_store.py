@@ -0,0 +1,95 @@
+"""Content-addressed store for run artifacts under logs/blobs/.
+
+Artifacts are keyed by the SHA-256 of their bytes. A run directory holds a
+hard link to the blob, so every existing reader (Results, History, archives)
+keeps opening plain files, identical screenshots and JSON files are written
+to disk once, and the file's link count doubles as its reference count:
+a blob whose only remaining link is the one in logs/blobs/ is garbage.
+Where hard links are not available artifacts are written as plain files.
+"""
+
+import os
+import hashlib
+import logging
+
+from core.run_index import logs_root
+
+BLOBS_DIRNAME = "blobs"
+
+
+def _write_file(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+class BlobStore:
+    def __init__(self, root: str = None):
+        self.root = root or os.path.join(logs_root(), BLOBS_DIRNAME)
+        self.enabled = os.getenv("ARTIFACT_DEDUP", "1") == "1"
+        self.reused = 0
+        self.reused_bytes = 0
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def write(self, dest: str, data) -> bool:
+        """Write data to dest, linking an existing blob when possible.
+
+        Returns True if the bytes were already stored (nothing written).
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        # Never write through an existing link: that would change other runs
+        if os.path.lexists(dest):
+            os.remove(dest)
+        if not self.enabled:
+            _write_file(dest, data)
+            return False
+
+        blob = self.blob_path(hashlib.sha256(data).hexdigest())
+        try:
+            os.link(blob, dest)
+            self.reused += 1
+            self.reused_bytes += len(data)
+            return True
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logging.debug(f"Blob link unavailable, writing plain file: {e}")
+            _write_file(dest, data)
+            return False
+
+        # New content: write the run's copy, then publish it as the blob.
+        # Linking from dest means the blob never exists with zero references.
+        _write_file(dest, data)
+        try:
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            os.link(dest, blob)
+        except FileExistsError:
+            pass
+        except OSError as e:
+            logging.debug(f"Could not add blob {blob}: {e}")
+        return False
+
+    def gc(self) -> tuple:
+        """Remove blobs no run links to any more. Returns (count, bytes)."""
+        removed = freed = 0
+        if not os.path.isdir(self.root):
+            return removed, freed
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    st = entry.stat()
+                    if st.st_nlink <= 1:
+                        os.remove(entry.path)
+                        removed += 1
+                        freed += st.st_size
+                except OSError:
+                    continue
+            try:
+                os.rmdir(shard.path)
+            except OSError:
+                pass
+        return removed, freed
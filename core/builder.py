@@ -5,6 +5,9 @@ import tkinter as tk
 import tkinter.simpledialog as simpledialog
 import tkinter.messagebox as messagebox
 
+from core.perf_budget import validate_budgets
+from core.steps import STEP_ACTIONS
+
 
 def refresh_flows_for_project(app, project_name: str) -> None:
     """Populate flow combobox with python files under the project's directory"""
@@ -345,9 +348,9 @@ def _validate_flow_data(flow_obj: dict):
         action = step.get("action")
         if not isinstance(name, str) or not name.strip():
             errors.append(f"Step {idx}: 'name' is required")
-        if action not in {"navigate", "click", "fill", "wait", "custom"}:
+        if action not in STEP_ACTIONS:
             errors.append(
-                f"Step {idx}: 'action' must be one of navigate/click/fill/wait/custom"
+                f"Step {idx}: 'action' must be one of {'/'.join(STEP_ACTIONS)}"
             )
             continue
         if action == "navigate" and not (
@@ -360,6 +363,9 @@ def _validate_flow_data(flow_obj: dict):
             errors.append(f"Step {idx}: 'selector' is required for action={action}")
         if action == "fill" and not isinstance(step.get("value"), str):
             errors.append(f"Step {idx}: 'value' is required for action=fill")
+        if action == "assert_budget":
+            for err in validate_budgets(step.get("budgets")):
+                errors.append(f"Step {idx}: {err}")
         timeout = step.get("timeout", 40)
         if timeout is not None:
             try:
@@ -0,0 +1,135 @@
+"""Direct DevTools protocol connection to the page under test.
+
+Selenium's execute_cdp_cmd is request/response only, so anything driven by
+CDP events (screencast frames, network events, paused requests) needs its
+own connection. CDPSession opens the page target's websocket through the
+debugger address chromedriver exposes and reads it on a background thread:
+responses complete pending send() calls and events go to handlers
+registered with on(). Handlers run on that reader thread, so they must be
+quick and may only use send_nowait().
+
+Needs the websocket-client package (installed along with selenium 4).
+"""
+
+import json
+import logging
+import itertools
+import threading
+import urllib.request
+
+try:
+    import websocket
+except ImportError:  # pragma: no cover - optional dependency
+    websocket = None
+
+
+class CDPSession:
+    def __init__(self, ws_url: str):
+        if websocket is None:
+            raise RuntimeError("websocket-client is not installed")
+        # No Origin header: Chrome rejects unknown origins on the debug socket
+        self.ws = websocket.create_connection(ws_url, timeout=10, suppress_origin=True)
+        self.ws.settimeout(None)
+        self.closed = False
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._handlers = {}
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._read_loop, daemon=True, name="cdp")
+        self._thread.start()
+
+    @classmethod
+    def for_driver(cls, driver) -> "CDPSession":
+        """Attach to the page chromedriver is controlling."""
+        options = driver.capabilities.get("goog:chromeOptions") or {}
+        address = options.get("debuggerAddress")
+        if not address:
+            raise RuntimeError("Chrome debugger address not available")
+        with urllib.request.urlopen(f"http://{address}/json", timeout=5) as resp:
+            targets = json.load(resp)
+        pages = [
+            t
+            for t in targets
+            if t.get("type") == "page" and t.get("webSocketDebuggerUrl")
+        ]
+        if not pages:
+            raise RuntimeError("No page target to attach to")
+        return cls(pages[0]["webSocketDebuggerUrl"])
+
+    def on(self, event: str, handler) -> None:
+        """Call handler(params) for every event with this method name."""
+        with self._lock:
+            self._handlers.setdefault(event, []).append(handler)
+
+    def send(self, method: str, params: dict = None, timeout: float = 10.0) -> dict:
+        """Send a command and wait for its result (not from inside a handler)."""
+        waiter = {"done": threading.Event()}
+        msg_id = self._write(method, params, waiter)
+        if not waiter["done"].wait(timeout):
+            with self._lock:
+                self._pending.pop(msg_id, None)
+            raise TimeoutError(f"CDP {method} timed out")
+        if "error" in waiter:
+            raise RuntimeError(f"CDP {method} failed: {waiter['error']}")
+        return waiter.get("result") or {}
+
+    def send_nowait(self, method: str, params: dict = None) -> None:
+        """Send a command without waiting for (or keeping) its result."""
+        self._write(method, params, None)
+
+    def close(self) -> None:
+        self.closed = True
+        try:
+            self.ws.close()
+        except Exception:
+            pass
+
+    def _write(self, method, params, waiter) -> int:
+        if self.closed:
+            raise RuntimeError("CDP session is closed")
+        msg_id = next(self._ids)
+        if waiter is not None:
+            with self._lock:
+                self._pending[msg_id] = waiter
+        payload = json.dumps({"id": msg_id, "method": method, "params": params or {}})
+        with self._send_lock:
+            self.ws.send(payload)
+        return msg_id
+
+    def _read_loop(self) -> None:
+        while not self.closed:
+            try:
+                raw = self.ws.recv()
+            except Exception:
+                break
+            if not raw:
+                continue
+            try:
+                msg = json.loads(raw)
+            except ValueError:
+                continue
+            if "id" in msg:
+                with self._lock:
+                    waiter = self._pending.pop(msg["id"], None)
+                if waiter is not None:
+                    if "error" in msg:
+                        waiter["error"] = msg["error"].get("message", msg["error"])
+                    else:
+                        waiter["result"] = msg.get("result")
+                    waiter["done"].set()
+                continue
+            with self._lock:
+                handlers = list(self._handlers.get(msg.get("method"), ()))
+            for handler in handlers:
+                try:
+                    handler(msg.get("params") or {})
+                except Exception as e:
+                    logging.debug(f"CDP handler for {msg.get('method')} failed: {e}")
+        # Connection gone: release anyone still waiting
+        self.closed = True
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for waiter in pending.values():
+            waiter["error"] = "connection closed"
+            waiter["done"].set()
@@ -0,0 +1,203 @@
+"""Opt-in JS and CSS coverage over a whole flow (COVERAGE=1).
+
+CoverageRecorder turns on Profiler precise (block) coverage and CSS rule usage
+tracking on a CDPSession and takes both after every step: V8 drops coverage
+when a navigation replaces the page's isolate, and CSS.takeCoverageDelta
+only reports rules since the previous call. Used byte ranges are merged per
+script / stylesheet URL, so the run's coverage.json holds, for every URL, its
+size, used bytes and used ranges. Inline <style> sheets have no URL; each is
+listed as "inline:<hash of its text>", so only identical sheets share ranges.
+
+Because the ranges are kept, runs can be combined: `report` unions the ranges
+of the last N runs of a project per URL (and size, since a changed file is a
+different file) and lists the bytes no run ever used.
+
+    python -m core.coverage report MY_SHOP [runs]
+"""
+
+import hashlib
+import json
+import logging
+import re
+
+COVERAGE_FILENAME = "coverage.json"
+
+_USED = re.compile(rb"\x01+")
+
+
+def _merge(ranges: list) -> list:
+    """Sorted, non-overlapping [start, end) ranges."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _covered(ranges: list) -> int:
+    return sum(end - start for start, end in ranges)
+
+
+def js_used_ranges(functions: list) -> tuple:
+    """(script length, used ranges) from one script's block coverage.
+
+    V8 ranges nest: an inner range's count overrides the enclosing one, so
+    ranges are painted outermost first onto a byte mask.
+    """
+    ranges = [r for fn in functions for r in fn.get("ranges", [])]
+    if not ranges:
+        return 0, []
+    length = max(r["endOffset"] for r in ranges)
+    mask = bytearray(length)
+    for r in sorted(ranges, key=lambda r: (r["startOffset"], -r["endOffset"])):
+        start, end = r["startOffset"], r["endOffset"]
+        mask[start:end] = (b"\1" if r["count"] else b"\0") * (end - start)
+    return length, [[m.start(), m.end()] for m in _USED.finditer(mask)]
+
+
+class CoverageRecorder:
+    def __init__(self, session):
+        self.session = session
+        self._sheets = {}
+        self._files = {"js": {}, "css": {}}
+
+    def start(self) -> None:
+        self.session.on("CSS.styleSheetAdded", self._on_sheet)
+        self.session.send("Profiler.enable", {})
+        self.session.send(
+            "Profiler.startPreciseCoverage", {"callCount": False, "detailed": True}
+        )
+        self.session.send("DOM.enable", {})
+        self.session.send("CSS.enable", {})
+        self.session.send("CSS.startRuleUsageTracking", {})
+
+    def _on_sheet(self, params: dict) -> None:
+        # Runs on the CDP reader thread: inline sheets are named in take()
+        header = params.get("header") or {}
+        self._sheets[header.get("styleSheetId")] = (
+            None if header.get("isInline") else header.get("sourceURL") or None,
+            int(header.get("length") or 0),
+        )
+
+    def _sheet_name(self, sheet_id: str, url: str, total: int) -> str:
+        if url:
+            return url
+        try:
+            text = self.session.send(
+                "CSS.getStyleSheetText", {"styleSheetId": sheet_id}, timeout=10
+            ).get("text", "")
+            name = "inline:" + hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+        except Exception:
+            # Text unavailable: keep the sheet apart from every other one
+            name = f"inline:{sheet_id}"
+        self._sheets[sheet_id] = (name, total)
+        return name
+
+    def _add(self, kind: str, url: str, total: int, used: list) -> None:
+        entry = self._files[kind].setdefault(url, {"total": total, "ranges": []})
+        entry["total"] = max(entry["total"], total)
+        entry["ranges"] = _merge(entry["ranges"] + used)
+
+    def take(self) -> None:
+        """Fold the coverage since the previous call into the per-URL totals."""
+        try:
+            result = self.session.send("Profiler.takePreciseCoverage", {}, timeout=30)
+            for script in result.get("result", []):
+                url = script.get("url")
+                if url:
+                    total, used = js_used_ranges(script.get("functions", []))
+                    self._add("js", url, total, used)
+        except Exception as e:
+            logging.debug(f"JS coverage not taken: {e}")
+        try:
+            result = self.session.send("CSS.takeCoverageDelta", {}, timeout=30)
+            per_sheet = {}
+            for rule in result.get("coverage", []):
+                if rule.get("used"):
+                    per_sheet.setdefault(rule["styleSheetId"], []).append(
+                        [int(rule["startOffset"]), int(rule["endOffset"])]
+                    )
+            for sheet_id, (url, total) in list(self._sheets.items()):
+                url = self._sheet_name(sheet_id, url, total)
+                self._add("css", url, total, per_sheet.get(sheet_id, []))
+        except Exception as e:
+            logging.debug(f"CSS coverage not taken: {e}")
+
+    def stop(self) -> dict:
+        self.take()
+        for method in ("Profiler.stopPreciseCoverage", "CSS.stopRuleUsageTracking"):
+            try:
+                self.session.send(method, {}, timeout=5)
+            except Exception:
+                pass
+        return self.report()
+
+    def report(self) -> dict:
+        """coverage.json payload: {kind: {url: {total, used, ranges}}}."""
+        return {
+            kind: {
+                url: dict(entry, used=_covered(entry["ranges"]))
+                for url, entry in files.items()
+            }
+            for kind, files in self._files.items()
+        }
+
+
+def totals(report: dict) -> dict:
+    """{kind: {files, total, used}} of a coverage.json payload."""
+    return {
+        kind: {
+            "files": len(files),
+            "total": sum(f["total"] for f in files.values()),
+            "used": sum(f["used"] for f in files.values()),
+        }
+        for kind, files in report.items()
+    }
+
+
+def combine(reports: list) -> dict:
+    """Union of used ranges per (kind, url, size) over several runs."""
+    combined = {}
+    for report in reports:
+        for kind, files in report.items():
+            for url, entry in files.items():
+                key = (kind, url, entry["total"])
+                item = combined.setdefault(key, {"runs": 0, "ranges": []})
+                item["runs"] += 1
+                item["ranges"] = _merge(item["ranges"] + entry["ranges"])
+    return combined
+
+
+def main():
+    """CLI: python -m core.coverage report <project> [runs]"""
+    import sys
+    from core.retention import read_run_text
+    from core.run_index import get_run_index
+
+    if len(sys.argv) not in (3, 4) or sys.argv[1] != "report":
+        print("Usage: python -m core.coverage report <project> [runs]")
+        sys.exit(1)
+    limit = int(sys.argv[3]) if len(sys.argv) == 4 else 20
+    index = get_run_index()
+    reports = []
+    for run in index.query_runs({"project": sys.argv[2]}, limit=limit):
+        text = read_run_text(run["path"], COVERAGE_FILENAME)
+        if text:
+            reports.append(json.loads(text))
+    if not reports:
+        print("No coverage.json in these runs (run flows with COVERAGE=1)")
+        return
+    rows = []
+    for (kind, url, total), item in combine(reports).items():
+        unused = total - _covered(item["ranges"])
+        rows.append((unused, kind, url, total, item["runs"]))
+    print(f"Bytes never used in {len(reports)} runs, largest first:")
+    for unused, kind, url, total, runs in sorted(rows, reverse=True):
+        share = unused / total * 100 if total else 0
+        print(f"{unused:>10} / {total:<10} {share:5.1f}%  {kind:3} {runs:3}x  {url}")
+
+
+if __name__ == "__main__":
+    main()
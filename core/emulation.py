@@ -0,0 +1,108 @@
+"""Named network and CPU throttling profiles for performance runs.
+
+A profile sets Network.emulateNetworkConditions (latency, throughput) and/or
+Emulation.setCPUThrottlingRate when setup_driver opens the browser. It is
+picked per run, per flow, then per project:
+    THROTTLE_PROFILE=4g-slow                   environment of the run
+    "THROTTLING": "4g-slow"                    in the flow JSON (or a custom
+                                               {"name": ..., "latency_ms": ...})
+    <PROJECT>_THROTTLE_PROFILE=4g-slow
+The profile name is stored with the run (summary.json "throttling", index
+column "profile"), so throttled runs compare against unthrottled baselines.
+"""
+
+import os
+import logging
+from dataclasses import dataclass
+
+from core.utils import normalize_prefix
+
+# Presets follow the DevTools / Lighthouse throttling values
+THROTTLING_PROFILES = {
+    "none": {},
+    "3g-slow": {"latency_ms": 2000, "download_kbps": 400, "upload_kbps": 400},
+    "3g": {"latency_ms": 563, "download_kbps": 1440, "upload_kbps": 675},
+    "4g-slow": {"latency_ms": 150, "download_kbps": 1600, "upload_kbps": 750},
+    "4g": {"latency_ms": 60, "download_kbps": 9000, "upload_kbps": 1500},
+    "cpu-4x": {"cpu_rate": 4},
+    "cpu-6x": {"cpu_rate": 6},
+    "low-end-mobile": {
+        "latency_ms": 150,
+        "download_kbps": 1600,
+        "upload_kbps": 750,
+        "cpu_rate": 4,
+    },
+}
+
+
+@dataclass
+class ThrottlingProfile:
+    name: str = "none"
+    latency_ms: int = 0
+    download_kbps: int = 0
+    upload_kbps: int = 0
+    cpu_rate: float = 1
+
+    @classmethod
+    def resolve(cls, project_name: str = None, flow_setting=None):
+        """Pick the profile from the run env, the flow, the project env."""
+        prefix = normalize_prefix(project_name)
+        for value in (
+            os.getenv("THROTTLE_PROFILE"),
+            flow_setting,
+            os.getenv(f"{prefix}_THROTTLE_PROFILE") if prefix else None,
+        ):
+            if isinstance(value, dict):
+                return cls.from_dict(value)
+            if value:
+                name = str(value).strip().lower()
+                if name in THROTTLING_PROFILES:
+                    return cls.from_dict(dict(THROTTLING_PROFILES[name], name=name))
+                logging.warning(f"Unknown throttling profile '{value}' ignored")
+        return cls()
+
+    @classmethod
+    def from_dict(cls, values: dict):
+        profile = cls(name=str(values.get("name") or "custom"))
+        for key in ("latency_ms", "download_kbps", "upload_kbps"):
+            try:
+                setattr(profile, key, max(int(values.get(key) or 0), 0))
+            except (TypeError, ValueError):
+                pass
+        try:
+            profile.cpu_rate = max(float(values.get("cpu_rate") or 1), 1)
+        except (TypeError, ValueError):
+            pass
+        return profile
+
+    @property
+    def network(self) -> bool:
+        return bool(self.latency_ms or self.download_kbps or self.upload_kbps)
+
+    def apply(self, driver) -> None:
+        """Send the emulation commands over the driver's DevTools connection."""
+        if self.network:
+            driver.execute_cdp_cmd(
+                "Network.emulateNetworkConditions",
+                {
+                    "offline": False,
+                    "latency": self.latency_ms,
+                    # kbit/s to bytes/s; -1 leaves a direction unthrottled
+                    "downloadThroughput": self.download_kbps * 125 or -1,
+                    "uploadThroughput": self.upload_kbps * 125 or -1,
+                },
+            )
+        if self.cpu_rate > 1:
+            driver.execute_cdp_cmd(
+                "Emulation.setCPUThrottlingRate", {"rate": self.cpu_rate}
+            )
+
+    def describe(self) -> str:
+        parts = []
+        if self.network:
+            parts.append(
+                f"{self.latency_ms}ms RTT, {self.download_kbps}/{self.upload_kbps} kbps"
+            )
+        if self.cpu_rate > 1:
+            parts.append(f"CPU {self.cpu_rate:g}x")
+        return f"{self.name} ({', '.join(parts) or 'unthrottled'})"
@@ -0,0 +1,275 @@
+"""Streaming HAR capture from CDP Network events.
+
+HarRecorder listens on a CDPSession and turns every finished (or failed)
+request into a HAR 1.2 entry, tagged with the engine's current step index
+(`_step`). Entries are appended as one JSON object per line to a gzip file
+as soon as they complete, so memory only holds requests still in flight
+(capped) and a bounded hand-off queue, however long the run is. Event
+handlers run on the CDP reader thread and never block: response bodies
+(optional, size-limited) are fetched by the writer thread.
+
+    python -m core.har_capture to-har logs/<run>/network.har.ndjson.gz > run.har
+"""
+
+import gzip
+import json
+import queue
+import logging
+import threading
+from datetime import datetime, timezone
+
+HAR_FILENAME = "network.har.ndjson.gz"
+
+# Requests still waiting for loadingFinished/loadingFailed; oldest evicted
+_MAX_IN_FLIGHT = 2000
+_QUEUE_SIZE = 5000
+_FLUSH_EVERY = 100
+
+
+def _headers(headers: dict) -> list:
+    return [{"name": k, "value": str(v)} for k, v in (headers or {}).items()]
+
+
+def _header(headers: dict, name: str) -> str:
+    for key, value in (headers or {}).items():
+        if key.lower() == name:
+            return str(value)
+    return ""
+
+
+def _timings(timing: dict, total_ms: float) -> dict:
+    """HAR timings from a CDP ResourceTiming (ms offsets from requestTime)."""
+    if not timing:
+        return {"send": 0, "wait": total_ms, "receive": 0}
+
+    def span(start, end):
+        a, b = timing.get(start, -1), timing.get(end, -1)
+        return round(b - a, 3) if a >= 0 and b >= 0 else -1
+
+    headers_end = timing.get("receiveHeadersEnd", 0)
+    send_end = timing.get("sendEnd", 0)
+    return {
+        "blocked": -1,
+        "dns": span("dnsStart", "dnsEnd"),
+        "connect": span("connectStart", "connectEnd"),
+        "ssl": span("sslStart", "sslEnd"),
+        "send": max(span("sendStart", "sendEnd"), 0),
+        "wait": round(max(headers_end - send_end, 0), 3),
+        "receive": round(max(total_ms - headers_end, 0), 3),
+    }
+
+
+class HarRecorder:
+    def __init__(self, session, path: str, options):
+        self.session = session
+        self.path = path
+        self.options = options
+        self.step = 0
+        self._in_flight = {}
+        self._queue = queue.Queue(maxsize=_QUEUE_SIZE)
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._writer = threading.Thread(
+            target=self._write_loop, daemon=True, name="har"
+        )
+        self.stats = {"file": HAR_FILENAME, "entries": 0, "dropped": 0, "bodies": 0}
+
+    def start(self) -> None:
+        self._writer.start()
+        for event, handler in (
+            ("Network.requestWillBeSent", self._on_request),
+            ("Network.responseReceived", self._on_response),
+            ("Network.loadingFinished", self._on_finished),
+            ("Network.loadingFailed", self._on_failed),
+        ):
+            self.session.on(event, handler)
+        self.session.send("Network.enable", {})
+
+    def stop(self) -> dict:
+        """Flush everything still queued, close the file and return counts."""
+        self._queue.put(None)
+        self._writer.join(timeout=30)
+        try:
+            self._file.close()
+        except Exception:
+            pass
+        self.stats["incomplete"] = len(self._in_flight)
+        self._in_flight.clear()
+        return dict(self.stats)
+
+    # ---- CDP handlers (reader thread) ----------------------------------
+
+    def _on_request(self, params: dict) -> None:
+        request_id = params.get("requestId")
+        redirect = params.get("redirectResponse")
+        if redirect and request_id in self._in_flight:
+            # The same requestId continues after a redirect: emit the hop
+            entry = self._in_flight.pop(request_id)
+            entry["response"] = redirect
+            length = redirect.get("encodedDataLength")
+            self._emit(entry, params.get("timestamp"), length)
+        if len(self._in_flight) >= _MAX_IN_FLIGHT:
+            self._in_flight.pop(next(iter(self._in_flight)))
+            self.stats["dropped"] += 1
+        self._in_flight[request_id] = {
+            "request": params.get("request") or {},
+            "wall_time": params.get("wallTime"),
+            "timestamp": params.get("timestamp"),
+            "type": params.get("type"),
+            "step": self.step,
+        }
+
+    def _on_response(self, params: dict) -> None:
+        entry = self._in_flight.get(params.get("requestId"))
+        if entry is not None:
+            entry["response"] = params.get("response") or {}
+            entry["type"] = params.get("type") or entry.get("type")
+
+    def _on_finished(self, params: dict) -> None:
+        entry = self._in_flight.pop(params.get("requestId"), None)
+        if entry is not None:
+            entry["request_id"] = params.get("requestId")
+            self._emit(entry, params.get("timestamp"), params.get("encodedDataLength"))
+
+    def _on_failed(self, params: dict) -> None:
+        entry = self._in_flight.pop(params.get("requestId"), None)
+        if entry is not None:
+            entry["error"] = params.get("errorText") or "failed"
+            self._emit(entry, params.get("timestamp"), 0)
+
+    def _emit(self, entry: dict, end_ts, encoded_length) -> None:
+        entry["end"] = end_ts
+        entry["encoded_length"] = encoded_length or 0
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    # ---- writer thread -------------------------------------------------
+
+    def _write_loop(self) -> None:
+        pending = 0
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                break
+            try:
+                self._file.write(json.dumps(self._har_entry(entry), ensure_ascii=False))
+                self._file.write("\n")
+                self.stats["entries"] += 1
+                pending += 1
+                if pending >= _FLUSH_EVERY:
+                    self._file.flush()
+                    pending = 0
+            except Exception as e:
+                logging.debug(f"HAR entry skipped: {e}")
+
+    def _har_entry(self, entry: dict) -> dict:
+        request = entry["request"]
+        response = entry.get("response") or {}
+        start, end = entry.get("timestamp") or 0, entry.get("end") or 0
+        total_ms = round(max(end - start, 0) * 1000, 3)
+        started = datetime.fromtimestamp(entry.get("wall_time") or 0, timezone.utc)
+        post_data = request.get("postData")
+        content = {
+            "size": response.get("encodedDataLength") or entry["encoded_length"],
+            "mimeType": response.get("mimeType", ""),
+        }
+        body = self._body(entry, response)
+        if body is not None:
+            content.update(body)
+        har = {
+            "startedDateTime": started.isoformat().replace("+00:00", "Z"),
+            "time": total_ms,
+            "request": {
+                "method": request.get("method", "GET"),
+                "url": request.get("url", ""),
+                "httpVersion": response.get("protocol", ""),
+                "headers": _headers(request.get("headers")),
+                "queryString": [],
+                "cookies": [],
+                "headersSize": -1,
+                "bodySize": len(post_data) if post_data else 0,
+            },
+            "response": {
+                "status": response.get("status", 0),
+                "statusText": response.get("statusText", ""),
+                "httpVersion": response.get("protocol", ""),
+                "headers": _headers(response.get("headers")),
+                "cookies": [],
+                "content": content,
+                "redirectURL": _header(response.get("headers"), "location"),
+                "headersSize": -1,
+                "bodySize": entry["encoded_length"],
+            },
+            "cache": {},
+            "timings": _timings(response.get("timing"), total_ms),
+            "serverIPAddress": response.get("remoteIPAddress", ""),
+            "_step": entry["step"],
+            "_resourceType": entry.get("type"),
+        }
+        if post_data:
+            har["request"]["postData"] = {
+                "mimeType": (request.get("headers") or {}).get("Content-Type", ""),
+                "text": post_data,
+            }
+        if entry.get("error"):
+            har["_error"] = entry["error"]
+        return har
+
+    def _body(self, entry: dict, response: dict):
+        if not self.options.bodies or not entry.get("request_id") or not response:
+            return None
+        if entry["encoded_length"] > self.options.body_max_kb * 1024:
+            return None
+        try:
+            result = self.session.send(
+                "Network.getResponseBody", {"requestId": entry["request_id"]}, timeout=5
+            )
+        except Exception:
+            return None
+        text = result.get("body") or ""
+        if len(text) > self.options.body_max_kb * 1024:
+            return None
+        self.stats["bodies"] += 1
+        body = {"text": text}
+        if result.get("base64Encoded"):
+            body["encoding"] = "base64"
+        return body
+
+
+def iter_entries(path: str):
+    """Yield HAR entries from a streamed .ndjson.gz file (tolerates truncation)."""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    except (EOFError, OSError, ValueError):
+        return
+
+
+def write_har(path: str, out) -> int:
+    """Write a standard HAR document to out, streaming entries one at a time."""
+    out.write('{"log": {"version": "1.2", ')
+    out.write('"creator": {"name": "Gamma", "version": "1"}, "entries": [')
+    count = 0
+    for entry in iter_entries(path):
+        out.write(",\n" if count else "\n")
+        out.write(json.dumps(entry, ensure_ascii=False))
+        count += 1
+    out.write("\n]}}\n")
+    return count
+
+
+def main():
+    """CLI: python -m core.har_capture to-har <file.ndjson.gz>"""
+    import sys
+
+    if len(sys.argv) != 3 or sys.argv[1] != "to-har":
+        print("Usage: python -m core.har_capture to-har <network.har.ndjson.gz>")
+        sys.exit(1)
+    write_har(sys.argv[2], sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Mergeable latency histogram with HDR-style log-linear buckets.
+
+Values are whole milliseconds. Values below 128 get a bucket each. Above
+that, every power of two is split into 64 buckets, so a recorded value is
+off by at most 1/64 (about 1.6%) however large it is. Buckets are a sparse
+{index: count} dict, so a histogram holds at most a few hundred entries
+however many values it has seen. Two histograms merge by adding counts,
+which lets virtual users, checkpoints and runs be combined without keeping
+raw samples.
+"""
+
+import math
+
+_SUB_BITS = 7
+_SUB_COUNT = 1 << _SUB_BITS
+
+
+def _index(value: int) -> int:
+    shift = max(value.bit_length() - _SUB_BITS, 0)
+    return (shift << _SUB_BITS) | (value >> shift)
+
+
+def _lowest(index: int) -> int:
+    shift, sub = index >> _SUB_BITS, index & (_SUB_COUNT - 1)
+    return sub << shift
+
+
+def _highest(index: int) -> int:
+    return _lowest(index) + (1 << (index >> _SUB_BITS)) - 1
+
+
+class LatencyHistogram:
+    __slots__ = ("buckets", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, value_ms: float) -> None:
+        value = max(int(round(value_ms)), 0)
+        index = _index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+
+    def percentile(self, pct: float):
+        """Value at or below which pct percent of the recordings fall."""
+        if not self.count:
+            return None
+        rank = max(math.ceil(pct / 100 * self.count), 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(_highest(index), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "min_ms": self.min,
+            "mean_ms": round(self.mean, 1) if self.count else None,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max,
+        }
+
+    def to_dict(self) -> dict:
+        """JSON form; bucket keys become strings."""
+        return {
+            "buckets": {str(k): v for k, v in sorted(self.buckets.items())},
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        histogram = cls()
+        histogram.buckets = {int(k): v for k, v in (data.get("buckets") or {}).items()}
+        histogram.count = data.get("count", 0)
+        histogram.total = data.get("total", 0)
+        histogram.min = data.get("min")
+        histogram.max = data.get("max")
+        return histogram
@@ -1,7 +1,19 @@
 import os
 import json
-import shutil
 from datetime import datetime
+from functools import lru_cache
+import tkinter as tk
+from tkinter import ttk
+from core.run_bundle import BUNDLE_SUFFIX
+from core.run_index import (
+    ARCHIVE_SUFFIX,
+    SEARCH_FILES,
+    get_run_index,
+    logs_root,
+)
+from core.log_watcher import LogsWatcher
+from core.retention import read_run_text
+from core.traffic import compare_steps
 
 
 def load_test_history(app) -> None:
@@ -10,147 +22,409 @@ def load_test_history(app) -> None:
     app.add_log("📊 Ready to run tests", "info")
 
 
+def _display_status(raw_status) -> str:
+    """Map runner status values onto History labels."""
+    raw_status = str(raw_status or "").lower()
+    if raw_status in {"passed", "success", "ok"}:
+        return "Success"
+    if raw_status in {"aborted"}:
+        return "Aborted"
+    if raw_status in {"running"}:
+        return "Running"
+    if raw_status in {"error"}:
+        return "Error"
+    return "Failed"
+
+
+# Rows fetched per History page while scrolling
+HISTORY_PAGE_SIZE = 200
+
+# History status filter labels mapped onto raw runner status values
+STATUS_FILTERS = {
+    "Success": ["passed", "success", "ok"],
+    "Failed": ["failed"],
+    "Aborted": ["aborted"],
+    "Running": ["running"],
+    "Error": ["error"],
+}
+
+# History column headings mapped onto run index sort keys
+SORTABLE_COLUMNS = {
+    "Date": "date",
+    "Time": "date",
+    "Project": "project",
+    "Status": "status",
+    "Duration": "duration",
+}
+
+
+def format_history_row(run: dict) -> tuple:
+    """Build the History treeview values for an indexed run."""
+    return _format_history_values(
+        run["name"],
+        run.get("started_at"),
+        run.get("project"),
+        run.get("mode"),
+        run.get("profile"),
+        run.get("status"),
+        run.get("duration_sec"),
+        run.get("error"),
+    )
+
+
+@lru_cache(maxsize=4096)
+def _format_history_values(
+    name, started, project, mode, profile, raw_status, duration, error
+):
+    date, _, time = (started or "").partition(" ")
+    if not date:
+        date, time = name[:10], name[11:19]
+
+    status = _display_status(raw_status)
+    duration_str = f"{duration or 0:.1f}s"
+    mode = mode or "headless"
+    if profile and profile != "none":
+        # Throttled runs show their profile next to the mode
+        mode = f"{mode} · {profile}"
+
+    # Create detailed error information
+    if status in {"Failed", "Error"}:
+        if error:
+            # Truncate long error messages but keep important parts
+            details = error[:77] + "..." if len(error) > 80 else error
+        else:
+            details = "No error details available"
+    elif status == "Running":
+        details = "Test in progress"
+    else:
+        details = "Test completed successfully"
+
+    return (
+        date,
+        time,
+        project or "GOOGLE",
+        mode,
+        status,
+        duration_str,
+        details,
+    )
+
+
+def _history_query(app) -> dict:
+    query = getattr(app, "history_query", None)
+    if query is None:
+        query = {"filters": {}, "sort": "date", "descending": True}
+        app.history_query = query
+    return query
+
+
 def load_history_data(app) -> None:
-    """Load test history data from logs directory with detailed information"""
-    # Read logs from project root (same place the runner writes to)
-    logs_dir = os.path.join(os.getcwd(), "logs")
-    if not os.path.exists(logs_dir):
+    """Reset the History view and load its first page from the run index."""
+    try:
+        index = get_run_index()
+        index.ensure_populated()
+        query = _history_query(app)
+        app.history_total = index.count_runs(query["filters"])
+        if hasattr(app, "history_project_combo"):
+            app.history_project_combo["values"] = [""] + index.list_projects()
+    except Exception as e:
+        app.add_log(f"❌ Error loading history: {e}", "error")
         return
 
     # Clear existing data
-    for item in app.history_tree.get_children():
-        app.history_tree.delete(item)
-
-    # Get all test directories
-    test_dirs = []
-    for item in os.listdir(logs_dir):
-        item_path = os.path.join(logs_dir, item)
-        if os.path.isdir(item_path) and item.endswith("-checkout"):
-            test_dirs.append(item)
-
-    # Sort by date/time (newest first)
-    test_dirs.sort(reverse=True)
-
-    for test_dir in test_dirs:
-        summary_path = os.path.join(logs_dir, test_dir, "summary.json")
-        if os.path.exists(summary_path):
-            try:
-                with open(summary_path, "r") as f:
-                    summary = json.load(f)
-
-                # Parse datetime from directory name (format: 20250821-203515-checkout)
-                date_str = test_dir.replace("-checkout", "")
-                date_obj = datetime.strptime(date_str, "%Y%m%d-%H%M%S")
-
-                date = date_obj.strftime("%Y-%m-%d")
-                time = date_obj.strftime("%H:%M:%S")
-
-                # Extract test details from summary
-                project = summary.get("project", "GOOGLE")
-                mode = summary.get("mode", "headless")
-
-                # Get status with proper mapping (support current runner values)
-                raw_status = str(summary.get("status", "")).lower()
-                if raw_status in {"passed", "success", "ok"}:
-                    status = "Success"
-                elif raw_status in {"aborted"}:
-                    status = "Aborted"
-                else:
-                    status = "Failed"
-
-                # Get duration (fallback to compute from steps if not provided)
-                duration = summary.get("durationSec", 0)
-                if not duration:
-                    try:
-                        steps = summary.get("steps", []) or []
-                        if steps:
-                            start_ts = steps[0].get("start")
-                            end_ts = None
-                            for s in reversed(steps):
-                                end_ts = s.get("end") or end_ts
-                                if end_ts:
-                                    break
-                            if start_ts and end_ts:
-                                duration = max(0.0, float(end_ts) - float(start_ts))
-                    except Exception:
-                        duration = 0
-                duration_str = f"{duration:.1f}s"
-
-                # Create detailed error information
-                details = ""
-                if status == "Failed":
-                    error = summary.get("error", "Unknown error")
-                    if error:
-                        # Truncate long error messages but keep important parts
-                        if len(error) > 80:
-                            details = error[:77] + "..."
-                        else:
-                            details = error
-                    else:
-                        details = "No error details available"
-                else:
-                    details = "Test completed successfully"
-
-                # Insert into treeview
-                app.history_tree.insert(
-                    "",
-                    "end",
-                    values=(
-                        date,
-                        time,
-                        project,
-                        mode,
-                        status,
-                        duration_str,
-                        details,
-                    ),
-                )
+    app.history_tree.delete(*app.history_tree.get_children())
+    app.history_loaded = 0
+    load_history_page(app)
+
+
+def load_history_page(app) -> None:
+    """Append the next page of runs (current sort and filters) to History."""
+    if app.history_loaded >= app.history_total:
+        return
+    query = _history_query(app)
+    runs = get_run_index().query_runs(
+        query["filters"],
+        query["sort"],
+        query["descending"],
+        limit=HISTORY_PAGE_SIZE,
+        offset=app.history_loaded,
+    )
+    # Row iids are run names so detail views can look the run up directly
+    for run in runs:
+        if not app.history_tree.exists(run["name"]):
+            app.history_tree.insert(
+                "", "end", iid=run["name"], values=format_history_row(run)
+            )
+    app.history_loaded += len(runs)
+    if not runs:
+        app.history_total = app.history_loaded
+
+
+def on_history_scroll(app, first, last) -> None:
+    """Fetch the next page once the user scrolls near the end of loaded rows."""
+    app.history_scrollbar.set(first, last)
+    if float(last) > 0.9 and app.history_loaded < app.history_total:
+        if not getattr(app, "history_page_pending", False):
+            app.history_page_pending = True
+
+            def _load():
+                app.history_page_pending = False
+                load_history_page(app)
+
+            app.root.after_idle(_load)
+
+
+def apply_history_filters(app) -> None:
+    """Read the History filter bar and reload with filters pushed to SQL."""
+    filters = {}
+    project = app.history_project_var.get().strip()
+    if project:
+        filters["project"] = project
+    status = app.history_status_var.get().strip()
+    if status in STATUS_FILTERS:
+        filters["statuses"] = STATUS_FILTERS[status]
+    date_vars = (("date_from", app.history_from_var), ("date_to", app.history_to_var))
+    for key, var in date_vars:
+        value = var.get().strip()
+        if not value:
+            continue
+        try:
+            datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            app.add_log(f"⚠️ Invalid date (use YYYY-MM-DD): {value}", "warning")
+            return
+        filters[key] = value
+    search_text = app.history_search_var.get().strip()
+    if search_text:
+        filters["text"] = search_text
+    _history_query(app)["filters"] = filters
+    load_history_data(app)
+
+
+def sort_history(app, column: str) -> None:
+    """Sort History by a column heading; clicking again flips the direction."""
+    sort = SORTABLE_COLUMNS.get(column)
+    if not sort:
+        return
+    query = _history_query(app)
+    if query["sort"] == sort:
+        query["descending"] = not query["descending"]
+    else:
+        query["sort"], query["descending"] = sort, True
+    load_history_data(app)
 
-            except Exception as e:
-                print(f"Error loading summary from {test_dir}: {e}")
-                # Insert error row with more context
-                try:
-                    date_str = test_dir.replace("-checkout", "")
-                    date_obj = datetime.strptime(date_str, "%Y%m%d-%H%M%S")
-                    date = date_obj.strftime("%Y-%m-%d")
-                    time = date_obj.strftime("%H:%M:%S")
-                except:
-                    date = test_dir[:10]
-                    time = test_dir[11:19]
-
-                app.history_tree.insert(
-                    "",
-                    "end",
-                    values=(
-                        date,
-                        time,
-                        "GOOGLE",
-                        "headless",
-                        "Error",
-                        "0s",
-                        f"Failed to load summary: {str(e)[:50]}",
-                    ),
+
+def show_search_results(app) -> None:
+    """Show ranked full-text matches for the History search box in a popup."""
+    text = app.history_search_var.get().strip()
+    if not text:
+        app.add_log("⚠️ Type something to search for first", "warning")
+        return
+    index = get_run_index()
+    if not index.fts_enabled:
+        app.add_log("⚠️ Full-text search needs SQLite with FTS5", "warning")
+        return
+    hits = index.search(text, limit=200)
+
+    popup = tk.Toplevel(app.root)
+    popup.title(f"Search: {text}")
+    popup.geometry("900x500")
+    popup.configure(bg=app.colors["background"])
+    tk.Label(
+        popup,
+        text=f"{len(hits)} matches (best first) — double-click to open",
+        bg=app.colors["background"],
+        fg=app.colors["text_secondary"],
+    ).pack(anchor="w", padx=10, pady=(10, 4))
+
+    columns = ("Run", "Status", "Where", "Match")
+    tree = ttk.Treeview(popup, columns=columns, show="headings")
+    for col, width in zip(columns, (190, 70, 200, 440)):
+        tree.heading(col, text=col)
+        tree.column(col, width=width, anchor="w")
+    tree.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+    files = {}
+    for i, hit in enumerate(hits):
+        where = "Run error" if hit["kind"] == "error" else hit["kind"]
+        if hit["step_idx"] is not None:
+            where = f"Step {hit['step_idx']}: {hit['step_name'] or ''}"
+        # Step names and run/step errors live in summary.json, which every
+        # run has; error_details.txt only exists for failed runs
+        filenames = [SEARCH_FILES[hit["kind"]]] if hit["kind"] in SEARCH_FILES else []
+        files[str(i)] = (hit["path"], filenames + ["summary.json"])
+        tree.insert(
+            "",
+            "end",
+            iid=str(i),
+            values=(
+                hit["run_name"],
+                _display_status(hit["status"]),
+                where,
+                " ".join(hit["snippet"].split()),
+            ),
+        )
+
+    def _open(event=None):
+        selection = tree.selection()
+        if not selection:
+            return
+        run_path, filenames = files[selection[0]]
+        for filename in filenames:
+            # Runs may be directories, bundles or archives
+            content = read_run_text(run_path, filename)
+            if content is not None:
+                app.open_text_artifact_internally(
+                    os.path.join(run_path, filename), filename, content
                 )
+                return
+        app.add_log(
+            f"❌ Artifact not found: {' / '.join(filenames)} in {run_path}", "warning"
+        )
+
+    tree.bind("<Double-1>", _open)
+
+
+def compare_run_traffic(app) -> None:
+    """Per-step traffic of the selected run against the previous one (or two picks)."""
+    index = get_run_index()
+    runs = [index.get_run(name) for name in app.history_tree.selection()[:2]]
+    runs = [r for r in runs if r]
+    if not runs:
+        app.add_log("⚠️ Select one or two runs in History first", "warning")
+        return
+    if len(runs) == 1:
+        previous = index.previous_run(runs[0]["name"])
+        if previous is None:
+            app.add_log("⚠️ No earlier run of this project to compare with", "warning")
+            return
+        runs.append(previous)
+    old, new = sorted(runs, key=lambda r: (r.get("started_at") or "", r["name"]))
+    steps = []
+    for run in (old, new):
+        try:
+            summary = json.loads(read_run_text(run["path"], "summary.json") or "{}")
+        except ValueError:
+            summary = {}
+        steps.append(summary.get("steps") or [])
+    lines = compare_steps(steps[0], steps[1])
+    if not lines:
+        app.add_log("⚠️ These runs have no per-step traffic data", "warning")
+        return
+    header = f"Traffic per step: {old['name']} → {new['name']}"
+    content = "\n".join([header, "=" * len(header), ""] + lines)
+    app.open_text_artifact_internally(new["path"], "Traffic comparison", content)
+
+
+def _changed_since_indexed(run_dir: str, run: dict) -> bool:
+    """True if the run's indexed files were written after its index row."""
+    if not os.path.isdir(run_dir):
+        return False
+    for filename in ["summary.json", *SEARCH_FILES.values()]:
+        try:
+            if os.path.getmtime(os.path.join(run_dir, filename)) > (
+                run.get("updated_at") or 0
+            ):
+                return True
+        except OSError:
+            continue
+    return False
+
+
+def apply_run_changes(app, run_names) -> None:
+    """Insert, update or delete History rows for just the given runs."""
+    index = get_run_index()
+    query = _history_query(app)
+    refresh_results = False
+    shown_path = getattr(app, "results_run_dir", None) or ""
+    shown = os.path.splitext(os.path.basename(shown_path))[0]
+    for name in run_names:
+        run_dir = os.path.join(logs_root(), name)
+        run = index.get_run(name)
+        # Archived (.zip) and bundled (.bundle) runs live next to run_dir
+        packed = (
+            run is not None
+            and run["path"].endswith((ARCHIVE_SUFFIX, BUNDLE_SUFFIX))
+            and os.path.isfile(run["path"])
+        )
+        if not os.path.isdir(run_dir) and not packed:
+            # Removed on disk (pruned, cleared or deleted by hand)
+            if run is not None:
+                index.delete_run(name)
+            run = None
+        elif run is None or _changed_since_indexed(run_dir, run):
+            # Run directory written by something that did not update the index
+            index.index_run_dir(run_dir)
+            run = index.get_run(name)
+
+        # Results follows the newest finished run regardless of History filters
+        if run is None:
+            refresh_results = refresh_results or name == shown
+        elif run.get("status") != "running":
+            refresh_results = refresh_results or name >= shown
+
+        if run is not None and not index.count_runs(
+            dict(query["filters"], name=name)
+        ):
+            # Outside the current filters: treat like a removal from the view
+            run = None
+
+        if run is None:
+            if app.history_tree.exists(name):
+                app.history_tree.delete(name)
+                app.history_loaded -= 1
+                app.history_total -= 1
+            continue
+
+        values = format_history_row(run)
+        pos = index.position_of(
+            name, query["filters"], query["sort"], query["descending"]
+        )
+        if app.history_tree.exists(name):
+            app.history_tree.item(name, values=values)
+            app.history_tree.move(name, "", min(pos, app.history_loaded - 1))
+        else:
+            app.history_total += 1
+            # Rows past the loaded pages arrive with the page that contains them
+            if pos <= app.history_loaded:
+                app.history_tree.insert("", pos, iid=name, values=values)
+                app.history_loaded += 1
+
+    if refresh_results:
+        app.refresh_results()
+
+
+def start_logs_watcher(app) -> None:
+    """Start watching logs/ and feed changed runs into History and Results."""
+    app.logs_watcher = LogsWatcher(logs_root())
+    app.logs_watcher.start()
+    app.root.after(500, lambda: poll_logs_watcher(app))
+
+
+def poll_logs_watcher(app) -> None:
+    """Apply pending watcher changes on the Tk thread, then reschedule."""
+    if not app.root.winfo_exists():
+        return
+    try:
+        changed = app.logs_watcher.drain()
+        if changed is None:
+            # Events were dropped; fall back to a full reload once
+            app.auto_refresh_all_tabs()
+        elif changed:
+            app.apply_run_changes(changed)
+    except Exception as e:
+        app.add_log(f"❌ History update error: {e}", "error")
+    app.root.after(500, lambda: poll_logs_watcher(app))
 
 
 def clear_all_logs(app) -> None:
-    """Delete all files and folders under the logs directory and refresh UI."""
+    """Empty History now and delete everything under logs/ in the background."""
     try:
-        # Use the same logs location as the runner/history loader
-        logs_dir = os.path.join(os.getcwd(), "logs")
+        logs_dir = logs_root()
         if os.path.exists(logs_dir):
-            for name in os.listdir(logs_dir):
-                path = os.path.join(logs_dir, name)
-                try:
-                    if os.path.isdir(path):
-                        shutil.rmtree(path, ignore_errors=True)
-                    else:
-                        try:
-                            os.remove(path)
-                        except Exception:
-                            pass
-                except Exception:
-                    pass
+            # The index is emptied right away; files go on the retention thread
+            get_run_index().clear()
+            app.retention_worker.request_clear()
             app.add_log("🧹 All logs cleared", "info")
         else:
             app.add_log("📁 Logs folder not found", "warning")
@@ -0,0 +1,329 @@
+"""Browser-level load test: N virtual users replaying a JSON flow.
+
+Each virtual user is a thread driving its own headless Chrome through a
+BaseTestEngine. The browser is reused from iteration to iteration (cookies
+are cleared in between) and restarted only if it dies. Users start spread
+evenly over --ramp-up seconds. They loop over the flow until --duration
+seconds have passed or each has done --iterations iterations.
+
+Per-step latencies go into LatencyHistogram (core/histogram.py) buckets, one
+per user, so recording takes no shared lock and memory stays flat however
+long the test runs. Progress lines and the final report merge them: per-step
+throughput, p50/p95/p99 and error rate. The run shows up in History as a
+"load" run whose summary.json "load" block also keeps the histograms, so
+several load runs can be merged later.
+
+    python -m core.load_test <flow.json> HOLLISTER --users 10 --ramp-up 60 \
+        --duration 600
+
+The engine's per-step extras are off by default for virtual users (see
+LOAD_DEFAULTS); set them in the environment to turn them back on.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from core.histogram import LatencyHistogram
+from core.step_records import CHUNK_RECORDS, STEPS_FILENAME, StepRecords, append_chunk
+
+# Engine settings for virtual users unless the environment says otherwise
+LOAD_DEFAULTS = {
+    "HEADLESS": "1",
+    "PERF_METRICS": "0",
+    "STEP_TRAFFIC": "0",
+    "MEMORY_TRACKING": "0",
+    "ARTIFACT_LEVEL": "none",
+    "LOG_LEVEL": "WARNING",
+    "GAMMA_RETENTION_EXTERNAL": "1",
+}
+
+# Distinct error messages kept per step; the rest are counted as "other"
+_MAX_ERRORS = 20
+
+# Users flush their step records into the one steps.bin of the load run
+_records_lock = threading.Lock()
+
+
+def step_key(idx: int, step: dict) -> str:
+    return f"{idx}. {step.get('name', '?')}"
+
+
+class StepStats:
+    __slots__ = ("histogram", "errors", "messages")
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.errors = 0
+        self.messages = {}
+
+    def add_error(self, message: str) -> None:
+        self.errors += 1
+        if message not in self.messages and len(self.messages) >= _MAX_ERRORS:
+            message = "other"
+        self.messages[message] = self.messages.get(message, 0) + 1
+
+    def merge(self, other: "StepStats") -> "StepStats":
+        self.histogram.merge(other.histogram)
+        self.errors += other.errors
+        for message, count in other.messages.items():
+            self.messages[message] = self.messages.get(message, 0) + count
+        return self
+
+
+class VirtualUser(threading.Thread):
+    def __init__(self, number, project_config, steps, stop_event, options, run_dir):
+        super().__init__(name=f"vu-{number}", daemon=True)
+        self.number = number
+        self.project_config = project_config
+        self.steps = steps
+        self.stop_event = stop_event
+        self.options = options
+        self.run_dir = run_dir
+        self.lock = threading.Lock()
+        self.stats = {step_key(i, s): StepStats() for i, s in enumerate(steps, 1)}
+        self.iteration = StepStats()
+        self.records = StepRecords()
+        self.engine = None
+
+    def run(self):
+        delay = self.options.ramp_up * self.number / max(self.options.users, 1)
+        if self.stop_event.wait(delay):
+            return
+        done = 0
+        try:
+            while not self.stop_event.is_set():
+                if self.options.iterations and done >= self.options.iterations:
+                    break
+                if self.engine is None:
+                    self._start_browser()
+                self._run_iteration()
+                done += 1
+        except Exception as e:
+            logging.error(f"Virtual user {self.number} stopped: {e}")
+        finally:
+            self._stop_browser()
+            self._flush_records()
+
+    def _flush_records(self):
+        with _records_lock:
+            append_chunk(os.path.join(self.run_dir, STEPS_FILENAME), self.records)
+
+    def _start_browser(self):
+        from tests.base_test_engine import BaseTestEngine
+
+        self.engine = BaseTestEngine(dict(self.project_config))
+        # Failure artifacts (if enabled) land in the load run; no per-step index
+        self.engine.run_dir = self.run_dir
+        self.engine.setup_driver()
+
+    def _stop_browser(self):
+        if self.engine is None:
+            return
+        if self.engine._artifact_writer is not None:
+            self.engine._artifact_writer.shutdown(wait=True)
+            self.engine._artifact_writer = None
+        if self.engine.cdp is not None:
+            self.engine.cdp.close()
+        try:
+            self.engine.driver.quit()
+        except Exception:
+            pass
+        self.engine = None
+
+    def _run_iteration(self):
+        engine = self.engine
+        engine.reset_steps()
+        engine.failure_occurred = False
+        started = time.time()
+        error = None
+        for idx, step in enumerate(self.steps, 1):
+            key = step_key(idx, step)
+            step_started = time.time()
+            try:
+                data = engine.execute_step(step)
+            except Exception as e:
+                error = str(e).split("Stacktrace:")[0].strip()
+                self.records.append(key, step_started, time.time(), "fail")
+                with self.lock:
+                    self.stats[key].add_error(error)
+                break
+            self.records.append(
+                key, data["start"], data["end"], data["status"], data.get("retries")
+            )
+            with self.lock:
+                if data.get("status") == "pass":
+                    elapsed_ms = (data["end"] - data["start"]) * 1000
+                    self.stats[key].histogram.record(elapsed_ms)
+                else:
+                    self.stats[key].add_error(data.get("error") or "failed")
+        with self.lock:
+            if error:
+                self.iteration.add_error(error)
+            else:
+                self.iteration.histogram.record((time.time() - started) * 1000)
+        engine.reset_steps()
+        if len(self.records) >= CHUNK_RECORDS:
+            self._flush_records()
+        if engine.aborted_by_user:
+            self._stop_browser()
+            return
+        try:
+            engine.driver.delete_all_cookies()
+        except Exception:
+            self._stop_browser()
+
+    def snapshot(self):
+        """Copies of this user's per-step and iteration stats."""
+        with self.lock:
+            steps = {k: StepStats().merge(v) for k, v in self.stats.items()}
+            return steps, StepStats().merge(self.iteration)
+
+
+def merge_users(users: list):
+    steps, iteration = {}, StepStats()
+    for user in users:
+        user_steps, user_iteration = user.snapshot()
+        for key, stats in user_steps.items():
+            steps.setdefault(key, StepStats()).merge(stats)
+        iteration.merge(user_iteration)
+    return steps, iteration
+
+
+def load_report(steps: dict, iteration: StepStats, elapsed: float) -> dict:
+    elapsed = max(elapsed, 0.001)
+
+    def row(stats: StepStats) -> dict:
+        attempts = stats.histogram.count + stats.errors
+        return dict(
+            stats.histogram.summary(),
+            errors=stats.errors,
+            error_rate=round(stats.errors / attempts, 4) if attempts else 0,
+            throughput_per_sec=round(stats.histogram.count / elapsed, 3),
+        )
+
+    return {
+        "elapsed_sec": round(elapsed, 1),
+        "iteration": row(iteration),
+        "steps": {key: row(stats) for key, stats in steps.items()},
+        "errors": {k: stats.messages for k, stats in steps.items() if stats.errors},
+        "histograms": {key: stats.histogram.to_dict() for key, stats in steps.items()},
+    }
+
+
+def format_report(report: dict) -> list:
+    it = report["iteration"]
+    lines = [
+        f"{report['elapsed_sec']:.0f}s: {it['count']} iterations "
+        f"({it['throughput_per_sec']:.2f}/s), {it['errors']} failed",
+        f"{'Step':<32} {'ok':>7} {'err%':>6} {'/s':>7} "
+        f"{'p50':>7} {'p95':>7} {'p99':>7}",
+    ]
+    for key, step in report["steps"].items():
+        lines.append(
+            f"{key[:32]:<32} {step['count']:>7} {step['error_rate'] * 100:>5.1f}% "
+            f"{step['throughput_per_sec']:>7.2f} "
+            + " ".join(
+                f"{step[p]:>7}" if step[p] is not None else f"{'-':>7}"
+                for p in ("p50_ms", "p95_ms", "p99_ms")
+            )
+        )
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a JSON flow as a load test")
+    parser.add_argument("flow")
+    parser.add_argument("project", nargs="?", default=os.getenv("PROJECT", "UNKNOWN"))
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--ramp-up", type=float, default=0, help="seconds")
+    parser.add_argument("--duration", type=float, default=0, help="seconds")
+    parser.add_argument("--iterations", type=int, default=0, help="per user")
+    parser.add_argument("--report-every", type=float, default=10, help="seconds")
+    options = parser.parse_args()
+    if not options.duration and not options.iterations:
+        parser.error("give --duration and/or --iterations")
+
+    for key, value in LOAD_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+    from tests.json_runner import _validate_flow_json, prepare_flow
+    from tests.base_test_engine import BaseTestEngine
+
+    with open(options.flow, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    errors = _validate_flow_json(data)
+    if errors:
+        print("Invalid flow JSON:\n" + "\n".join(f" - {e}" for e in errors))
+        sys.exit(2)
+    project_config, steps = prepare_flow(data, options.project)
+
+    # The load run itself is an indexed run; virtual users write no run dirs
+    coordinator = BaseTestEngine(dict(project_config))
+    run_dir = coordinator.create_run_dir("load")
+    print(f"RUN_DIR: {run_dir}")
+
+    stop_event = threading.Event()
+    users = [
+        VirtualUser(n, project_config, steps, stop_event, options, run_dir)
+        for n in range(options.users)
+    ]
+    started = time.time()
+    next_report = started + options.report_every
+    for user in users:
+        user.start()
+    try:
+        while any(user.is_alive() for user in users):
+            time.sleep(0.5)
+            now = time.time()
+            if options.duration and now - started >= options.duration:
+                stop_event.set()
+            if now >= next_report:
+                next_report = now + options.report_every
+                report = load_report(*merge_users(users), now - started)
+                active = sum(1 for user in users if user.engine is not None)
+                print(f"[{active} users] {format_report(report)[0]}", flush=True)
+    except KeyboardInterrupt:
+        print("Stopping virtual users...")
+    finally:
+        stop_event.set()
+        for user in users:
+            user.join(timeout=60)
+
+    elapsed = time.time() - started
+    report = load_report(*merge_users(users), elapsed)
+    print("\n".join(format_report(report)))
+    failed = report["iteration"]["errors"]
+    summary = {
+        "project": project_config.get("name"),
+        "mode": "load",
+        "status": "failed" if failed else "passed",
+        "error": f"{failed} iterations failed" if failed else None,
+        "timestamp": datetime.now().isoformat(),
+        "durationSec": round(elapsed, 1),
+        "load": dict(
+            report,
+            users=options.users,
+            ramp_up_sec=options.ramp_up,
+            duration_sec=options.duration,
+            iterations_per_user=options.iterations,
+        ),
+    }
+    summary_path = os.path.join(run_dir, "summary.json")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    coordinator._index("record_summary", os.path.basename(run_dir), summary, run_dir)
+    coordinator._index(
+        "add_artifacts",
+        os.path.basename(run_dir),
+        [summary_path, os.path.join(run_dir, STEPS_FILENAME)],
+    )
+    print(f"Report saved: {summary_path}")
+
+
+if __name__ == "__main__":
+    main()
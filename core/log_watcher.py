@@ -0,0 +1,177 @@
+"""Watch logs/ and report which run directories were added, changed or removed.
+
+On Linux this uses inotify (through ctypes, no extra dependency): the logs root
+is watched for run directories appearing or disappearing, and every run
+directory (those present at startup and those created later) is watched for
+file writes. Elsewhere, or if inotify is unavailable, a polling fallback
+checks the mtime of the logs root and of each run directory, and asks the run
+index which runs were updated since the last poll. Consumers re-index the
+runs reported here, so runs written by another process show up too.
+"""
+
+import os
+import sys
+import time
+import ctypes
+import select
+import struct
+import logging
+import threading
+
+from core.blob_store import BLOBS_DIRNAME
+from core.run_index import INDEX_FILENAME, get_run_index
+
+# inotify constants (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+
+_ROOT_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+_RUN_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE | IN_CREATE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class LogsWatcher(threading.Thread):
+    """Background thread collecting the names of run directories that changed.
+
+    Consumers call drain() from their own thread: it returns the set of run
+    names changed since the previous call, or None when events were lost and
+    a full reload is required.
+    """
+
+    def __init__(self, logs_dir: str, poll_interval: float = 2.0):
+        super().__init__(daemon=True)
+        self.logs_dir = os.path.abspath(logs_dir)
+        self.poll_interval = poll_interval
+        self.backend = None
+        self._pending = set()
+        self._overflow = False
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    # ---- consumer API -------------------------------------------------
+
+    def notify(self, run_name: str) -> None:
+        """Mark a run as changed (used by writers that know what they touched)."""
+        with self._lock:
+            self._pending.add(run_name)
+
+    def drain(self):
+        with self._lock:
+            if self._overflow:
+                self._overflow = False
+                self._pending.clear()
+                return None
+            changed, self._pending = self._pending, set()
+        return changed
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    # ---- thread body --------------------------------------------------
+
+    def run(self) -> None:
+        os.makedirs(self.logs_dir, exist_ok=True)
+        if sys.platform.startswith("linux"):
+            try:
+                self._run_inotify()
+                return
+            except Exception as e:
+                logging.warning(f"inotify unavailable, polling logs instead: {e}")
+        self._run_polling()
+
+    def _run_inotify(self) -> None:
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        def add_watch(path, mask):
+            wd = libc.inotify_add_watch(fd, os.fsencode(path), mask)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {path}")
+            return wd
+
+        try:
+            root_wd = add_watch(self.logs_dir, _ROOT_MASK)
+            run_wds = {}
+            # Runs that already exist get written to as well (reruns, other tools)
+            for entry in os.scandir(self.logs_dir):
+                if entry.is_dir() and entry.name != BLOBS_DIRNAME:
+                    try:
+                        run_wds[add_watch(entry.path, _RUN_MASK)] = entry.name
+                    except OSError:
+                        pass
+            self.backend = "inotify"
+            while not self._stop_event.is_set():
+                ready, _, _ = select.select([fd], [], [], 0.5)
+                if not ready:
+                    continue
+                try:
+                    buf = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                offset = 0
+                while offset < len(buf):
+                    wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buf, offset)
+                    offset += _EVENT_HEADER.size
+                    name = buf[offset : offset + length].rstrip(b"\0").decode(
+                        "utf-8", "replace"
+                    )
+                    offset += length
+                    if mask & IN_Q_OVERFLOW:
+                        with self._lock:
+                            self._overflow = True
+                        continue
+                    if wd == root_wd:
+                        # Only run directories matter at the root (skip index.db files)
+                        if not mask & IN_ISDIR or name == BLOBS_DIRNAME:
+                            continue
+                        if mask & (IN_CREATE | IN_MOVED_TO):
+                            run_path = os.path.join(self.logs_dir, name)
+                            try:
+                                run_wds[add_watch(run_path, _RUN_MASK)] = name
+                            except OSError:
+                                pass
+                        self.notify(name)
+                    elif wd in run_wds:
+                        if mask & IN_IGNORED:
+                            run_wds.pop(wd, None)
+                            continue
+                        self.notify(run_wds[wd])
+        finally:
+            os.close(fd)
+
+    def _run_polling(self) -> None:
+        self.backend = "polling"
+        index = get_run_index(os.path.join(self.logs_dir, INDEX_FILENAME))
+        known = None
+        since = time.time()
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                # Run directory mtimes change when files are created or replaced
+                runs = {
+                    e.name: e.stat().st_mtime
+                    for e in os.scandir(self.logs_dir)
+                    if e.is_dir() and e.name != BLOBS_DIRNAME
+                }
+                if known is not None:
+                    for name in runs.keys() | known.keys():
+                        if runs.get(name) != known.get(name):
+                            self.notify(name)
+                known = runs
+                # Writes inside runs are visible through the index
+                now = time.time()
+                for name in index.runs_updated_since(since):
+                    self.notify(name)
+                since = now
+            except Exception as e:
+                logging.warning(f"Polling logs failed: {e}")
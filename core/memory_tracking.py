@@ -0,0 +1,120 @@
+"""JS heap, DOM node, listener and document growth across the steps of a run.
+
+After every step the engine samples four Performance.getMetrics counters
+(optionally after HeapProfiler.collectGarbage, so the heap reading is not
+just garbage waiting to be collected) into the step's "memory". At the end of
+the run a least-squares slope per counter, in units per step, is compared
+with the configured limits; any slope above its limit flags the run with
+leak_suspected in summary.json. Meant for single-page storefronts, where the
+document survives from step to step: a full navigation resets the counters.
+
+Limits (0 disables a check) come from the run env or <PROJECT>_ variants:
+    LEAK_HEAP_KB_PER_STEP, LEAK_NODES_PER_STEP, LEAK_LISTENERS_PER_STEP,
+    LEAK_DOCUMENTS_PER_STEP; MEMORY_GC=1 collects garbage before each sample.
+"""
+
+import os
+from dataclasses import dataclass
+
+from core.utils import normalize_prefix
+
+MEMORY_METRICS = {
+    "JSHeapUsedSize": "js_heap_used_bytes",
+    "Nodes": "dom_nodes",
+    "JSEventListeners": "js_event_listeners",
+    "Documents": "documents",
+}
+
+# Samples needed before a slope means anything
+MIN_SAMPLES = 3
+
+
+@dataclass
+class LeakThresholds:
+    heap_kb_per_step: float = 1024
+    nodes_per_step: float = 500
+    listeners_per_step: float = 100
+    documents_per_step: float = 1
+    gc: bool = False
+
+    @classmethod
+    def resolve(cls, project_name: str = None):
+        prefix = normalize_prefix(project_name)
+        thresholds = cls()
+        for field, env in (
+            ("heap_kb_per_step", "LEAK_HEAP_KB_PER_STEP"),
+            ("nodes_per_step", "LEAK_NODES_PER_STEP"),
+            ("listeners_per_step", "LEAK_LISTENERS_PER_STEP"),
+            ("documents_per_step", "LEAK_DOCUMENTS_PER_STEP"),
+        ):
+            for value in (os.getenv(env), os.getenv(f"{prefix}_{env}")):
+                try:
+                    if value not in (None, ""):
+                        setattr(thresholds, field, max(float(value), 0))
+                        break
+                except ValueError:
+                    continue
+        gc = os.getenv("MEMORY_GC") or os.getenv(f"{prefix}_MEMORY_GC")
+        thresholds.gc = str(gc).lower() in {"1", "true"}
+        return thresholds
+
+    def limits(self) -> dict:
+        """Slope limits keyed by sampled field, in field units per step."""
+        return {
+            "js_heap_used_bytes": self.heap_kb_per_step * 1024,
+            "dom_nodes": self.nodes_per_step,
+            "js_event_listeners": self.listeners_per_step,
+            "documents": self.documents_per_step,
+        }
+
+
+def sample_memory(driver, gc: bool = False) -> dict:
+    """Current heap/node/listener/document counts of the page."""
+    if gc:
+        try:
+            driver.execute_cdp_cmd("HeapProfiler.collectGarbage", {})
+        except Exception:
+            pass
+    metrics = driver.execute_cdp_cmd("Performance.getMetrics", {})
+    sample = {}
+    for metric in metrics.get("metrics", []):
+        field = MEMORY_METRICS.get(metric.get("name"))
+        if field is not None:
+            sample[field] = int(metric.get("value") or 0)
+    return sample
+
+
+def slope(values: list) -> float:
+    """Least-squares growth per sample (0 for fewer than two values)."""
+    n = len(values)
+    if n < 2:
+        return 0.0
+    mean_x = (n - 1) / 2
+    mean_y = sum(values) / n
+    num = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values))
+    den = sum((x - mean_x) ** 2 for x in range(n))
+    return num / den
+
+
+def check_growth(samples: list, thresholds: LeakThresholds) -> dict:
+    """Slopes of the per-step samples and the counters over their limit."""
+    samples = [s for s in samples if s]
+    result = {
+        "samples": len(samples),
+        "limits": thresholds.limits(),
+        "slopes": {},
+        "flagged": [],
+    }
+    if len(samples) < MIN_SAMPLES:
+        result["leak_suspected"] = False
+        return result
+    for field, limit in thresholds.limits().items():
+        values = [s[field] for s in samples if field in s]
+        if len(values) < MIN_SAMPLES:
+            continue
+        growth = round(slope(values), 2)
+        result["slopes"][field] = growth
+        if limit and growth > limit:
+            result["flagged"].append(field)
+    result["leak_suspected"] = bool(result["flagged"])
+    return result
@@ -0,0 +1,342 @@
+"""Record a run's network traffic into an archive and replay it offline.
+
+NETWORK_MODE=record intercepts every response (Fetch domain, Response
+stage), stores status, headers and body in a zip archive and lets the
+response through. NETWORK_MODE=replay intercepts every request (Request
+stage) and answers it with Fetch.fulfillRequest from the archive, so the
+site is never contacted and runs go at local speed.
+
+Requests match on method + URL with the query string normalised (sorted,
+REPLAY_IGNORE_PARAMS removed, "*" drops the query entirely) and, with
+REPLAY_MATCH_BODY=1, the POST body. Repeated requests are served in recorded
+order. REPLAY_LATENCY_MS adds a fixed delay ("recorded" replays the
+recorded time to first byte); REPLAY_UNMATCHED=fail|passthrough decides what
+happens to requests missing from the archive.
+
+Archive layout (zip): index.json (list of entries) and bodies/<sha256>.
+
+    python -m core.network_replay info recordings/MY_SHOP.zip
+"""
+
+import os
+import json
+import time
+import heapq
+import base64
+import hashlib
+import logging
+import zipfile
+import threading
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# The archive keeps decoded bodies, so these no longer describe them
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+_MAX_STARTS = 5000
+
+
+def request_key(method: str, url: str, post_data, options) -> str:
+    """Normalised identity of a request under the matching rules."""
+    parts = urlsplit(url)
+    query = ""
+    if "*" not in options.ignore_params:
+        params = [
+            (k, v)
+            for k, v in parse_qsl(parts.query, keep_blank_values=True)
+            if k not in options.ignore_params
+        ]
+        query = urlencode(sorted(params))
+    key = f"{(method or 'GET').upper()} {parts.scheme}://{parts.netloc}{parts.path}"
+    if query:
+        key += f"?{query}"
+    if options.match_body and post_data:
+        key += " #" + hashlib.sha1(post_data.encode("utf-8")).hexdigest()[:16]
+    return key
+
+
+class NetworkArchive:
+    """Zip of recorded responses; bodies stored once per content hash."""
+
+    def __init__(self, path: str, mode: str = "r"):
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self.entries = []
+        if mode == "w":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._zip = zipfile.ZipFile(path + ".tmp", "w", zipfile.ZIP_DEFLATED)
+            self._bodies = set()
+        else:
+            self._zip = zipfile.ZipFile(path)
+            self.entries = json.loads(self._zip.read("index.json").decode("utf-8"))
+        self._by_key = {}
+        self._served = {}
+        for entry in self.entries:
+            self._by_key.setdefault(entry["key"], []).append(entry)
+
+    def add(self, entry: dict, body: bytes) -> None:
+        digest = hashlib.sha256(body).hexdigest()
+        entry["body"] = digest
+        with self._lock:
+            if digest not in self._bodies:
+                self._bodies.add(digest)
+                self._zip.writestr(f"bodies/{digest}", body)
+            self.entries.append(entry)
+
+    def next_match(self, key: str):
+        """Next recorded response for key, in recorded order (last one repeats)."""
+        with self._lock:
+            candidates = self._by_key.get(key)
+            if not candidates:
+                return None
+            position = self._served.get(key, 0)
+            self._served[key] = position + 1
+            return candidates[min(position, len(candidates) - 1)]
+
+    def body(self, entry: dict) -> bytes:
+        with self._lock:
+            return self._zip.read(f"bodies/{entry['body']}")
+
+    def body_size(self, entry: dict) -> int:
+        """Uncompressed size of an entry's body, without reading it."""
+        with self._lock:
+            return self._zip.getinfo(f"bodies/{entry['body']}").file_size
+
+    def close(self) -> None:
+        with self._lock:
+            if self.mode == "w":
+                self._zip.writestr("index.json", json.dumps(self.entries, indent=1))
+                self._zip.close()
+                os.replace(self.path + ".tmp", self.path)
+            else:
+                self._zip.close()
+
+
+class _DelayedSender:
+    """Sends CDP commands at a later time from one thread, without blocking."""
+
+    def __init__(self, session):
+        self.session = session
+        self._heap = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = None
+
+    def send_at(self, due: float, method: str, params: dict) -> None:
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="replay-latency", daemon=True
+                )
+                self._thread.start()
+            heapq.heappush(self._heap, (due, next(self._order), method, params))
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and (
+                    not self._heap or self._heap[0][0] > time.monotonic()
+                ):
+                    due = self._heap[0][0] if self._heap else None
+                    self._cond.wait(None if due is None else due - time.monotonic())
+                if self._closed:
+                    return
+                _, _, method, params = heapq.heappop(self._heap)
+            try:
+                self.session.send_nowait(method, params)
+            except Exception as e:
+                logging.debug(f"Replay send failed: {e}")
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+
+class RecordReplay:
+    """Fetch-domain interception on a CDPSession, recording or replaying."""
+
+    def __init__(self, session, options):
+        self.session = session
+        self.options = options
+        self.archive = NetworkArchive(
+            options.archive, "w" if options.mode == "record" else "r"
+        )
+        # Paused requests are handled off the CDP reader thread
+        self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="replay")
+        # Replay latency is waited out here, not in the pool
+        self._delayed = _DelayedSender(session)
+        self._starts = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            "mode": options.mode,
+            "archive": options.archive,
+            "requests": 0,
+            "matched": 0,
+            "unmatched": 0,
+            "bytes": 0,
+        }
+
+    def start(self) -> None:
+        stage = "Response" if self.options.mode == "record" else "Request"
+        if self.options.mode == "record":
+            self.session.on("Network.requestWillBeSent", self._on_request_sent)
+            self.session.send("Network.enable", {})
+        self.session.on("Fetch.requestPaused", self._on_paused)
+        self.session.send(
+            "Fetch.enable", {"patterns": [{"urlPattern": "*", "requestStage": stage}]}
+        )
+
+    def stop(self) -> dict:
+        try:
+            self.session.send("Fetch.disable", {}, timeout=2)
+        except Exception:
+            pass
+        self._pool.shutdown(wait=True)
+        self._delayed.close()
+        self.archive.close()
+        return dict(self.stats)
+
+    def _on_request_sent(self, params: dict) -> None:
+        with self._lock:
+            if len(self._starts) >= _MAX_STARTS:
+                self._starts.pop(next(iter(self._starts)))
+            self._starts[params.get("requestId")] = time.monotonic()
+
+    def _on_paused(self, params: dict) -> None:
+        handler = self._record if self.options.mode == "record" else self._replay
+        self._pool.submit(self._handle, handler, params)
+
+    def _handle(self, handler, params: dict) -> None:
+        try:
+            handler(params)
+        except Exception as e:
+            logging.debug(f"Network {self.options.mode} failed: {e}")
+            try:
+                self.session.send_nowait(
+                    "Fetch.continueRequest", {"requestId": params.get("requestId")}
+                )
+            except Exception:
+                pass
+
+    def _record(self, params: dict) -> None:
+        request = params.get("request") or {}
+        status = params.get("responseStatusCode")
+        body = b""
+        if status is not None and not 300 <= status < 400:
+            try:
+                result = self.session.send(
+                    "Fetch.getResponseBody", {"requestId": params["requestId"]}
+                )
+                raw = result.get("body") or ""
+                body = (
+                    base64.b64decode(raw)
+                    if result.get("base64Encoded")
+                    else raw.encode("utf-8")
+                )
+            except Exception:
+                body = b""
+        with self._lock:
+            started = self._starts.pop(params.get("networkId"), None)
+        if status is not None and not params.get("responseErrorReason"):
+            entry = {
+                "key": request_key(
+                    request.get("method"),
+                    request.get("url", ""),
+                    request.get("postData"),
+                    self.options,
+                ),
+                "url": request.get("url", ""),
+                "status": status,
+                "statusText": params.get("responseStatusText", ""),
+                "headers": [
+                    h
+                    for h in params.get("responseHeaders") or []
+                    if h.get("name", "").lower() not in _DROP_HEADERS
+                ],
+                "ttfb_ms": round((time.monotonic() - started) * 1000)
+                if started
+                else 0,
+            }
+            self.archive.add(entry, body)
+            with self._lock:
+                self.stats["requests"] += 1
+                self.stats["matched"] += 1
+                self.stats["bytes"] += len(body)
+        self.session.send_nowait(
+            "Fetch.continueRequest", {"requestId": params["requestId"]}
+        )
+
+    def _replay(self, params: dict) -> None:
+        request = params.get("request") or {}
+        key = request_key(
+            request.get("method"),
+            request.get("url", ""),
+            request.get("postData"),
+            self.options,
+        )
+        entry = self.archive.next_match(key)
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["matched" if entry else "unmatched"] += 1
+        if entry is None:
+            if self.options.unmatched == "passthrough":
+                self.session.send_nowait(
+                    "Fetch.continueRequest", {"requestId": params["requestId"]}
+                )
+            else:
+                logging.info(f"Replay: no recorded response for {key}")
+                self.session.send_nowait(
+                    "Fetch.failRequest",
+                    {
+                        "requestId": params["requestId"],
+                        "errorReason": "InternetDisconnected",
+                    },
+                )
+            return
+        delay = entry.get("ttfb_ms", 0) if self.options.recorded_latency else 0
+        delay += self.options.latency_ms
+        body = self.archive.body(entry)
+        with self._lock:
+            self.stats["bytes"] += len(body)
+        fulfil = {
+            "requestId": params["requestId"],
+            "responseCode": entry["status"],
+            "responseHeaders": entry["headers"],
+            "body": base64.b64encode(body).decode("ascii"),
+        }
+        # HTTP/2 responses have no status text; CDP rejects a null phrase
+        if entry.get("statusText"):
+            fulfil["responsePhrase"] = entry["statusText"]
+        if delay:
+            self._delayed.send_at(
+                time.monotonic() + delay / 1000.0, "Fetch.fulfillRequest", fulfil
+            )
+        else:
+            self.session.send_nowait("Fetch.fulfillRequest", fulfil)
+
+
+def main():
+    """CLI: python -m core.network_replay info <archive.zip>"""
+    import sys
+
+    if len(sys.argv) != 3 or sys.argv[1] != "info":
+        print("Usage: python -m core.network_replay info <archive.zip>")
+        sys.exit(1)
+    archive = NetworkArchive(sys.argv[2])
+    total = 0
+    for entry in archive.entries:
+        size = archive.body_size(entry)
+        total += size
+        print(f"{entry['status']}  {size:>9}  {entry['key']}")
+    print(f"{len(archive.entries)} responses, {total} bytes")
+    archive.close()
+
+
+if __name__ == "__main__":
+    main()
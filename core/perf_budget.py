@@ -0,0 +1,53 @@
+"""Performance budgets checked by the assert_budget flow action.
+
+A budget maps a metric name to its upper limit, for example
+{"lcp_ms": 2500, "page_bytes": 3000000, "requests": 150}. Metrics are the
+page fields of core/web_vitals.py, the Performance.getMetrics fields, and
+step_duration_sec (duration of the step before the assertion, or of the step
+named by "step"). Each check yields a structured result, kept on the step as
+"budget"; the breaches fail the step through BudgetExceeded.
+"""
+
+from core.web_vitals import CDP_METRICS, PAGE_FIELDS
+
+BUDGET_METRICS = PAGE_FIELDS + tuple(CDP_METRICS.values()) + ("step_duration_sec",)
+
+
+class BudgetExceeded(Exception):
+    def __init__(self, breaches: list):
+        self.breaches = breaches
+        super().__init__(
+            "Budget exceeded: "
+            + ", ".join(
+                f"{b['metric']} {b['actual']:g} > {b['limit']:g}" for b in breaches
+            )
+        )
+
+
+def validate_budgets(budgets) -> list:
+    """Error messages for a malformed "budgets" object (empty if valid)."""
+    if not isinstance(budgets, dict) or not budgets:
+        return ["'budgets' must be a non-empty object of metric: limit"]
+    errors = []
+    for metric, limit in budgets.items():
+        numeric = isinstance(limit, (int, float)) and not isinstance(limit, bool)
+        if metric not in BUDGET_METRICS:
+            errors.append(f"unknown budget metric '{metric}'")
+        elif not numeric or limit < 0:
+            errors.append(f"budget for '{metric}' must be a non-negative number")
+    return errors
+
+
+def check_budgets(budgets: dict, values: dict) -> list:
+    """One result per budget: metric, limit, actual and status pass/fail/missing."""
+    results = []
+    for metric, limit in budgets.items():
+        actual = values.get(metric)
+        if actual is None:
+            status = "missing"
+        else:
+            status = "pass" if actual <= limit else "fail"
+        results.append(
+            {"metric": metric, "limit": limit, "actual": actual, "status": status}
+        )
+    return results
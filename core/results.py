@@ -3,9 +3,12 @@ import json
 import subprocess
 import platform
 import sys
+import tempfile
 import tkinter as tk
 import tkinter.ttk as ttk
 import tkinter.scrolledtext as scrolledtext
+from core.run_index import get_run_index
+from core.retention import read_run_file, read_run_text
 
 
 def refresh_results(app) -> None:
@@ -41,49 +44,71 @@ def view_selected_artifact(app) -> None:
         artifact_name.split(" ", 1)[1] if " " in artifact_name else artifact_name
     )
 
-    # Find the latest test directory
-    logs_dir = "logs"
-    if os.path.exists(logs_dir):
-        test_dirs = [
-            d
-            for d in os.listdir(logs_dir)
-            if os.path.isdir(os.path.join(logs_dir, d)) and "checkout" in d
-        ]
-
-        if test_dirs:
-            latest_dir = sorted(test_dirs, reverse=True)[0]
-            artifact_path = os.path.join(logs_dir, latest_dir, clean_name)
-
-            if os.path.exists(artifact_path):
-                try:
-                    if clean_name.endswith(".png"):
-                        # Open image with default viewer
-                        if platform.system() == "Darwin":  # macOS
-                            subprocess.run(["open", artifact_path])
-                        elif platform.system() == "Windows":
-                            subprocess.run(["explorer", artifact_path])
-                        else:  # Linux
-                            subprocess.run(["xdg-open", artifact_path])
-                    elif clean_name.endswith(".html"):
-                        # Open HTML in browser
-                        if platform.system() == "Darwin":  # macOS
-                            subprocess.run(["open", artifact_path])
-                        elif platform.system() == "Windows":
-                            subprocess.run(["explorer", artifact_path])
-                        else:  # Linux
-                            subprocess.run(["xdg-open", artifact_path])
-                    else:
-                        # Open text files with default editor
-                        if platform.system() == "Darwin":  # macOS
-                            subprocess.run(["open", artifact_path])
-                        elif platform.system() == "Windows":
-                            subprocess.run(["explorer", artifact_path])
-                        else:  # Linux
-                            subprocess.run(["xdg-open", artifact_path])
-                except Exception as e:
-                    app.add_log(f"❌ Error opening artifact: {str(e)}", "error")
-            else:
-                app.add_log(f"❌ Artifact not found: {clean_name}", "warning")
+    # Artifacts belong to the run currently shown in Results
+    run_dir = _results_run_dir(app)
+    if run_dir:
+        artifact_path = _artifact_file(run_dir, clean_name)
+
+        if artifact_path:
+            try:
+                if clean_name.endswith((".png", ".jpg", ".jpeg", ".webp")):
+                    # Open image with default viewer
+                    if platform.system() == "Darwin":  # macOS
+                        subprocess.run(["open", artifact_path])
+                    elif platform.system() == "Windows":
+                        subprocess.run(["explorer", artifact_path])
+                    else:  # Linux
+                        subprocess.run(["xdg-open", artifact_path])
+                elif clean_name.endswith(".html"):
+                    # Open HTML in browser
+                    if platform.system() == "Darwin":  # macOS
+                        subprocess.run(["open", artifact_path])
+                    elif platform.system() == "Windows":
+                        subprocess.run(["explorer", artifact_path])
+                    else:  # Linux
+                        subprocess.run(["xdg-open", artifact_path])
+                else:
+                    # Open text files with default editor
+                    if platform.system() == "Darwin":  # macOS
+                        subprocess.run(["open", artifact_path])
+                    elif platform.system() == "Windows":
+                        subprocess.run(["explorer", artifact_path])
+                    else:  # Linux
+                        subprocess.run(["xdg-open", artifact_path])
+            except Exception as e:
+                app.add_log(f"❌ Error opening artifact: {str(e)}", "error")
+        else:
+            app.add_log(f"❌ Artifact not found: {clean_name}", "warning")
+
+
+def _results_run_dir(app):
+    """Directory of the run shown in Results, falling back to the latest indexed run."""
+    run_dir = getattr(app, "results_run_dir", None)
+    if run_dir:
+        return run_dir
+    latest = get_run_index().latest_run()
+    return latest["path"] if latest else None
+
+
+def _artifact_file(run_path, name):
+    """Filesystem path of an artifact, for handing it to an external viewer.
+
+    Bundled and archived runs have no file per artifact, so just that one
+    member is copied into a temp directory.
+    """
+    if os.path.isdir(run_path):
+        path = os.path.join(run_path, name)
+        return path if os.path.exists(path) else None
+    data = read_run_file(run_path, name)
+    if data is None:
+        return None
+    run_name = os.path.splitext(os.path.basename(run_path))[0]
+    out_dir = os.path.join(tempfile.gettempdir(), "gamma-artifacts", run_name)
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, name)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
 
 
 def auto_refresh_all_tabs(app) -> None:
@@ -101,31 +126,22 @@ def auto_refresh_all_tabs(app) -> None:
 def refresh_results_detailed(app) -> None:
     """Load and display latest test results with proper artifacts"""
     try:
-        # Find latest test directory
-        logs_dir = "logs"
+        # Latest run comes straight from the run index
         latest_summary = None
-        latest_dir = None
-
-        if os.path.exists(logs_dir):
-            # Get all test directories
-            test_dirs = [
-                d
-                for d in os.listdir(logs_dir)
-                if os.path.isdir(os.path.join(logs_dir, d)) and "checkout" in d
-            ]
-
-            if test_dirs:
-                # Sort by name (timestamp-based) and get latest
-                test_dirs.sort(reverse=True)
-                latest_dir = test_dirs[0]
-                summary_file = os.path.join(logs_dir, latest_dir, "summary.json")
-
-                try:
-                    if os.path.exists(summary_file):
-                        with open(summary_file, "r") as f:
-                            latest_summary = json.load(f)
-                except Exception as e:
-                    app.add_log(f"❌ Error reading summary: {str(e)}", "error")
+        index = get_run_index()
+        index.ensure_populated()
+        latest_run = index.latest_run()
+        latest_dir = latest_run["name"] if latest_run else None
+        app.results_run_dir = latest_run["path"] if latest_run else None
+
+        if latest_run:
+            try:
+                # Directory, bundle or archive: only summary.json is read
+                raw = read_run_text(latest_run["path"], "summary.json")
+                if raw is not None:
+                    latest_summary = json.loads(raw)
+            except Exception as e:
+                app.add_log(f"❌ Error reading summary: {str(e)}", "error")
 
         # Update summary display
         if hasattr(app, "summary_text"):
@@ -146,27 +162,26 @@ def refresh_results_detailed(app) -> None:
             app.artifacts_listbox.delete(0, tk.END)
 
             if latest_dir:
-                artifacts_path = os.path.join(logs_dir, latest_dir)
-                if os.path.exists(artifacts_path):
-                    artifacts = []
-                    for item in os.listdir(artifacts_path):
-                        if item.endswith((".png", ".html", ".json", ".log", ".txt")):
-                            # Add emoji based on file type
-                            if item.endswith(".png"):
-                                display_name = f"🖼️ {item}"
-                            elif item.endswith(".html"):
-                                display_name = f"📄 {item}"
-                            elif item.endswith(".json"):
-                                display_name = f"📊 {item}"
-                            elif item.endswith(".txt"):
-                                display_name = f"📝 {item}"
-                            else:
-                                display_name = f"📁 {item}"
-                            artifacts.append(display_name)
-
-                    for artifact in sorted(artifacts):
-                        app.artifacts_listbox.insert(tk.END, artifact)
+                artifacts = []
+                for artifact in index.list_artifacts(latest_dir):
+                    item = artifact["name"]
+                    # Add emoji based on file type
+                    if item.endswith((".png", ".jpg", ".jpeg", ".webp")):
+                        display_name = f"🖼️ {item}"
+                    elif item.endswith(".html"):
+                        display_name = f"📄 {item}"
+                    elif item.endswith(".json"):
+                        display_name = f"📊 {item}"
+                    elif item.endswith(".txt"):
+                        display_name = f"📝 {item}"
+                    else:
+                        display_name = f"📁 {item}"
+                    artifacts.append(display_name)
+
+                for artifact in sorted(artifacts):
+                    app.artifacts_listbox.insert(tk.END, artifact)
 
+                if artifacts:
                     app.add_log(
                         f"📁 Loaded {len(artifacts)} artifacts from {latest_dir}",
                         "info",
@@ -189,29 +204,29 @@ def view_selected_artifact_button(app) -> None:
     clean_name = (
         artifact_name.split(" ", 1)[1] if " " in artifact_name else artifact_name
     )
-    logs_dir = "logs"
-    if os.path.exists(logs_dir):
-        test_dirs = [
-            d
-            for d in os.listdir(logs_dir)
-            if os.path.isdir(os.path.join(logs_dir, d)) and "checkout" in d
-        ]
-        if test_dirs:
-            latest_dir = sorted(test_dirs, reverse=True)[0]
-            artifact_path = os.path.join(logs_dir, latest_dir, clean_name)
-            if os.path.exists(artifact_path):
-                try:
-                    if clean_name.endswith((".txt", ".log", ".json")):
-                        open_text_artifact_internally(app, artifact_path, clean_name)
-                    else:
-                        open_file_externally(app, artifact_path)
-                except Exception as e:
-                    app.add_log(f"❌ Error opening artifact: {str(e)}", "error")
+    run_dir = _results_run_dir(app)
+    if run_dir:
+        try:
+            if clean_name.endswith((".txt", ".log", ".json")):
+                # Bundles are memory-mapped: just this member is read, by offset
+                content = read_run_text(run_dir, clean_name)
+                if content is None:
+                    app.add_log(f"❌ Artifact not found: {clean_name}", "warning")
+                    return
+                open_text_artifact_internally(
+                    app, os.path.join(run_dir, clean_name), clean_name, content
+                )
             else:
-                app.add_log(f"❌ Artifact not found: {clean_name}", "warning")
+                artifact_path = _artifact_file(run_dir, clean_name)
+                if not artifact_path:
+                    app.add_log(f"❌ Artifact not found: {clean_name}", "warning")
+                    return
+                open_file_externally(app, artifact_path)
+        except Exception as e:
+            app.add_log(f"❌ Error opening artifact: {str(e)}", "error")
 
 
-def open_text_artifact_internally(app, file_path, title) -> None:
+def open_text_artifact_internally(app, file_path, title, content=None) -> None:
     """Metin tabanlı artifact'leri uygulama içinde yeni bir pencerede açar."""
     popup = tk.Toplevel(app.root)
     popup.title(f"Artifact Görüntüle: {title}")
@@ -232,9 +247,10 @@ def open_text_artifact_internally(app, file_path, title) -> None:
     text_widget.pack(fill="both", expand=True)
 
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            content = f.read()
-            text_widget.insert(tk.END, content)
+        if content is None:
+            with open(file_path, "r", encoding="utf-8") as f:
+                content = f.read()
+        text_widget.insert(tk.END, content)
         text_widget.config(state="disabled")  # Sadece okunabilir yap
     except Exception as e:
         text_widget.insert(tk.END, f"Dosya okunurken hata oluştu: {e}")
@@ -0,0 +1,352 @@
+"""Retention policy for logs/: archive older runs, enforce age and size quotas.
+
+The newest LOGS_MAX_RUNS runs of each project stay as plain directories.
+Older runs are compressed into a single logs/<run>.zip each, which History,
+search and the details popup keep reading through the run index. Runs past
+the age limit are deleted (failed runs are pinned for longer), and each
+project is trimmed oldest-first to stay under its byte quota. All of this
+runs on a background thread so neither the engine nor the Tk thread waits on
+rmtree or compression. The GUI, the scheduler and standalone runs may all
+enforce retention at once, so a pass holds logs/.retention.lock and is
+skipped while another process holds it.
+"""
+
+import os
+import queue
+import shutil
+import logging
+import zipfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from core.blob_store import BlobStore
+from core.run_bundle import BUNDLE_SUFFIX, RunBundle, pack_run_dir
+from core.run_index import ARCHIVE_SUFFIX, INDEX_FILENAME, get_run_index, logs_root
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_FILENAME = ".retention.lock"
+
+# Already-compressed formats are stored as-is inside archives
+_STORED_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".mjpeg", ".gz", ".zip")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+@dataclass
+class RetentionPolicy:
+    keep_full: int = 10
+    max_age_days: int = 30
+    failed_max_age_days: int = 90
+    max_project_bytes: int = 1024 * 1024 * 1024
+    archive: bool = True
+    bundle: bool = False
+
+    @classmethod
+    def from_env(cls) -> "RetentionPolicy":
+        """Read LOGS_* settings; 0 disables the corresponding limit."""
+        return cls(
+            keep_full=_env_int("LOGS_MAX_RUNS", 10),
+            max_age_days=_env_int("LOGS_MAX_AGE_DAYS", 30),
+            failed_max_age_days=_env_int("LOGS_FAILED_MAX_AGE_DAYS", 90),
+            max_project_bytes=_env_int("LOGS_MAX_PROJECT_MB", 1024) * 1024 * 1024,
+            archive=os.getenv("LOGS_ARCHIVE_OLD_RUNS", "1") == "1",
+            bundle=os.getenv("LOGS_RUN_FORMAT", "dir") == "bundle",
+        )
+
+
+@contextmanager
+def retention_lock(logs_dir: str = None):
+    """Hold the logs/ retention lock without waiting; yields False if it is taken."""
+    logs_dir = logs_dir or logs_root()
+    os.makedirs(logs_dir, exist_ok=True)
+    with open(os.path.join(logs_dir, LOCK_FILENAME), "a+b") as f:
+        f.seek(0)
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _is_failed(run: dict) -> bool:
+    return str(run.get("status") or "").lower() in {"failed", "error"}
+
+
+def _started(run: dict):
+    try:
+        return datetime.strptime(run.get("started_at") or "", "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None
+
+
+def _dir_size(path: str) -> int:
+    """Bytes a run directory holds, with shared blobs split between their users.
+
+    A deduplicated artifact is a hard link to logs/blobs/<hash>; the blob
+    store's own link is not a run, so the remaining links share its size.
+    """
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                st = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            total += st.st_size // max(st.st_nlink - 1, 1)
+    return total
+
+
+def plan_retention(
+    runs, policy: RetentionPolicy, now: datetime = None, exclude=()
+) -> list:
+    """Return [(action, run)] with action 'archive', 'bundle' or 'delete'.
+
+    runs must be newest first and carry size_bytes for finished runs. Runs
+    named in exclude (e.g. one whose engine is still shutting down) are left
+    alone.
+    """
+    now = now or datetime.now()
+    planned = {}
+    by_project = {}
+    for run in runs:
+        if run.get("status") == "running" or run["name"] in exclude:
+            continue
+        by_project.setdefault(run.get("project") or "", []).append(run)
+
+    for project_runs in by_project.values():
+        kept = []
+        for run in project_runs:
+            started = _started(run)
+            age_limit = (
+                policy.failed_max_age_days if _is_failed(run) else policy.max_age_days
+            )
+            if age_limit > 0 and started and now - started > timedelta(days=age_limit):
+                planned[run["name"]] = ("delete", run)
+                continue
+            kept.append(run)
+            # The newest runs stay as they are, whatever the format
+            if len(kept) <= max(policy.keep_full, 1):
+                continue
+            if policy.archive and not run.get("archived"):
+                planned[run["name"]] = ("archive", run)
+            elif policy.bundle and os.path.isdir(run["path"]):
+                planned[run["name"]] = ("bundle", run)
+
+        # Byte quota: drop the oldest passing runs first, failed runs last
+        if policy.max_project_bytes > 0:
+            total = sum(r.get("size_bytes") or 0 for r in kept)
+            newest = set(r["name"] for r in kept[: max(policy.keep_full, 1)])
+            victims = [r for r in reversed(kept) if r["name"] not in newest]
+            victims.sort(key=_is_failed)
+            for run in victims:
+                if total <= policy.max_project_bytes:
+                    break
+                total -= run.get("size_bytes") or 0
+                planned[run["name"]] = ("delete", run)
+    return list(planned.values())
+
+
+def archive_run(index, run: dict) -> None:
+    """Compress a run (directory or bundle) into logs/<run>.zip and drop it."""
+    path = run["path"]
+    if os.path.isdir(path):
+        source = path.rstrip(os.sep)
+        names = sorted(
+            n for n in os.listdir(path) if os.path.isfile(os.path.join(path, n))
+        )
+    elif path.endswith(BUNDLE_SUFFIX) and os.path.isfile(path):
+        source = path[: -len(BUNDLE_SUFFIX)]
+        with RunBundle(path) as bundle:
+            names = bundle.names()
+    else:
+        return
+    archive_path = source + ARCHIVE_SUFFIX
+    tmp_path = archive_path + ".tmp"
+    with zipfile.ZipFile(tmp_path, "w") as zf:
+        for name in names:
+            compress = (
+                zipfile.ZIP_STORED
+                if name.lower().endswith(_STORED_EXTENSIONS)
+                else zipfile.ZIP_DEFLATED
+            )
+            zf.writestr(name, read_run_file(path, name), compress_type=compress)
+    os.replace(tmp_path, archive_path)
+    index.upsert_run(
+        run["name"],
+        path=archive_path,
+        archived=1,
+        size_bytes=os.path.getsize(archive_path),
+    )
+    _remove_path(path)
+    logging.info(f"🗜️ Archived old run: {archive_path}")
+
+
+def bundle_run(index, run: dict) -> None:
+    """Pack a finished run directory into a single logs/<run>.bundle file.
+
+    Called with the retention lock held; the run is looked up again in case
+    it was rerun or moved since the pass was planned.
+    """
+    current = index.get_run(run["name"]) or {}
+    if current.get("status") == "running" or current.get("path") != run["path"]:
+        return
+    bundle_path = pack_run_dir(run["path"])
+    index.index_bundle(bundle_path)
+    shutil.rmtree(run["path"], ignore_errors=True)
+    logging.info(f"📦 Bundled run: {bundle_path}")
+
+
+def _remove_path(path: str) -> None:
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def delete_run(index, run: dict) -> None:
+    path = run["path"]
+    _remove_path(path)
+    index.delete_run(run["name"])
+    logging.info(f"🧹 Pruned old run: {path}")
+
+
+def enforce_retention(
+    policy: RetentionPolicy = None, index=None, exclude=()
+) -> dict:
+    """Apply the retention policy to every indexed run. Returns action counts.
+
+    Returns None without doing anything while another process holds the lock.
+    """
+    index = index or get_run_index()
+    with retention_lock(os.path.dirname(index.path)) as locked:
+        if not locked:
+            logging.info("Retention skipped: another process is pruning logs/")
+            return None
+        return _enforce_retention(policy or RetentionPolicy.from_env(), index, exclude)
+
+
+def _enforce_retention(policy: RetentionPolicy, index, exclude) -> dict:
+    index.ensure_populated()
+    runs = index.list_runs()
+    # Sizes are measured once per finished run and remembered in the index
+    for run in runs:
+        if run["name"] in exclude:
+            continue
+        if run.get("size_bytes") is None and run.get("status") != "running":
+            if os.path.isdir(run["path"]):
+                run["size_bytes"] = _dir_size(run["path"])
+            elif os.path.isfile(run["path"]):
+                run["size_bytes"] = os.path.getsize(run["path"])
+            else:
+                continue
+            index.upsert_run(run["name"], size_bytes=run["size_bytes"])
+
+    counts = {"archive": 0, "bundle": 0, "delete": 0}
+    for action, run in plan_retention(runs, policy, exclude=exclude):
+        try:
+            if action == "archive":
+                archive_run(index, run)
+            elif action == "bundle":
+                bundle_run(index, run)
+            else:
+                delete_run(index, run)
+            counts[action] += 1
+        except Exception as e:
+            logging.warning(f"Retention {action} failed for {run['name']}: {e}")
+
+    # Artifacts are hard links into the blob store; drop unreferenced blobs
+    counts["blobs"], freed = BlobStore().gc()
+    if counts["blobs"]:
+        logging.info(f"🧹 Removed {counts['blobs']} unused blobs ({freed} bytes)")
+    return counts
+
+
+def clear_logs_dir(logs_dir: str = None, index=None) -> None:
+    """Delete every run under logs/ (the open index is emptied, not removed)."""
+    logs_dir = logs_dir or logs_root()
+    index = index or get_run_index()
+    index.clear()
+    if not os.path.isdir(logs_dir):
+        return
+    for name in os.listdir(logs_dir):
+        if name.startswith(INDEX_FILENAME) or name == LOCK_FILENAME:
+            continue
+        path = os.path.join(logs_dir, name)
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+        except Exception:
+            pass
+
+
+def read_run_file(path: str, filename: str):
+    """Read one file of a run stored as a directory, bundle or archive."""
+    try:
+        if path.endswith(BUNDLE_SUFFIX) and os.path.isfile(path):
+            with RunBundle(path) as bundle:
+                return bundle.read(filename)
+        if path.endswith(ARCHIVE_SUFFIX) and os.path.isfile(path):
+            with zipfile.ZipFile(path) as zf:
+                return zf.read(filename)
+        full = os.path.join(path, filename)
+        if os.path.isfile(full):
+            with open(full, "rb") as f:
+                return f.read()
+    except KeyError:
+        pass
+    return None
+
+
+def read_run_text(path: str, filename: str):
+    """Read a text file of a run whatever its storage format."""
+    data = read_run_file(path, filename)
+    return data.decode("utf-8", "replace") if data is not None else None
+
+
+class RetentionWorker(threading.Thread):
+    """Serialises retention and log clearing jobs off the caller's thread."""
+
+    def __init__(self):
+        super().__init__(daemon=True, name="retention")
+        self.jobs = queue.Queue()
+
+    def request(self) -> None:
+        """Enforce the retention policy soon (requests coalesce)."""
+        if self.jobs.empty():
+            self.jobs.put(enforce_retention)
+
+    def request_clear(self) -> None:
+        self.jobs.put(clear_logs_dir)
+
+    def run(self) -> None:
+        while True:
+            job = self.jobs.get()
+            try:
+                job()
+            except Exception as e:
+                logging.warning(f"Retention job failed: {e}")
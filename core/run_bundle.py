@@ -0,0 +1,138 @@
+"""Single-file run bundles: every file of a run appended into logs/<run>.bundle.
+
+Layout: an 8-byte magic, the member files back to back, a JSON index mapping
+each member name to [offset, size], and a fixed-size trailer holding the
+index offset, the index length and the magic again. Readers mmap the bundle,
+parse the trailer and index, and slice single members out by offset, so
+viewing one artifact never extracts or reads the rest of the run.
+
+    python -m core.run_bundle pack <run_dir>...      # directories -> bundles
+    python -m core.run_bundle unpack <bundle>...     # bundles -> directories
+"""
+
+import os
+import json
+import mmap
+import shutil
+import struct
+
+BUNDLE_SUFFIX = ".bundle"
+BUNDLE_MAGIC = b"GRBUNDL1"
+_TRAILER = struct.Struct("<QQ8s")
+
+
+class RunBundle:
+    """Read-only, memory-mapped view of a .bundle file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(self._map) < len(BUNDLE_MAGIC) + _TRAILER.size:
+                raise ValueError(f"Not a run bundle: {path}")
+            index_offset, index_length, magic = _TRAILER.unpack_from(
+                self._map, len(self._map) - _TRAILER.size
+            )
+            if magic != BUNDLE_MAGIC or self._map[:8] != BUNDLE_MAGIC:
+                raise ValueError(f"Not a run bundle: {path}")
+            raw = self._map[index_offset : index_offset + index_length]
+            self.index = json.loads(raw.decode("utf-8"))
+        except Exception:
+            self.close()
+            raise
+
+    def names(self) -> list:
+        return list(self.index)
+
+    def size(self, name: str) -> int:
+        return self.index[name][1]
+
+    def read(self, name: str) -> bytes:
+        offset, size = self.index[name]
+        return self._map[offset : offset + size]
+
+    def close(self) -> None:
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def pack_run_dir(run_dir: str, bundle_path: str = None, remove: bool = False) -> str:
+    """Append every file of run_dir into one bundle; optionally drop the dir."""
+    run_dir = os.path.normpath(run_dir)
+    bundle_path = bundle_path or run_dir + BUNDLE_SUFFIX
+    tmp_path = bundle_path + ".tmp"
+    index = {}
+    with open(tmp_path, "wb") as out:
+        out.write(BUNDLE_MAGIC)
+        for name in sorted(os.listdir(run_dir)):
+            full = os.path.join(run_dir, name)
+            if not os.path.isfile(full):
+                continue
+            offset = out.tell()
+            with open(full, "rb") as f:
+                shutil.copyfileobj(f, out)
+            index[name] = [offset, out.tell() - offset]
+        raw = json.dumps(index, ensure_ascii=False).encode("utf-8")
+        index_offset = out.tell()
+        out.write(raw)
+        out.write(_TRAILER.pack(index_offset, len(raw), BUNDLE_MAGIC))
+    os.replace(tmp_path, bundle_path)
+    if remove:
+        shutil.rmtree(run_dir, ignore_errors=True)
+    return bundle_path
+
+
+def unpack_bundle(bundle_path: str, dest_dir: str = None, remove: bool = False) -> str:
+    """Write the members of a bundle back out as a run directory."""
+    dest_dir = dest_dir or bundle_path[: -len(BUNDLE_SUFFIX)]
+    os.makedirs(dest_dir, exist_ok=True)
+    with RunBundle(bundle_path) as bundle:
+        for name in bundle.names():
+            with open(os.path.join(dest_dir, name), "wb") as f:
+                f.write(bundle.read(name))
+    if remove:
+        os.remove(bundle_path)
+    return dest_dir
+
+
+def main():
+    """CLI: python -m core.run_bundle pack <run_dir>... | unpack <bundle>..."""
+    import sys
+    from core.retention import retention_lock
+    from core.run_index import get_run_index
+
+    if len(sys.argv) < 3 or sys.argv[1] not in {"pack", "unpack"}:
+        print(
+            "Usage: python -m core.run_bundle pack <run_dir>... | unpack <bundle>..."
+        )
+        sys.exit(1)
+    index = get_run_index()
+    # Retention may be archiving or bundling the same runs in another process
+    with retention_lock(os.path.dirname(index.path)) as locked:
+        if not locked:
+            print("Log retention is running; try again when it has finished")
+            sys.exit(1)
+        for path in sys.argv[2:]:
+            try:
+                if sys.argv[1] == "pack":
+                    result = pack_run_dir(path, remove=True)
+                    index.index_bundle(result)
+                else:
+                    result = unpack_bundle(path, remove=True)
+                    index.index_run_dir(result)
+                print(f"{path} -> {result}")
+            except Exception as e:
+                print(f"{path}: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,788 @@
+"""SQLite index of test runs stored under logs/.
+
+The engine and the GUI update the index as they write run files, so History
+and Results can answer their queries without walking or parsing logs/.
+"""
+
+import os
+import json
+import sqlite3
+import zipfile
+import threading
+from datetime import datetime
+
+from core.run_bundle import BUNDLE_SUFFIX, RunBundle
+
+INDEX_FILENAME = "index.db"
+
+# Older runs are compressed by the retention engine into logs/<run>.zip
+ARCHIVE_SUFFIX = ".zip"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    name TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    project TEXT,
+    mode TEXT,
+    status TEXT,
+    error TEXT,
+    started_at TEXT,
+    duration_sec REAL,
+    total_steps INTEGER DEFAULT 0,
+    passed_steps INTEGER DEFAULT 0,
+    failed_steps INTEGER DEFAULT 0,
+    log_lines INTEGER DEFAULT 0,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS runs_started ON runs(started_at DESC, name DESC);
+CREATE INDEX IF NOT EXISTS runs_project_started ON runs(project, started_at DESC);
+CREATE INDEX IF NOT EXISTS runs_status_started ON runs(status, started_at DESC);
+CREATE INDEX IF NOT EXISTS runs_updated ON runs(updated_at);
+
+CREATE TABLE IF NOT EXISTS steps (
+    run_name TEXT NOT NULL REFERENCES runs(name) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    name TEXT,
+    action TEXT,
+    start REAL,
+    end REAL,
+    status TEXT,
+    error TEXT,
+    PRIMARY KEY (run_name, idx)
+);
+
+-- Numeric per-step measurements (web vitals, Chrome metrics, traffic totals)
+CREATE TABLE IF NOT EXISTS step_metrics (
+    run_name TEXT NOT NULL REFERENCES runs(name) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (run_name, idx, metric)
+);
+CREATE INDEX IF NOT EXISTS step_metrics_metric ON step_metrics(metric, run_name);
+
+CREATE TABLE IF NOT EXISTS artifacts (
+    run_name TEXT NOT NULL REFERENCES runs(name) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    size INTEGER,
+    PRIMARY KEY (run_name, name)
+);
+
+-- Documents of the full-text index; the FTS5 table shares their ids
+CREATE TABLE IF NOT EXISTS search_docs (
+    id INTEGER PRIMARY KEY,
+    run_name TEXT NOT NULL,
+    step_idx INTEGER,
+    kind TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS search_docs_run ON search_docs(run_name, kind);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Columns added after the first release of the index (migrated in place)
+_ADDED_RUN_COLUMNS = {
+    "archived": "INTEGER DEFAULT 0",
+    "size_bytes": "INTEGER",
+    "profile": "TEXT",
+}
+
+_FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(content)"
+
+# Files under a run directory that are fed into the full-text index
+SEARCH_FILES = {"error_details": "error_details.txt", "log": "test_log.txt"}
+
+# Columns callers may set through upsert_run()
+_RUN_COLUMNS = (
+    "path",
+    "project",
+    "mode",
+    "status",
+    "error",
+    "started_at",
+    "duration_sec",
+    "total_steps",
+    "passed_steps",
+    "failed_steps",
+    "log_lines",
+    "archived",
+    "size_bytes",
+    "profile",
+)
+
+ARTIFACT_EXTENSIONS = (
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".webp",
+    ".mjpeg",
+    ".gz",
+    ".html",
+    ".json",
+    ".log",
+    ".txt",
+)
+
+# Sort keys accepted by query_runs() mapped to SQL expressions
+SORT_COLUMNS = {
+    "date": "started_at",
+    "duration": "COALESCE(duration_sec, 0)",
+    "status": "COALESCE(status, '')",
+    "project": "COALESCE(project, '')",
+}
+
+
+def logs_root() -> str:
+    """Return the logs directory shared by the runner and the GUI."""
+    return os.path.join(os.getcwd(), "logs")
+
+
+def started_at_from_name(run_name: str):
+    """Parse 'YYYYmmdd-HHMMSS-<type>' run names into 'YYYY-mm-dd HH:MM:SS'."""
+    try:
+        dt = datetime.strptime(run_name[:15], "%Y%m%d-%H%M%S")
+        return dt.strftime("%Y-%m-%d %H:%M:%S")
+    except Exception:
+        return None
+
+
+def steps_duration(steps) -> float:
+    """Duration from the first step start to the last step end (0 if unknown)."""
+    try:
+        starts = [s.get("start") for s in steps or [] if s.get("start")]
+        ends = [s.get("end") for s in steps or [] if s.get("end")]
+        if starts and ends:
+            return max(0.0, float(max(ends)) - float(min(starts)))
+    except Exception:
+        pass
+    return 0.0
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query: every word must match (as a prefix)."""
+    terms = [t.replace('"', '""') for t in (text or "").split()]
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+def _where_clause(filters: dict = None, fts: bool = True):
+    """Build a WHERE clause for query_runs() filters.
+
+    Supported keys: name, project, statuses (list of raw status values),
+    profile (throttling profile, "none" for unthrottled runs),
+    date_from / date_to ('YYYY-mm-dd', inclusive), error (substring) and
+    text (full-text match over errors, step names and logs; falls back to
+    an error substring match when SQLite lacks FTS5).
+    """
+    clauses, params = [], []
+    filters = filters or {}
+    if filters.get("name"):
+        clauses.append("name = ?")
+        params.append(filters["name"])
+    if filters.get("project"):
+        clauses.append("project = ?")
+        params.append(filters["project"])
+    if filters.get("profile"):
+        clauses.append("COALESCE(profile, 'none') = ?")
+        params.append(filters["profile"])
+    if filters.get("statuses"):
+        statuses = list(filters["statuses"])
+        clauses.append(f"status IN ({', '.join(['?'] * len(statuses))})")
+        params.extend(statuses)
+    if filters.get("date_from"):
+        clauses.append("started_at >= ?")
+        params.append(filters["date_from"])
+    if filters.get("date_to"):
+        clauses.append("started_at <= ?")
+        params.append(f"{filters['date_to']} 23:59:59")
+    if filters.get("text") and fts:
+        clauses.append(
+            "name IN (SELECT d.run_name FROM search "
+            "JOIN search_docs d ON d.id = search.rowid WHERE search MATCH ?)"
+        )
+        params.append(fts_query(filters["text"]))
+    error = filters.get("error") or (None if fts else filters.get("text"))
+    if error:
+        text = (
+            error
+            .replace("\\", "\\\\")
+            .replace("%", "\\%")
+            .replace("_", "\\_")
+        )
+        clauses.append("error LIKE ? ESCAPE '\\'")
+        params.append(f"%{text}%")
+    if not clauses:
+        return "", params
+    return " WHERE " + " AND ".join(clauses), params
+
+
+def _step_text(step: dict) -> str:
+    return "\n".join(str(step.get(k)) for k in ("name", "error") if step.get(k))
+
+
+def _step_metrics(step: dict) -> dict:
+    """Numeric step fields kept in step_metrics: "perf" as is, "traffic" as
+    net_*, "memory" as mem_*, "main_thread" as main_*."""
+    metrics = {}
+    for key, prefix in (
+        ("perf", ""),
+        ("traffic", "net_"),
+        ("memory", "mem_"),
+        ("main_thread", "main_"),
+    ):
+        values = step.get(key)
+        if not isinstance(values, dict):
+            continue
+        for name, value in values.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                metrics[prefix + name] = float(value)
+    return metrics
+
+
+class RunIndex:
+    """Thin wrapper over a WAL-mode SQLite database of runs, steps and artifacts."""
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(logs_root(), INDEX_FILENAME)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        with self._lock, self.conn:
+            self.conn.executescript(_SCHEMA)
+            existing = {r[1] for r in self.conn.execute("PRAGMA table_info(runs)")}
+            for column, decl in _ADDED_RUN_COLUMNS.items():
+                if column not in existing:
+                    self.conn.execute(f"ALTER TABLE runs ADD COLUMN {column} {decl}")
+        try:
+            with self._lock, self.conn:
+                self.conn.execute(_FTS_SCHEMA)
+            self.fts_enabled = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: search falls back to LIKE on errors
+            self.fts_enabled = False
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+    # ---- writes -------------------------------------------------------
+
+    def upsert_run(self, name: str, **fields) -> None:
+        """Insert a run or update only the given columns of an existing one."""
+        with self._lock, self.conn:
+            self._upsert_run(name, fields)
+
+    def _upsert_run(self, name: str, fields: dict) -> None:
+        fields = {k: v for k, v in fields.items() if k in _RUN_COLUMNS}
+        # The default path only applies to new runs; updates keep the stored one
+        keep = set() if "path" in fields else {"path"}
+        fields.setdefault("path", os.path.join(logs_root(), name))
+        if not fields.get("started_at") and started_at_from_name(name):
+            fields["started_at"] = started_at_from_name(name)
+        fields["updated_at"] = datetime.now().timestamp()
+        cols = ", ".join(["name"] + list(fields))
+        marks = ", ".join(["?"] * (len(fields) + 1))
+        updates = ", ".join(f"{k}=excluded.{k}" for k in fields if k not in keep)
+        self.conn.execute(
+            f"INSERT INTO runs ({cols}) VALUES ({marks}) "
+            f"ON CONFLICT(name) DO UPDATE SET {updates}",
+            [name] + list(fields.values()),
+        )
+
+    def add_step(self, run_name: str, idx: int, step: dict) -> None:
+        """Record (or replace) a single executed step of a run."""
+        with self._lock, self.conn:
+            self._add_step(run_name, idx, step)
+            self._index_text(run_name, "step", _step_text(step), idx)
+            self.conn.execute(
+                "UPDATE runs SET total_steps=(SELECT COUNT(*) FROM steps WHERE run_name=?), "
+                "updated_at=? WHERE name=?",
+                (run_name, datetime.now().timestamp(), run_name),
+            )
+
+    def _add_step(self, run_name: str, idx: int, step: dict) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO steps (run_name, idx, name, action, start, end, status, error) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                run_name,
+                idx,
+                step.get("name"),
+                step.get("action"),
+                step.get("start"),
+                step.get("end"),
+                step.get("status"),
+                step.get("error"),
+            ),
+        )
+        metrics = _step_metrics(step)
+        if metrics:
+            self.conn.execute(
+                "DELETE FROM step_metrics WHERE run_name=? AND idx=?", (run_name, idx)
+            )
+            self.conn.executemany(
+                "INSERT INTO step_metrics (run_name, idx, metric, value) "
+                "VALUES (?, ?, ?, ?)",
+                [(run_name, idx, k, v) for k, v in metrics.items()],
+            )
+
+    def _index_text(self, run_name: str, kind: str, text: str, step_idx=None) -> None:
+        """Replace the searchable text of one (run, kind, step) document."""
+        if not self.fts_enabled:
+            return
+        ids = [
+            r[0]
+            for r in self.conn.execute(
+                "SELECT id FROM search_docs WHERE run_name=? AND kind=? AND step_idx IS ?",
+                (run_name, kind, step_idx),
+            )
+        ]
+        self._delete_docs(ids)
+        if text and text.strip():
+            doc_id = self.conn.execute(
+                "INSERT INTO search_docs (run_name, step_idx, kind) VALUES (?, ?, ?)",
+                (run_name, step_idx, kind),
+            ).lastrowid
+            self.conn.execute(
+                "INSERT INTO search (rowid, content) VALUES (?, ?)", (doc_id, text)
+            )
+
+    def _delete_docs(self, ids) -> None:
+        for doc_id in ids:
+            self.conn.execute("DELETE FROM search WHERE rowid=?", (doc_id,))
+            self.conn.execute("DELETE FROM search_docs WHERE id=?", (doc_id,))
+
+    def index_file(self, run_name: str, kind: str, path: str) -> None:
+        """Feed a run text file (see SEARCH_FILES) into the full-text index."""
+        if not self.fts_enabled or not os.path.isfile(path):
+            return
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+        with self._lock, self.conn:
+            self._index_text(run_name, kind, text)
+
+    def add_artifacts(self, run_name: str, files) -> None:
+        """Record artifact files (paths inside the run directory) in one transaction."""
+        rows = []
+        for path in files:
+            try:
+                rows.append((run_name, os.path.basename(path), os.path.getsize(path)))
+            except OSError:
+                continue
+        if not rows:
+            return
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO artifacts (run_name, name, size) VALUES (?, ?, ?)",
+                rows,
+            )
+
+    def record_summary(self, run_name: str, summary: dict, run_dir: str = None) -> None:
+        """Store a summary.json payload; steps are replaced only if it carries them."""
+        steps = summary.get("steps")
+        fields = {
+            "project": summary.get("project"),
+            "mode": summary.get("mode"),
+            "status": summary.get("status"),
+            "error": summary.get("error"),
+            "profile": (summary.get("throttling") or {}).get("name"),
+        }
+        if run_dir:
+            fields["path"] = os.path.abspath(run_dir)
+        if summary.get("durationSec"):
+            fields["duration_sec"] = float(summary["durationSec"])
+        elif steps:
+            fields["duration_sec"] = steps_duration(steps)
+        if "logLines" in summary:
+            fields["log_lines"] = summary.get("logLines") or 0
+        if steps is not None:
+            fields["total_steps"] = len(steps)
+            fields["passed_steps"] = len([s for s in steps if s.get("status") == "pass"])
+            fields["failed_steps"] = len([s for s in steps if s.get("status") == "fail"])
+        fields = {k: v for k, v in fields.items() if v is not None or k == "error"}
+        with self._lock, self.conn:
+            self._upsert_run(run_name, fields)
+            if "error" in fields:
+                self._index_text(run_name, "error", fields["error"])
+            if steps is not None:
+                self.conn.execute("DELETE FROM steps WHERE run_name=?", (run_name,))
+                self.conn.execute(
+                    "DELETE FROM step_metrics WHERE run_name=?", (run_name,)
+                )
+                for idx, step in enumerate(steps, 1):
+                    self._add_step(run_name, idx, step)
+                    self._index_text(run_name, "step", _step_text(step), idx)
+
+    def delete_run(self, run_name: str) -> None:
+        with self._lock, self.conn:
+            if self.fts_enabled:
+                ids = self.conn.execute(
+                    "SELECT id FROM search_docs WHERE run_name=?", (run_name,)
+                ).fetchall()
+                self._delete_docs([r[0] for r in ids])
+            self.conn.execute("DELETE FROM runs WHERE name=?", (run_name,))
+
+    def clear(self) -> None:
+        """Forget every run (used when logs/ is wiped)."""
+        with self._lock, self.conn:
+            if self.fts_enabled:
+                self.conn.execute("DELETE FROM search")
+                self.conn.execute("DELETE FROM search_docs")
+            self.conn.execute("DELETE FROM runs")
+
+    # ---- reads --------------------------------------------------------
+
+    def count_runs(self, filters: dict = None) -> int:
+        where, params = _where_clause(filters, self.fts_enabled)
+        with self._lock:
+            return self.conn.execute(
+                f"SELECT COUNT(*) FROM runs{where}", params
+            ).fetchone()[0]
+
+    def query_runs(
+        self,
+        filters: dict = None,
+        sort: str = "date",
+        descending: bool = True,
+        limit: int = -1,
+        offset: int = 0,
+    ) -> list:
+        """One page of runs matching filters, ordered by a SORT_COLUMNS key."""
+        where, params = _where_clause(filters, self.fts_enabled)
+        expr = SORT_COLUMNS.get(sort, SORT_COLUMNS["date"])
+        direction = "DESC" if descending else "ASC"
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT * FROM runs{where} ORDER BY {expr} {direction}, "
+                f"name {direction} LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def list_runs(self, limit: int = -1, offset: int = 0) -> list:
+        """Runs newest first."""
+        return self.query_runs(limit=limit, offset=offset)
+
+    def list_projects(self) -> list:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT project FROM runs WHERE project IS NOT NULL "
+                "ORDER BY project"
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def get_run(self, run_name: str):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT * FROM runs WHERE name=?", (run_name,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def previous_run(self, run_name: str):
+        """The same project's run started just before this one (None if first)."""
+        run = self.get_run(run_name)
+        if run is None:
+            return None
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT * FROM runs WHERE project IS ? AND (started_at, name) < (?, ?) "
+                "ORDER BY started_at DESC, name DESC LIMIT 1",
+                (run["project"], run["started_at"] or "", run_name),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def runs_updated_since(self, timestamp: float) -> list:
+        """Names of runs written at or after the given epoch timestamp."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT name FROM runs WHERE updated_at >= ?", (timestamp,)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def position_of(
+        self,
+        run_name: str,
+        filters: dict = None,
+        sort: str = "date",
+        descending: bool = True,
+    ) -> int:
+        """Zero-based position of a run in the matching query_runs() order."""
+        run = self.get_run(run_name)
+        if run is None:
+            return -1
+        expr = SORT_COLUMNS.get(sort, SORT_COLUMNS["date"])
+        key = f"COALESCE({expr}, '')" if sort == "date" else expr
+        op = ">" if descending else "<"
+        where, params = _where_clause(filters, self.fts_enabled)
+        where = (where + " AND" if where else " WHERE") + (
+            f" ({key} {op} (SELECT {key} FROM runs WHERE name=?)"
+            f" OR ({key} = (SELECT {key} FROM runs WHERE name=?) AND name {op} ?))"
+        )
+        with self._lock:
+            return self.conn.execute(
+                f"SELECT COUNT(*) FROM runs{where}",
+                params + [run_name, run_name, run_name],
+            ).fetchone()[0]
+
+    def search(self, text: str, limit: int = 50) -> list:
+        """Ranked full-text hits (best first) with run and step context."""
+        if not self.fts_enabled or not fts_query(text):
+            return []
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT d.run_name, d.step_idx, d.kind, s.name AS step_name, "
+                "r.project, r.status, r.started_at, r.path, "
+                "snippet(search, 0, '[', ']', '…', 12) AS snippet, "
+                "bm25(search) AS score "
+                "FROM search JOIN search_docs d ON d.id = search.rowid "
+                "JOIN runs r ON r.name = d.run_name "
+                "LEFT JOIN steps s ON s.run_name = d.run_name AND s.idx = d.step_idx "
+                "WHERE search MATCH ? ORDER BY score LIMIT ?",
+                (fts_query(text), limit),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def latest_run(self):
+        runs = self.list_runs(limit=1)
+        return runs[0] if runs else None
+
+    def list_steps(self, run_name: str) -> list:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM steps WHERE run_name=? ORDER BY idx", (run_name,)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def list_artifacts(self, run_name: str) -> list:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT name, size FROM artifacts WHERE run_name=? ORDER BY name",
+                (run_name,),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def step_metrics(self, run_name: str) -> dict:
+        """{step idx: {metric: value}} for one run."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT idx, metric, value FROM step_metrics WHERE run_name=? "
+                "ORDER BY idx",
+                (run_name,),
+            ).fetchall()
+        result = {}
+        for row in rows:
+            result.setdefault(row["idx"], {})[row["metric"]] = row["value"]
+        return result
+
+    def metric_history(
+        self,
+        project: str,
+        metric: str,
+        step_name: str = None,
+        limit: int = 50,
+        profile: str = None,
+    ) -> list:
+        """Latest values of one step metric across a project's runs, newest first.
+
+        profile restricts the runs to one throttling profile ("none" for
+        unthrottled runs).
+        """
+        sql = (
+            "SELECT r.name AS run_name, r.started_at, r.profile, s.idx, "
+            "s.name AS step, m.value "
+            "FROM step_metrics m JOIN runs r ON r.name = m.run_name "
+            "JOIN steps s ON s.run_name = m.run_name AND s.idx = m.idx "
+            "WHERE r.project=? AND m.metric=?"
+        )
+        params = [project, metric]
+        if step_name:
+            sql += " AND s.name=?"
+            params.append(step_name)
+        if profile:
+            sql += " AND COALESCE(r.profile, 'none')=?"
+            params.append(profile)
+        sql += " ORDER BY r.started_at DESC, s.idx LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [dict(r) for r in rows]
+
+    # ---- filesystem sync ----------------------------------------------
+
+    def index_run_dir(self, run_dir: str) -> bool:
+        """(Re)index one run directory from its files. Returns False if not a run."""
+        summary_path = os.path.join(run_dir, "summary.json")
+        if not os.path.isfile(summary_path):
+            return False
+        run_name = os.path.basename(os.path.normpath(run_dir))
+        try:
+            with open(summary_path, "r", encoding="utf-8") as f:
+                summary = json.load(f)
+        except Exception as e:
+            summary = {"status": "error", "error": f"Failed to load summary: {str(e)[:50]}"}
+        self.record_summary(run_name, summary, run_dir)
+        # A directory is never archived; its size is measured again by retention
+        self.upsert_run(run_name, archived=0, size_bytes=None)
+        files = [
+            os.path.join(run_dir, n)
+            for n in os.listdir(run_dir)
+            if n.endswith(ARTIFACT_EXTENSIONS)
+        ]
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM artifacts WHERE run_name=?", (run_name,))
+        self.add_artifacts(run_name, files)
+        for kind, filename in SEARCH_FILES.items():
+            self.index_file(run_name, kind, os.path.join(run_dir, filename))
+        return True
+
+    def index_archive(self, archive_path: str) -> bool:
+        """(Re)index one archived run (logs/<run>.zip) without extracting it."""
+        try:
+            with zipfile.ZipFile(archive_path) as zf:
+                members = {i.filename: i.file_size for i in zf.infolist()}
+                files = {
+                    name: zf.read(name)
+                    for name in ["summary.json", *SEARCH_FILES.values()]
+                    if name in members
+                }
+        except Exception:
+            return False
+        return self._index_packed(archive_path, ARCHIVE_SUFFIX, members, files, 1)
+
+    def index_bundle(self, bundle_path: str) -> bool:
+        """(Re)index one bundled run (logs/<run>.bundle) without extracting it."""
+        try:
+            with RunBundle(bundle_path) as bundle:
+                members = {name: bundle.size(name) for name in bundle.names()}
+                files = {
+                    name: bundle.read(name)
+                    for name in ["summary.json", *SEARCH_FILES.values()]
+                    if name in members
+                }
+        except Exception:
+            return False
+        return self._index_packed(bundle_path, BUNDLE_SUFFIX, members, files, 0)
+
+    def _index_packed(self, path, suffix, members, files, archived) -> bool:
+        if "summary.json" not in files:
+            return False
+        run_name = os.path.basename(path)[: -len(suffix)]
+        try:
+            summary = json.loads(files["summary.json"].decode("utf-8"))
+        except Exception as e:
+            summary = {"status": "error", "error": f"Failed to load summary: {str(e)[:50]}"}
+        self.record_summary(run_name, summary)
+        with self._lock, self.conn:
+            self._upsert_run(
+                run_name,
+                {
+                    "path": os.path.abspath(path),
+                    "archived": archived,
+                    "size_bytes": os.path.getsize(path),
+                },
+            )
+            self.conn.execute("DELETE FROM artifacts WHERE run_name=?", (run_name,))
+            self.conn.executemany(
+                "INSERT INTO artifacts (run_name, name, size) VALUES (?, ?, ?)",
+                [(run_name, n, size) for n, size in members.items()],
+            )
+            for kind, filename in SEARCH_FILES.items():
+                if filename in files:
+                    text = files[filename].decode("utf-8", "replace")
+                    self._index_text(run_name, kind, text)
+        return True
+
+    def rebuild_from_logs(self, logs_dir: str = None) -> int:
+        """Drop the index and re-create it from every run under logs/."""
+        logs_dir = logs_dir or os.path.dirname(self.path)
+        self.clear()
+        count = 0
+        if os.path.isdir(logs_dir):
+            for name in sorted(os.listdir(logs_dir)):
+                full = os.path.join(logs_dir, name)
+                if os.path.isdir(full) and self.index_run_dir(full):
+                    count += 1
+                elif name.endswith(ARCHIVE_SUFFIX) and self.index_archive(full):
+                    count += 1
+                elif name.endswith(BUNDLE_SUFFIX) and self.index_bundle(full):
+                    count += 1
+        self.set_meta("rebuilt_at", datetime.now().isoformat())
+        return count
+
+    def ensure_populated(self) -> None:
+        """Import pre-existing run directories the first time the index is used."""
+        if self.get_meta("rebuilt_at") is None:
+            self.rebuild_from_logs()
+
+    def get_meta(self, key: str):
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_run_index(path: str = None) -> RunIndex:
+    """Return a per-process shared RunIndex for the given (default) path."""
+    key = os.path.abspath(path or os.path.join(logs_root(), INDEX_FILENAME))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = RunIndex(key)
+            _indexes[key] = index
+        return index
+
+
+def main():
+    """CLI: python -m core.run_index search <text> | rebuild | metric ..."""
+    import sys
+
+    if len(sys.argv) < 2 or sys.argv[1] not in {"search", "rebuild", "metric"}:
+        print(
+            "Usage: python -m core.run_index search <text> | rebuild | "
+            "metric <project> <metric> [step name]"
+        )
+        sys.exit(1)
+    index = get_run_index()
+    if sys.argv[1] == "rebuild":
+        count = index.rebuild_from_logs()
+        print(f"Indexed {count} runs from {os.path.dirname(index.path)}")
+        return
+    if sys.argv[1] == "metric":
+        if len(sys.argv) < 4:
+            print("Usage: python -m core.run_index metric <project> <metric> [step]")
+            sys.exit(1)
+        step = " ".join(sys.argv[4:]) or None
+        for row in index.metric_history(sys.argv[2], sys.argv[3], step):
+            where = f"{row['idx']:2d}. {row['step']}"
+            profile = row["profile"] or "none"
+            print(f"{row['run_name']}  {profile:<14} {where}  {row['value']:g}")
+        return
+    if not index.fts_enabled:
+        print("Full-text search needs SQLite with FTS5")
+        sys.exit(2)
+    index.ensure_populated()
+    for hit in index.search(" ".join(sys.argv[2:])):
+        where = hit["kind"]
+        if hit["step_idx"] is not None:
+            where = f"step {hit['step_idx']} ({hit['step_name']})"
+        print(f"{hit['run_name']}  {hit['status']}  {where}")
+        print(f"    {' '.join(hit['snippet'].split())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""Queue of test runs: priorities, a concurrency limit and coalescing.
+
+Any number of project/flow/mode combinations can be queued. Up to
+`concurrency` of them run at once (RUN_CONCURRENCY, default 1), each as its
+own tests/json_runner.py (or Python script) process. A run that frees a slot
+is followed by the queued request with the lowest priority number, then the
+oldest. So a smoke flow queued behind long flows starts as soon as any
+running flow ends; running flows are never killed to make room. Queuing a
+request equal (same project, script and mode) to one still waiting adds
+nothing: the waiting request keeps its place and takes the higher priority
+of the two.
+
+The GUI queues through core/runner.py and lists the queue in the sidebar.
+Without the GUI:
+
+    python -m core.run_queue \\
+        hollister:tests/projects/hollister/HOL_CHECKOUT_LOGIN.json \\
+        google:tests/projects/google/<flow>.json@smoke --concurrency 2
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+
+PRIORITIES = {"smoke": 0, "high": 1, "normal": 5, "low": 9}
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Request states; the last three are final
+STATES = ("queued", "running", "passed", "failed", "stopped")
+
+# summary.json statuses that make a run "failed" even if it exited 0
+_FAILED = {"failed", "error", "aborted"}
+
+
+def parse_priority(value) -> int:
+    """A PRIORITIES name or a number (lower runs first)."""
+    if isinstance(value, str) and value.strip().lower() in PRIORITIES:
+        return PRIORITIES[value.strip().lower()]
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return PRIORITIES["normal"]
+
+
+def default_concurrency() -> int:
+    try:
+        return max(int(os.getenv("RUN_CONCURRENCY", "1")), 1)
+    except ValueError:
+        return 1
+
+
+@dataclass
+class RunRequest:
+    project: str
+    script: str
+    mode: str = "headless"
+    priority: int = PRIORITIES["normal"]
+    env: dict = field(default_factory=dict)
+    id: int = 0
+    state: str = "queued"
+    coalesced: int = 0
+    queued_at: float = field(default_factory=time.time)
+    started_at: float = None
+    finished_at: float = None
+    run_dir: str = None
+    last_line: str = ""
+    error: str = None
+    process: object = field(default=None, repr=False)
+
+    @property
+    def key(self) -> tuple:
+        return (self.project, os.path.abspath(self.script), self.mode)
+
+    @property
+    def label(self) -> str:
+        flow = os.path.splitext(os.path.basename(self.script))[0]
+        return f"{self.project} · {flow} · {self.mode}"
+
+    def command(self) -> list:
+        if self.script.endswith(".json"):
+            return [sys.executable, "tests/json_runner.py", self.script, self.project]
+        return [sys.executable, self.script]
+
+    def environment(self) -> dict:
+        """os.environ plus the project's non-empty env vars and the run mode."""
+        env = os.environ.copy()
+        for key, value in (self.env or {}).items():
+            if value is None or (isinstance(value, str) and not value.strip()):
+                continue
+            env[key] = value
+        env["HEADLESS"] = "1" if self.mode == "headless" else "0"
+        env["PROJECT"] = self.project
+        env.setdefault("CONSOLE_MIN_LEVEL", "WARNING")
+        env["PYTHONPATH"] = os.pathsep.join(
+            p for p in (PROJECT_ROOT, env.get("PYTHONPATH")) if p
+        )
+        return env
+
+    def start_process(self) -> subprocess.Popen:
+        self.process = subprocess.Popen(
+            self.command(),
+            cwd=PROJECT_ROOT,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            env=self.environment(),
+            text=True,
+            bufsize=1,
+        )
+        return self.process
+
+
+class RunQueue:
+    """Dispatches RunRequests to `launch(request) -> state` on worker threads."""
+
+    def __init__(self, launch, concurrency: int = None, on_change=None):
+        self.launch = launch
+        self.concurrency = concurrency or default_concurrency()
+        self.on_change = on_change
+        self._lock = threading.Lock()
+        self._heap = []
+        self._order = itertools.count()
+        self._ids = itertools.count(1)
+        self._requests = {}
+        self._running = 0
+
+    # ---- queueing ------------------------------------------------------
+
+    def enqueue(self, request: RunRequest):
+        """Queue a request; returns (request actually queued, coalesced?)."""
+        with self._lock:
+            for queued in self._requests.values():
+                if queued.state == "queued" and queued.key == request.key:
+                    queued.coalesced += 1
+                    if request.priority < queued.priority:
+                        queued.priority = request.priority
+                        heapq.heappush(
+                            self._heap, (queued.priority, next(self._order), queued)
+                        )
+                    coalesced = queued
+                    break
+            else:
+                coalesced = None
+                request.id = next(self._ids)
+                request.state = "queued"
+                self._requests[request.id] = request
+                heapq.heappush(
+                    self._heap, (request.priority, next(self._order), request)
+                )
+        self._changed(coalesced or request)
+        self._dispatch()
+        return coalesced or request, coalesced is not None
+
+    def cancel(self, request_id: int) -> bool:
+        """Drop a queued request or stop a running one."""
+        with self._lock:
+            request = self._requests.get(request_id)
+            if request is None or request.state not in ("queued", "running"):
+                return False
+            running = request.state == "running"
+            request.state = "stopped"
+            if not running:
+                request.finished_at = time.time()
+        # A running request's worker notices the state once its process ends
+        if running and request.process is not None:
+            try:
+                request.process.terminate()
+            except Exception:
+                pass
+        self._changed(request)
+        return True
+
+    def cancel_all(self) -> None:
+        for request in self.snapshot():
+            if request.state in ("queued", "running"):
+                self.cancel(request.id)
+
+    def set_concurrency(self, concurrency: int) -> None:
+        self.concurrency = max(int(concurrency), 1)
+        self._dispatch()
+
+    def forget_finished(self, keep: int = 50) -> None:
+        """Drop all but the newest `keep` finished requests from the list."""
+        with self._lock:
+            finished = [r for r in self._requests.values() if r.state in STATES[2:]]
+            for request in sorted(finished, key=lambda r: r.id)[:-keep or None]:
+                del self._requests[request.id]
+
+    # ---- state ---------------------------------------------------------
+
+    def snapshot(self) -> list:
+        """Requests in display order: running, then queued by priority, then done."""
+        with self._lock:
+            requests = list(self._requests.values())
+
+        def order(request):
+            if request.state == "running":
+                return (0, 0, request.id)
+            if request.state == "queued":
+                return (1, request.priority, request.id)
+            return (2, 0, -request.id)
+
+        return sorted(requests, key=order)
+
+    def counts(self) -> dict:
+        counts = dict.fromkeys(STATES, 0)
+        with self._lock:
+            for request in self._requests.values():
+                counts[request.state] += 1
+        return counts
+
+    @property
+    def busy(self) -> bool:
+        counts = self.counts()
+        return bool(counts["queued"] or counts["running"])
+
+    def _changed(self, request: RunRequest) -> None:
+        if self.on_change is not None:
+            try:
+                self.on_change(request)
+            except Exception:
+                pass
+
+    # ---- dispatch ------------------------------------------------------
+
+    def _next(self):
+        while self._heap:
+            priority, _, request = heapq.heappop(self._heap)
+            # Stale entries: cancelled, or re-pushed with a higher priority
+            if request.state == "queued" and priority == request.priority:
+                return request
+        return None
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._lock:
+                if self._running >= self.concurrency:
+                    return
+                request = self._next()
+                if request is None:
+                    return
+                self._running += 1
+                request.state = "running"
+                request.started_at = time.time()
+            self._changed(request)
+            threading.Thread(
+                target=self._work,
+                args=(request,),
+                name=f"run-{request.id}",
+                daemon=True,
+            ).start()
+
+    def _work(self, request: RunRequest) -> None:
+        try:
+            state = self.launch(request)
+        except Exception as e:
+            request.error = str(e)
+            state = "failed"
+        with self._lock:
+            self._running -= 1
+            if request.state != "stopped":
+                request.state = state if state in STATES[2:] else "failed"
+            request.finished_at = time.time()
+        self._changed(request)
+        self._dispatch()
+
+    def wait(self, poll: float = 0.5) -> None:
+        while self.busy:
+            time.sleep(poll)
+
+
+def stream_run(request: RunRequest, on_line=None) -> str:
+    """Run one request to completion; final state passed/failed/stopped."""
+    if request.state == "stopped":
+        return "stopped"
+    process = request.start_process()
+    for line in iter(process.stdout.readline, ""):
+        line = line.rstrip("\n")
+        if "RUN_DIR:" in line:
+            request.run_dir = line.split("RUN_DIR:")[1].strip()
+        if line.strip():
+            request.last_line = line.strip()[:200]
+        if on_line is not None:
+            on_line(request, line)
+    process.wait()
+    if request.state == "stopped":
+        return "stopped"
+    if process.returncode != 0:
+        return "failed"
+    # Python flow scripts may exit 0 whatever happened; trust the run's summary
+    return "failed" if _summary_status(request.run_dir) in _FAILED else "passed"
+
+
+def _summary_status(run_dir: str):
+    if not run_dir:
+        return None
+    try:
+        with open(
+            os.path.join(PROJECT_ROOT, run_dir, "summary.json"), "r", encoding="utf-8"
+        ) as f:
+            return str(json.load(f).get("status") or "").lower()
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def main():
+    from core.utils import discover_projects
+
+    parser = argparse.ArgumentParser(description="Run queued flows with a limit")
+    parser.add_argument(
+        "runs", nargs="+", help="PROJECT:path/to/flow.json[@priority] (smoke/high/...)"
+    )
+    parser.add_argument("--concurrency", type=int, default=default_concurrency())
+    parser.add_argument("--mode", default="headless", choices=["headless", "normal"])
+    args = parser.parse_args()
+
+    projects = discover_projects()
+    print_lock = threading.Lock()
+
+    def on_line(request, line):
+        with print_lock:
+            print(f"[{request.id}:{request.project}] {line}", flush=True)
+
+    def on_change(request):
+        with print_lock:
+            print(f"== #{request.id} {request.label}: {request.state}", flush=True)
+
+    run_queue = RunQueue(
+        lambda request: stream_run(request, on_line), args.concurrency, on_change
+    )
+    for spec in args.runs:
+        spec, _, priority = spec.partition("@")
+        project, _, script = spec.partition(":")
+        env = (projects.get(project) or {}).get("env_vars") or {}
+        run_queue.enqueue(
+            RunRequest(project, script, args.mode, parse_priority(priority), env)
+        )
+    try:
+        run_queue.wait()
+    except KeyboardInterrupt:
+        run_queue.cancel_all()
+        run_queue.wait()
+    results = run_queue.snapshot()
+    for request in results:
+        started = request.started_at or request.finished_at or 0
+        took = (request.finished_at or 0) - started
+        print(f"#{request.id} {request.state:<8} {took:6.0f}s  {request.label}")
+    sys.exit(0 if all(r.state == "passed" for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
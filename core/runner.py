@@ -1,28 +1,74 @@
 import os
-import threading
-import subprocess
 import json
 import time
 from datetime import datetime
 import tkinter as tk
+from core.run_index import get_run_index
+from core.run_queue import RunQueue, RunRequest, parse_priority, stream_run
+from core.step_records import STEPS_FILENAME, read_records
+
+
+def _queue(app) -> RunQueue:
+    """The app's run queue, created on first use."""
+    if getattr(app, "run_queue", None) is None:
+        concurrency_var = getattr(app, "concurrency_var", None)
+        app.run_queue = RunQueue(
+            lambda request: run_test_process(app, request),
+            concurrency_var.get() if concurrency_var is not None else None,
+            on_change=lambda request: app.root.after(0, refresh_queue_view, app),
+        )
+    return app.run_queue
 
 
 def start_test(app) -> None:
-    """Start the test execution"""
-    if app.test_running:
+    """Queue the selected project/flow/mode; it starts when a slot is free"""
+    project_name = app.project_var.get()
+    project_config = app.projects.get(project_name)
+    if not project_config:
+        app.add_log(
+            f"❌ Project '{project_name}' not found in configuration.", "error"
+        )
         return
 
-    app.test_running = True
-
-    # Update button states
-    app.update_button_states()
+    # Determine script: either selected flow file or default script
+    selected_flow = app.flow_var.get() if hasattr(app, "flow_var") else ""
+    script_path = project_config["script"]
+    if selected_flow:
+        # Resolve label to full path via flow_map
+        script_path = app.flow_map.get(project_name, {}).get(
+            selected_flow, project_config["script"]
+        )
 
-    # Clear logs
-    app.logs_text.delete(1.0, tk.END)
+    # Check if script exists
+    if not os.path.exists(script_path):
+        app.add_log(
+            f"❌ Test script '{script_path}' not found for project '{project_name}'.",
+            "error",
+        )
+        return
 
-    # Start test in thread
-    test_thread = threading.Thread(target=run_test_process, args=(app,), daemon=True)
-    test_thread.start()
+    run_queue = _queue(app)
+    if not run_queue.busy:
+        # Clear logs when nothing else is queued or running
+        app.logs_text.delete(1.0, tk.END)
+
+    env = dict(project_config["env_vars"])
+    # Retention runs on the GUI's own worker thread, not in the engine
+    env["GAMMA_RETENTION_EXTERNAL"] = "1"
+    priority_var = getattr(app, "priority_var", None)
+    request, coalesced = run_queue.enqueue(
+        RunRequest(
+            project=project_name,
+            script=script_path,
+            mode=app.mode_var.get(),
+            priority=parse_priority(priority_var.get() if priority_var else "normal"),
+            env=env,
+        )
+    )
+    if coalesced:
+        app.add_log(f"⏳ Already queued as #{request.id}: {request.label}", "info")
+    elif request.state == "queued":
+        app.add_log(f"⏳ Queued #{request.id}: {request.label}", "info")
     # Ensure Logs tab is visible when starting
     try:
         app.notebook.select(0)
@@ -30,155 +76,99 @@ def start_test(app) -> None:
         pass
 
 
-def run_test_process(app) -> None:
-    """Run the actual test process with proper artifact saving"""
-    try:
-        # Set environment variables
-        env = os.environ.copy()
-        env["HEADLESS"] = "1" if app.mode_var.get() == "headless" else "0"
-        env["CONSOLE_MIN_LEVEL"] = "WARNING"
-
-        # Get project and script details
-        project_name = app.project_var.get()
-        project_config = app.projects.get(project_name)
-
-        if not project_config:
-            app.add_log(
-                f"❌ Project '{project_name}' not found in configuration.", "error"
-            )
-            app.test_running = False
-            app.update_button_states()
-            return
+def _post_log(app, message, tag="info") -> None:
+    """Log from a queue worker thread; Tk widgets are only touched on the Tk thread"""
+    app.root.after(0, app.add_log, message, tag)
 
-        # Determine script: either selected flow file or default script
-        selected_flow = app.flow_var.get() if hasattr(app, "flow_var") else ""
-        script_path = project_config["script"]
-        if selected_flow:
-            # Resolve label to full path via flow_map
-            script_path = app.flow_map.get(project_name, {}).get(
-                selected_flow, project_config["script"]
-            )
-
-        # Check if script exists
-        if not os.path.exists(script_path):
-            app.add_log(
-                f"❌ Test script '{script_path}' not found for project '{project_name}'.",
-                "error",
-            )
-            app.test_running = False
-            app.update_button_states()
-            return
 
-        env["PROJECT"] = project_name  # Set the generic project for the test script
-        # Ensure project root is on PYTHONPATH for 'tests' package imports
-        try:
-            project_root = os.path.abspath(os.path.dirname(__file__))
-            existing_pp = env.get("PYTHONPATH", "")
-            sep = ":" if os.name != "nt" else ";"
-            env["PYTHONPATH"] = (
-                project_root if not existing_pp else f"{project_root}{sep}{existing_pp}"
-            )
-        except Exception:
-            pass
-        # Only set non-empty values from project_config to avoid overriding real envs with blanks
-        for key, value in project_config["env_vars"].items():
-            if isinstance(value, str) and value.strip() == "":
-                continue
-            if value is None:
-                continue
-            env[key] = value
-
-        # Log test start
-        app.add_log(
-            f"🚀 Starting {project_name} project test in {app.mode_var.get()} mode...",
-            "info",
-        )
-        app.add_log(f"📅 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", "timestamp")
-        app.add_log("-" * 50, "info")
-
-        # Determine runner: json vs python
-        cmd = ["python3", script_path]
-        if script_path.endswith(".json"):
-            cmd = ["python3", "tests/json_runner.py", script_path, project_name]
-
-        # Run the test
-        app.test_process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            env=env,
-            text=True,
-            bufsize=1,
-            universal_newlines=True,
-        )
+def run_test_process(app, request: RunRequest) -> str:
+    """Run one queued request with proper artifact saving; returns its state"""
+    # Log test start
+    _post_log(
+        app,
+        f"🚀 Starting #{request.id} {request.project} project test "
+        f"in {request.mode} mode...",
+        "info",
+    )
+    _post_log(
+        app, f"📅 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", "timestamp"
+    )
+    _post_log(app, "-" * 50, "info")
+    return consume_test_logs(app, request)
 
-        # Start log consumer thread
-        app.log_thread = threading.Thread(
-            target=consume_test_logs, args=(app,), daemon=True
-        )
-        app.log_thread.start()
 
-    except Exception as e:
-        app.add_log(f"❌ Error: {str(e)}", "error")
-        app.test_running = False
-        app.update_button_states()
+def consume_test_logs(app, request: RunRequest) -> str:
+    """Stream one run's output into the logs; called on the queue's worker thread"""
+    failure = {"message": None}
+    lines = []
 
+    def on_line(request, line):
+        line_text = line.strip()
+        if not line_text:
+            return
+        lines.append(line_text)
+        app.test_process = request.process
+        # Tell concurrent runs apart in the shared log
+        if _queue(app).concurrency > 1:
+            line_text = f"[#{request.id} {request.project}] {line_text}"
+
+        # Detect test failures using stricter rules to avoid false positives like
+        # "Network errors saved" (which is informational).
+        normalized = line.strip()
+        lower = normalized.lower()
+        is_explicit_fail = (
+            normalized.startswith("✗")
+            or normalized.startswith("❌")
+            or "] ERROR" in normalized
+            or normalized.startswith("ERROR")
+            or " critical step failed" in lower
+            or "selector" in lower
+            and "not found" in lower
+            or "timeout" in lower
+            and ("failed" in lower or "selector" in lower)
+        )
+        if is_explicit_fail:
+            failure["message"] = normalized
+            _post_log(app, line_text, "error")
+            # Do NOT kill the subprocess; let the test engine finish and write artifacts
+        elif "warning" in lower:
+            _post_log(app, line_text, "warning")
+        else:
+            _post_log(app, line_text, "info")
 
-def consume_test_logs(app) -> None:
-    """Consume test output in a separate thread"""
     try:
-        test_failed = False
-        error_message = None
-
-        for line in iter(app.test_process.stdout.readline, ""):
-            if line:
-                line_text = line.strip()
-
-                # Detect test failures using stricter rules to avoid false positives like
-                # "Network errors saved" (which is informational).
-                normalized = line_text.strip()
-                lower = normalized.lower()
-                is_explicit_fail = (
-                    normalized.startswith("✗")
-                    or normalized.startswith("❌")
-                    or "] ERROR" in normalized
-                    or normalized.startswith("ERROR")
-                    or " critical step failed" in lower
-                    or "selector" in lower
-                    and "not found" in lower
-                    or "timeout" in lower
-                    and ("failed" in lower or "selector" in lower)
-                )
-                if is_explicit_fail:
-                    test_failed = True
-                    error_message = line_text
-                    app.add_log(line_text, "error")
-                    # Do NOT kill the subprocess; let the test engine finish and write artifacts
-                elif "warning" in line_text.lower():
-                    app.add_log(line_text, "warning")
-                else:
-                    app.add_log(line_text, "info")
-
         # Wait for completion (let the engine write artifacts in finally)
-        app.test_process.wait()
-
-        # Determine final status
-        if test_failed or app.test_process.returncode != 0:
-            app.add_log("❌ Test failed!", "error")
-            app.status_label.config(text="Failed", fg=app.colors["danger"])
-            test_status = "failed"
-        else:
-            app.add_log("✅ Test completed successfully!", "success")
-            app.status_label.config(text="Completed", fg=app.colors["success"])
-            test_status = "ok"
-
-        # Create test summary
-        project_name = app.project_var.get()  # Get project name for summary
-        create_test_summary(app, test_status, error_message, project_name)
-
-        # Update UI
-        app.test_running = False
-        app.update_button_states()
+        state = stream_run(request, on_line)
+    except Exception as e:
+        _post_log(app, f"❌ Error in log consumer: {str(e)}", "error")
+        return "failed"
+    if state == "stopped":
+        _post_log(
+            app, f"🛑 #{request.id} {request.label} stopped by user", "warning"
+        )
+        return state
+
+    # Determine final status
+    if failure["message"] or state == "failed":
+        _post_log(app, f"❌ Test failed! ({request.label})", "error")
+        state, test_status = "failed", "failed"
+    else:
+        _post_log(
+            app, f"✅ Test completed successfully! ({request.label})", "success"
+        )
+        test_status = "ok"
+
+    # Create test summary
+    create_test_summary(
+        app,
+        test_status,
+        failure["message"],
+        request.project,
+        request=request,
+        log_content="\n".join(lines),
+    )
+
+    def _show_results_link():
         app.refresh_results()
         try:
             # Append clickable link to results at the end of logs, then newline
@@ -188,24 +178,86 @@ def consume_test_logs(app) -> None:
         except Exception:
             pass
 
-    except Exception as e:
-        app.add_log(f"❌ Error in log consumer: {str(e)}", "error")
-        app.test_running = False
-        app.update_button_states()
+    app.root.after(0, _show_results_link)
+    return state
+
+
+def refresh_queue_view(app) -> None:
+    """Show queue state in the sidebar; runs on the Tk thread"""
+    run_queue = getattr(app, "run_queue", None)
+    if run_queue is None:
+        return
+    run_queue.forget_finished()
+    requests = run_queue.snapshot()
+    counts = run_queue.counts()
+    app.test_running = bool(counts["running"] or counts["queued"])
+    app.update_button_states()
+
+    if app.test_running:
+        text = f"Running {counts['running']} · Queued {counts['queued']}"
+        color = app.colors["warning"]
+    else:
+        # Idle: report how the most recent run ended
+        last = next((r for r in requests if r.finished_at), None)
+        text, color = {
+            "passed": ("Completed", app.colors["success"]),
+            "failed": ("Failed", app.colors["danger"]),
+            "stopped": ("Stopped", app.colors["warning"]),
+        }.get(last.state if last else None, ("Ready", app.colors["success"]))
+    app.status_label.config(text=text, fg=color)
+
+    tree = getattr(app, "queue_tree", None)
+    if tree is None:
+        return
+    selected = set(tree.selection())
+    tree.delete(*tree.get_children())
+    for request in requests:
+        iid = str(request.id)
+        detail = request.last_line if request.state == "running" else ""
+        tree.insert(
+            "",
+            tk.END,
+            iid=iid,
+            values=(f"#{request.id} {request.state}", request.label, detail),
+            tags=(request.state,),
+        )
+        if iid in selected:
+            tree.selection_add(iid)
+    if app.test_running:
+        # Live status: refresh last lines while anything runs
+        if getattr(app, "_queue_refresh", None) is None:
 
+            def _tick():
+                app._queue_refresh = None
+                refresh_queue_view(app)
 
-def create_test_summary(app, status, error_message=None, project_name=None):
-    """Create a test summary file with proper artifacts"""
+            app._queue_refresh = app.root.after(1000, _tick)
+
+
+def create_test_summary(
+    app, status, error_message=None, project_name=None, request=None, log_content=None
+):
+    """Create a test summary file with proper artifacts
+
+    A queued run passes its request (run dir, mode) and its own log lines, as
+    the log widget may interleave several runs. Called that way it runs on the
+    queue's worker thread and never touches Tk widgets directly.
+    """
     try:
         # Prefer run dir printed by the test (RUN_DIR: ...)
-        logs_text = app.logs_text.get(1.0, tk.END)
         log_dir = None
-        for line in logs_text.split("\n"):
-            if "RUN_DIR:" in line:
-                candidate = line.split("RUN_DIR:")[1].strip()
-                if os.path.isdir(candidate):
-                    log_dir = candidate
-                    break
+        if request is not None:
+            if request.run_dir and os.path.isdir(request.run_dir):
+                log_dir = request.run_dir
+        else:
+            logs_text = app.logs_text.get(1.0, tk.END)
+            for line in logs_text.split("\n"):
+                if "RUN_DIR:" in line:
+                    candidate = line.split("RUN_DIR:")[1].strip()
+                    if os.path.isdir(candidate):
+                        log_dir = candidate
+                        break
+        mode = request.mode if request is not None else app.mode_var.get()
 
         # Fallback to timestamped dir if RUN_DIR not found
         test_start_time = datetime.now()
@@ -215,7 +267,9 @@ def create_test_summary(app, status, error_message=None, project_name=None):
             os.makedirs(log_dir, exist_ok=True)
 
         # Get logs from the text widget
-        log_content = app.logs_text.get(1.0, tk.END).strip()
+        if log_content is None:
+            log_content = app.logs_text.get(1.0, tk.END)
+        log_content = log_content.strip()
 
         # Calculate test duration from summary or logs
         duration = calculate_test_duration(log_content, log_dir)
@@ -224,18 +278,23 @@ def create_test_summary(app, status, error_message=None, project_name=None):
         summary = {
             "status": status,
             "project": project_name or app.project_var.get(),
-            "mode": app.mode_var.get(),
-            "headless": app.mode_var.get() == "headless",
+            "mode": mode,
+            "headless": mode == "headless",
             "durationSec": duration,
             "timestamp": test_start_time.isoformat(),
             "logLines": len(log_content.split("\n")) if log_content else 0,
             "error": error_message if error_message else None,
         }
 
-        # Save summary.json
+        # Save summary.json, keeping what the engine recorded (steps, artifacts)
         summary_path = os.path.join(log_dir, "summary.json")
+        try:
+            with open(summary_path, "r") as f:
+                summary = dict(json.load(f), **summary)
+        except Exception:
+            pass
         with open(summary_path, "w") as f:
-            json.dump(summary, f, indent=2)
+            json.dump(summary, f, separators=(",", ":"))
 
         # Save raw logs
         log_path = os.path.join(log_dir, "test_log.txt")
@@ -243,32 +302,58 @@ def create_test_summary(app, status, error_message=None, project_name=None):
             f.write(log_content)
 
         # Save test artifacts if test failed
+        error_path = os.path.join(log_dir, "error_details.txt")
         if status == "failed" and error_message:
             # Create error details file
-            error_path = os.path.join(log_dir, "error_details.txt")
             with open(error_path, "w") as f:
                 f.write(f"Test failed at: {test_start_time.isoformat()}\n")
                 f.write(f"Error: {error_message}\n")
                 f.write(f"Project: {project_name or app.project_var.get()}\n")
-                f.write(f"Mode: {app.mode_var.get()}\n")
+                f.write(f"Mode: {mode}\n")
                 f.write(f"Duration: {duration:.1f} seconds\n")
                 f.write("\nFull Log:\n")
                 f.write("-" * 50 + "\n")
                 f.write(log_content)
 
-        app.add_log(f"📁 Test results saved to: {log_dir}", "info")
-
-        # Auto-refresh both results and history tabs
-        app.root.after(1000, app.auto_refresh_all_tabs)
+        # Keep the run index in step with the files just written
+        try:
+            index = get_run_index()
+            run_name = os.path.basename(os.path.normpath(log_dir))
+            index.record_summary(run_name, summary, log_dir)
+            index.add_artifacts(run_name, [summary_path, log_path, error_path])
+            index.index_file(run_name, "log", log_path)
+            index.index_file(run_name, "error_details", error_path)
+        except Exception as e:
+            _post_log(app, f"⚠️ Run index update failed: {e}", "warning")
+
+        _post_log(app, f"📁 Test results saved to: {log_dir}", "info")
+
+        # Archive/prune older runs in the background
+        worker = getattr(app, "retention_worker", None)
+        if worker is not None:
+            worker.request()
+
+        # Let the logs watcher push just this run into Results and History
+        watcher = getattr(app, "logs_watcher", None)
+        if watcher is not None:
+            watcher.notify(os.path.basename(os.path.normpath(log_dir)))
+        else:
+            app.root.after(1000, app.auto_refresh_all_tabs)
 
     except Exception as e:
-        app.add_log(f"❌ Error saving test summary: {str(e)}", "error")
+        _post_log(app, f"❌ Error saving test summary: {str(e)}", "error")
 
 
 def calculate_test_duration(log_content, log_dir=None):
-    """Calculate test duration from summary.json or log timestamps"""
+    """Calculate test duration from steps.bin, summary.json or log timestamps"""
     try:
-        # First try to get duration from summary.json
+        # The compact step records only need two columns scanned
+        steps_path = os.path.join(log_dir, STEPS_FILENAME) if log_dir else None
+        if steps_path and os.path.exists(steps_path):
+            duration = read_records(steps_path).duration()
+            if duration:
+                return max(duration, 1)
+        # Then try to get duration from summary.json
         if log_dir:
             summary_path = os.path.join(log_dir, "summary.json")
             if os.path.exists(summary_path):
@@ -322,17 +407,18 @@ def calculate_test_duration(log_content, log_dir=None):
 
 
 def stop_test(app) -> None:
-    """Stop the running test"""
-    if app.test_process and app.test_running:
-        try:
-            app.test_process.terminate()
-            app.add_log("🛑 Test stopped by user", "warning")
-            app.status_label.config(text="Stopped", fg=app.colors["warning"])
-        except:
-            pass
-
-    app.test_running = False
-    app.update_button_states()
+    """Stop the runs selected in the queue list, or all queued and running runs"""
+    run_queue = getattr(app, "run_queue", None)
+    if run_queue is None:
+        return
+    tree = getattr(app, "queue_tree", None)
+    selected = [int(iid) for iid in tree.selection()] if tree is not None else []
+    stopped = 0
+    for request_id in selected or [r.id for r in run_queue.snapshot()]:
+        stopped += run_queue.cancel(request_id)
+    if stopped:
+        app.add_log(f"🛑 {stopped} run(s) stopped by user", "warning")
+    refresh_queue_view(app)
 
 
 def add_log(app, message, tag="info"):
@@ -0,0 +1,462 @@
+"""Scheduler for periodic synthetic monitoring runs.
+
+A long-lived process reads a schedule file (schedules.json, see
+schedules.example.json) and queues each flow into a RunQueue
+(core/run_queue.py) on its schedule, either an interval ("every": "15m") or
+a five-field cron expression ("cron": "*/10 * * * *", also @hourly, @daily,
+@weekly). Each run starts at its slot plus a random delay of up to "jitter"
+(SCHEDULE_JITTER, default 30s; at most half the interval, or 30s for cron),
+so flows sharing a schedule do not all start in the same second. A slot
+whose previous run is still queued or running is skipped, not stacked. At
+most RUN_CONCURRENCY runs execute at once, so resource use stays bounded
+whatever the schedule.
+
+Every run is an ordinary run in logs/ and History. The scheduler itself only
+keeps compact rollups in logs/monitor/:
+    rollups.ndjson  one line per schedule and hour: runs, passed, failed,
+                    stopped, skipped, duration p50/p95/max (with the
+                    mergeable histogram) and the last failing run
+    status.json     per schedule: last state, last run, consecutive failures
+                    and the next due time, rewritten whenever they change
+
+    python -m core.scheduler [schedules.json] [--concurrency 2] [--dry-run]
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import signal
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from core.histogram import LatencyHistogram
+from core.run_queue import (
+    RunQueue,
+    RunRequest,
+    default_concurrency,
+    parse_priority,
+    stream_run,
+)
+from core.soak import parse_duration
+
+MONITOR_DIR = os.path.join("logs", "monitor")
+ROLLUP_SECONDS = 3600
+
+_CRON_FIELDS = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 7),
+)
+_CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+
+
+def _cron_field(text: str, name: str, low: int, high: int) -> frozenset:
+    values = set()
+    for part in text.split(","):
+        part, _, step = part.partition("/")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-", 1))
+        else:
+            start = end = int(part)
+            if step:
+                end = high
+        if not (low <= start <= end <= high):
+            raise ValueError(f"cron {name} out of range: {part}")
+        values.update(range(start, end + 1, int(step) if step else 1))
+    # Sunday may be written as 7
+    if name == "weekday" and 7 in values:
+        values.discard(7)
+        values.add(0)
+    return frozenset(values)
+
+
+class CronSchedule:
+    """Five-field cron expression: minute hour day-of-month month weekday."""
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = _CRON_ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"cron needs 5 fields: {expression!r}")
+        self.minute, self.hour, self.day, self.month, self.weekday = (
+            _cron_field(text, name, low, high)
+            for text, (name, low, high) in zip(fields, _CRON_FIELDS)
+        )
+        # As in cron: if both day fields are restricted, either may match
+        self._any_day = fields[2] == "*" or fields[4] == "*"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.day
+        weekday = (moment.weekday() + 1) % 7 in self.weekday
+        return (day and weekday) if self._any_day else (day or weekday)
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after moment."""
+        moment = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 4)
+        while moment < limit:
+            if moment.month not in self.month:
+                year, month = divmod(moment.month, 12)
+                moment = moment.replace(
+                    year=moment.year + year, month=month + 1, day=1, hour=0, minute=0
+                )
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hour:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minute:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"cron never matches: {self.expression!r}")
+
+
+@dataclass
+class Schedule:
+    name: str
+    project: str
+    flow: str
+    every: float = None
+    cron: CronSchedule = None
+    jitter: float = 0.0
+    mode: str = "headless"
+    priority: int = 5
+    env: dict = field(default_factory=dict)
+    slot: float = None
+    due: float = None
+    request: RunRequest = None
+    last_state: str = None
+    last_run: str = None
+    consecutive_failures: int = 0
+
+    def plan(self, now: float) -> None:
+        """Set the next slot after now and its jittered due time."""
+        if self.cron is not None:
+            self.slot = self.cron.next_after(datetime.fromtimestamp(now)).timestamp()
+        elif self.slot is None:
+            self.slot = now
+        else:
+            # Anchored to the first slot, so jitter and late runs never drift
+            missed = int((now - self.slot) // self.every) + 1
+            self.slot += max(missed, 1) * self.every
+        self.due = self.slot + random.uniform(0, self.jitter)
+
+    @property
+    def busy(self) -> bool:
+        return self.request is not None and self.request.state in (
+            "queued",
+            "running",
+        )
+
+
+def load_schedules(path: str, projects: dict) -> list:
+    """Schedules from a JSON file; raises ValueError listing every problem."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    entries = data.get("schedules", []) if isinstance(data, dict) else data
+    default_jitter = os.getenv("SCHEDULE_JITTER", "30s")
+    schedules, errors, names = [], [], set()
+    for i, entry in enumerate(entries, 1):
+        flow = entry.get("flow", "")
+        project = entry.get("project", "")
+        name = entry.get("name") or os.path.splitext(os.path.basename(flow))[0]
+        where = f"schedule {i} ({name})"
+        if project not in projects:
+            errors.append(f"{where}: unknown project {project!r}")
+        if not os.path.exists(flow):
+            errors.append(f"{where}: flow not found: {flow}")
+        if name in names:
+            errors.append(f"{where}: duplicate name")
+        names.add(name)
+        if bool(entry.get("every")) == bool(entry.get("cron")):
+            errors.append(f"{where}: give exactly one of 'every' and 'cron'")
+            continue
+        try:
+            every = parse_duration(entry["every"]) if entry.get("every") else None
+            cron = CronSchedule(entry["cron"]) if entry.get("cron") else None
+            jitter = parse_duration(entry.get("jitter", default_jitter))
+        except (ValueError, TypeError) as e:
+            errors.append(f"{where}: {e}")
+            continue
+        if every is not None and every < 60:
+            errors.append(f"{where}: 'every' must be at least 60s")
+            continue
+        spacing = every or 60
+        env = dict((projects.get(project) or {}).get("env_vars") or {})
+        env.update(entry.get("env") or {})
+        env["GAMMA_RETENTION_EXTERNAL"] = "1"
+        schedules.append(
+            Schedule(
+                name=name,
+                project=project,
+                flow=flow,
+                every=every,
+                cron=cron,
+                jitter=min(jitter, spacing / 2),
+                mode=entry.get("mode", "headless"),
+                priority=parse_priority(entry.get("priority", "normal")),
+                env=env,
+            )
+        )
+    if errors:
+        raise ValueError("\n".join(errors))
+    return schedules
+
+
+class Rollups:
+    """Per schedule and hour counters; closed hours go to rollups.ndjson."""
+
+    def __init__(self, directory: str = MONITOR_DIR, bucket: int = ROLLUP_SECONDS):
+        self.directory = directory
+        self.bucket = bucket
+        self._lock = threading.Lock()
+        self._open = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _current(self, name: str, now: float) -> dict:
+        start = int(now // self.bucket * self.bucket)
+        item = self._open.get((name, start))
+        if item is None:
+            item = self._open[(name, start)] = {
+                "runs": 0,
+                "passed": 0,
+                "failed": 0,
+                "stopped": 0,
+                "skipped": 0,
+                "histogram": LatencyHistogram(),
+                "last_failure": None,
+            }
+        return item
+
+    def add_run(self, name: str, request: RunRequest) -> None:
+        with self._lock:
+            item = self._current(name, request.finished_at or time.time())
+            item["runs"] += 1
+            item[request.state] = item.get(request.state, 0) + 1
+            if request.state == "passed":
+                item["histogram"].record(
+                    (request.finished_at - request.started_at) * 1000
+                )
+            elif request.state == "failed" and request.run_dir:
+                item["last_failure"] = os.path.basename(request.run_dir)
+
+    def add_skip(self, name: str) -> None:
+        with self._lock:
+            self._current(name, time.time())["skipped"] += 1
+
+    def flush(self, everything: bool = False) -> int:
+        """Write closed hours (all hours if everything); returns lines written."""
+        current = int(time.time() // self.bucket * self.bucket)
+        with self._lock:
+            closed = sorted(
+                key for key in self._open if everything or key[1] < current
+            )
+            lines = []
+            for name, start in closed:
+                item = self._open.pop((name, start))
+                histogram = item.pop("histogram")
+                summary = histogram.summary()
+                lines.append(
+                    dict(
+                        item,
+                        schedule=name,
+                        hour=datetime.fromtimestamp(start).isoformat(),
+                        duration={
+                            k: summary[k] for k in ("p50_ms", "p95_ms", "max_ms")
+                        },
+                        histogram=histogram.to_dict(),
+                    )
+                )
+        if lines:
+            path = os.path.join(self.directory, "rollups.ndjson")
+            with open(path, "a", encoding="utf-8") as f:
+                for line in lines:
+                    f.write(json.dumps(line) + "\n")
+        return len(lines)
+
+
+class Scheduler:
+    def __init__(self, schedules, concurrency=None, rollups=None, retention=None):
+        self.schedules = schedules
+        self.rollups = rollups or Rollups()
+        self.retention = retention
+        self.queue = RunQueue(self._launch, concurrency, self._on_change)
+        self._by_request = {}
+        self._changed = threading.Event()
+        self._stop = threading.Event()
+
+    def _launch(self, request: RunRequest) -> str:
+        logging.info(f"Scheduled run #{request.id} started: {request.label}")
+        return stream_run(request)
+
+    def _on_change(self, request: RunRequest) -> None:
+        if request.state in ("queued", "running"):
+            return
+        schedule = self._by_request.get(id(request))
+        if schedule is None:
+            return
+        self.rollups.add_run(schedule.name, request)
+        schedule.last_state = request.state
+        schedule.last_run = os.path.basename(request.run_dir or "") or None
+        if request.state == "failed":
+            schedule.consecutive_failures += 1
+        elif request.state == "passed":
+            schedule.consecutive_failures = 0
+        logging.info(f"Scheduled run #{request.id} {request.state}: {request.label}")
+        if self.retention is not None:
+            self.retention.request()
+        # Dropped last, so pending() covers results still being recorded
+        self._by_request.pop(id(request), None)
+        self._changed.set()
+
+    def pending(self) -> int:
+        """Scheduled runs whose results are not recorded yet."""
+        return len(self._by_request)
+
+    def tick(self, now: float = None) -> None:
+        """Queue every schedule that is due; skip those still busy."""
+        now = time.time() if now is None else now
+        for schedule in self.schedules:
+            if schedule.due is None:
+                schedule.plan(now)
+                self._changed.set()
+            if now < schedule.due:
+                continue
+            if schedule.busy:
+                logging.warning(f"Skipping {schedule.name}: previous run still busy")
+                self.rollups.add_skip(schedule.name)
+            else:
+                request = RunRequest(
+                    project=schedule.project,
+                    script=schedule.flow,
+                    mode=schedule.mode,
+                    priority=schedule.priority,
+                    env=schedule.env,
+                )
+                # Mapped before queuing: a quick run may finish inside enqueue()
+                self._by_request[id(request)] = schedule
+                queued, coalesced = self.queue.enqueue(request)
+                schedule.request = queued
+                if coalesced:
+                    # Another schedule's identical run is already waiting
+                    self._by_request.pop(id(request), None)
+                    self.rollups.add_skip(schedule.name)
+            schedule.plan(now)
+            self._changed.set()
+        self.queue.forget_finished(keep=len(self.schedules))
+
+    def status(self) -> dict:
+        return {
+            "updated": datetime.now().isoformat(timespec="seconds"),
+            "schedules": {
+                s.name: {
+                    "project": s.project,
+                    "flow": s.flow,
+                    "every_sec": s.every,
+                    "cron": s.cron.expression if s.cron else None,
+                    "running": s.busy,
+                    "last_state": s.last_state,
+                    "last_run": s.last_run,
+                    "consecutive_failures": s.consecutive_failures,
+                    "next_due": (
+                        datetime.fromtimestamp(s.due).isoformat(timespec="seconds")
+                        if s.due
+                        else None
+                    ),
+                }
+                for s in self.schedules
+            },
+        }
+
+    def write_status(self) -> None:
+        path = os.path.join(self.rollups.directory, "status.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.status(), f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def run(self, poll: float = 1.0) -> None:
+        while not self._stop.is_set():
+            self.tick()
+            self.rollups.flush()
+            if self._changed.is_set():
+                self._changed.clear()
+                self.write_status()
+            self._stop.wait(poll)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.queue.cancel_all()
+        self.queue.wait()
+        self.rollups.flush(everything=True)
+        self.write_status()
+
+
+def main():
+    from core.retention import RetentionWorker
+    from core.utils import discover_projects
+
+    parser = argparse.ArgumentParser(description="Run flows on a schedule")
+    parser.add_argument(
+        "schedule_file", nargs="?", default=os.getenv("SCHEDULE_FILE", "schedules.json")
+    )
+    parser.add_argument("--concurrency", type=int, default=default_concurrency())
+    parser.add_argument(
+        "--dry-run", action="store_true", help="print the next due times and exit"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO"),
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+
+    try:
+        schedules = load_schedules(args.schedule_file, discover_projects())
+    except (OSError, ValueError) as e:
+        print(f"Invalid schedule file {args.schedule_file}:\n{e}")
+        raise SystemExit(2)
+
+    if args.dry_run:
+        for schedule in schedules:
+            now, times = time.time(), []
+            for _ in range(5):
+                schedule.plan(now)
+                now = schedule.slot
+                times.append(datetime.fromtimestamp(now).strftime("%a %m-%d %H:%M"))
+            print(f"{schedule.name:<24} {', '.join(times)}")
+        return
+
+    # One retention pass after each finished run, not one per run process
+    retention = RetentionWorker()
+    retention.start()
+    scheduler = Scheduler(schedules, args.concurrency, retention=retention)
+    signal.signal(signal.SIGTERM, lambda *_: scheduler._stop.set())
+    print(
+        f"Scheduler: {len(schedules)} schedules, up to {args.concurrency} at once; "
+        f"rollups in {scheduler.rollups.directory}",
+        flush=True,
+    )
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("Scheduler stopping...", flush=True)
+        scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
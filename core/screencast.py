@@ -0,0 +1,94 @@
+"""Rolling screencast of the page under test, kept in memory until a failure.
+
+Page.startScreencast pushes JPEG frames over a CDPSession; every frame is
+acknowledged, at most `fps` frames per second are kept, and frames older than
+`seconds` are dropped, so memory stays bounded and passing runs never touch
+the disk. On failure the buffered lead-up is written as a Motion-JPEG file
+(frames back to back; plays in VLC, ffplay and most browsers).
+"""
+
+import time
+import base64
+import threading
+from collections import deque
+
+
+class ScreencastRecorder:
+    def __init__(self, session, options):
+        self.session = session
+        self.options = options
+        self._frames = deque()
+        self._lock = threading.Lock()
+        self._last_kept = 0.0
+        self._started = None
+        self.stats = {
+            "fps": options.fps,
+            "seconds": options.seconds,
+            "frames_received": 0,
+            "frames_kept": 0,
+            "bytes_received": 0,
+            "bytes_persisted": 0,
+            "cpu_seconds": 0.0,
+            "persisted": [],
+        }
+
+    def start(self) -> None:
+        self.session.on("Page.screencastFrame", self._on_frame)
+        self.session.send(
+            "Page.startScreencast",
+            {
+                "format": "jpeg",
+                "quality": self.options.quality,
+                "maxWidth": self.options.max_width,
+                "maxHeight": self.options.max_height,
+            },
+        )
+        self._started = time.monotonic()
+
+    def stop(self) -> dict:
+        """Stop receiving frames and return the overhead figures."""
+        try:
+            self.session.send("Page.stopScreencast", timeout=2)
+        except Exception:
+            pass
+        with self._lock:
+            self._frames.clear()
+            stats = dict(self.stats, cpu_seconds=round(self.stats["cpu_seconds"], 3))
+        if self._started is not None:
+            stats["recorded_sec"] = round(time.monotonic() - self._started, 1)
+        return stats
+
+    def _on_frame(self, params: dict) -> None:
+        # Runs on the CDP reader thread: ack first so Chrome keeps streaming
+        t0 = time.thread_time()
+        self.session.send_nowait(
+            "Page.screencastFrameAck", {"sessionId": params.get("sessionId")}
+        )
+        data = params.get("data") or ""
+        now = time.monotonic()
+        with self._lock:
+            self.stats["frames_received"] += 1
+            self.stats["bytes_received"] += len(data) * 3 // 4
+            if data and now - self._last_kept >= 1.0 / self.options.fps:
+                self._last_kept = now
+                self._frames.append((now, data))
+                self.stats["frames_kept"] += 1
+            while self._frames and now - self._frames[0][0] > self.options.seconds:
+                self._frames.popleft()
+            self.stats["cpu_seconds"] += time.thread_time() - t0
+
+    def snapshot(self) -> tuple:
+        """(mjpeg bytes, frame count, covered seconds) of the current buffer."""
+        with self._lock:
+            frames = list(self._frames)
+        if not frames:
+            return b"", 0, 0.0
+        data = b"".join(base64.b64decode(b64) for _, b64 in frames)
+        return data, len(frames), round(frames[-1][0] - frames[0][0], 1)
+
+    def record_persisted(self, name: str, size: int, frames: int, span: float) -> None:
+        with self._lock:
+            self.stats["bytes_persisted"] += size
+            self.stats["persisted"].append(
+                {"file": name, "frames": frames, "seconds": span}
+            )
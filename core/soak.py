@@ -0,0 +1,360 @@
+"""Soak / endurance mode: loop a flow (or a batch of flows) for hours.
+
+The whole soak is one run, logs/<time>-soak, so log retention sees a single
+run instead of thousands. Memory and disk stay flat for 24 h:
+    iterations.ndjson   one compact line per iteration (ITERATION_COLUMNS)
+    steps.bin           every step execution as compact columnar records
+                        (core/step_records.py), flushed in chunks
+    checkpoints.ndjson  every --checkpoint-every seconds: iterations, failures,
+                        browser restarts, process RSS and per-step p50/p95/p99
+                        of that window
+    failures/<n>/       failure artifacts of iteration n; the first failure is
+                        always kept, otherwise only the newest --max-failures
+    summary.json        cumulative totals, rewritten at every checkpoint, so
+                        History shows a running soak's progress
+One headless browser (set up with the first flow's project settings) is
+reused while it stays healthy. It is restarted when a health check fails and
+every --recycle-every iterations, if that is set.
+
+    python -m core.soak <flow.json> [<flow.json> ...] --project HOLLISTER \\
+        --duration 24h
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import datetime
+
+from core.blob_store import BlobStore
+from core.load_test import LOAD_DEFAULTS, StepStats, step_key
+from core.step_records import CHUNK_RECORDS, STEPS_FILENAME, StepRecords, append_chunk
+
+ITERATION_COLUMNS = (
+    "iteration",
+    "time",
+    "flow",
+    "duration_ms",
+    "passed",
+    "failed_step",
+)
+
+
+def parse_duration(text: str) -> float:
+    """Seconds from "3600", "90m", "24h" or "2d"."""
+    text = str(text).strip().lower()
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def _rss_kb():
+    """Resident set size of this process (None where /proc is missing)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class SoakRunner:
+    def __init__(self, flows: list, run_dir: str, options):
+        self.flows = flows
+        self.run_dir = run_dir
+        self.options = options
+        self.engine = None
+        self.iteration = 0
+        self.failed = 0
+        self.restarts = 0
+        self.failure_dirs = []
+        self.totals = {}
+        self.window = {}
+        self.window_iterations = 0
+        self.window_failed = 0
+        self.started = time.time()
+        self.records = StepRecords()
+        self.steps_path = os.path.join(run_dir, STEPS_FILENAME)
+        self._iterations_file = open(
+            os.path.join(run_dir, "iterations.ndjson"), "a", encoding="utf-8"
+        )
+
+    # ---- browser -------------------------------------------------------
+
+    def _start_browser(self):
+        from tests.base_test_engine import BaseTestEngine
+
+        self.engine = BaseTestEngine(dict(self.flows[0][1]))
+        self.engine.setup_driver()
+
+    def _stop_browser(self):
+        if self.engine is None:
+            return
+        if self.engine._artifact_writer is not None:
+            self.engine._artifact_writer.shutdown(wait=True)
+            self.engine._artifact_writer = None
+        if self.engine.cdp is not None:
+            self.engine.cdp.close()
+        try:
+            self.engine.driver.quit()
+        except Exception:
+            pass
+        self.engine = None
+
+    def _healthy(self) -> bool:
+        if self.engine is None or self.engine.aborted_by_user:
+            return False
+        try:
+            self.engine.driver.delete_all_cookies()
+            return self.engine.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    # ---- iterations ----------------------------------------------------
+
+    def run_iteration(self) -> None:
+        if self.engine is None:
+            if self.iteration:
+                self.restarts += 1
+            self._start_browser()
+        self.iteration += 1
+        engine = self.engine
+        failure_dir = os.path.join(self.run_dir, "failures", f"{self.iteration:06d}")
+        for flow_idx, (label, _, steps) in enumerate(self.flows):
+            prefix = f"{label}/" if len(self.flows) > 1 else ""
+            engine.reset_steps()
+            engine.failure_occurred = False
+            # Artifacts of a failure (if the policy captures any) go here
+            engine.run_dir = failure_dir
+            started = time.time()
+            failed_step = 0
+            for idx, step in enumerate(steps, 1):
+                key = prefix + step_key(idx, step)
+                step_started = time.time()
+                try:
+                    data = engine.execute_step(step)
+                except Exception as e:
+                    failed_step = idx
+                    self.records.append(key, step_started, time.time(), "fail")
+                    self._add_error(key, str(e).split("Stacktrace:")[0].strip())
+                    break
+                self.records.append(
+                    key, data["start"], data["end"], data["status"], data.get("retries")
+                )
+                if data.get("status") == "pass":
+                    self._add_latency(key, (data["end"] - data["start"]) * 1000)
+                else:
+                    self._add_error(key, data.get("error") or "failed")
+            engine.reset_steps()
+            record = [
+                self.iteration,
+                int(started),
+                flow_idx,
+                int((time.time() - started) * 1000),
+                0 if failed_step else 1,
+                failed_step,
+            ]
+            self._iterations_file.write(json.dumps(record) + "\n")
+            if failed_step:
+                self.failed += 1
+                self.window_failed += 1
+                break
+        self._iterations_file.flush()
+        if len(self.records) >= CHUNK_RECORDS:
+            append_chunk(self.steps_path, self.records)
+        self.window_iterations += 1
+        if engine._artifact_writer is not None:
+            engine._artifact_writer.submit(lambda: None).result()
+        if os.path.isdir(failure_dir):
+            self._roll_failures(failure_dir)
+        recycle = self.options.recycle_every
+        if not self._healthy() or (recycle and self.iteration % recycle == 0):
+            self._stop_browser()
+
+    def _stats(self, key: str):
+        return (
+            self.totals.setdefault(key, StepStats()),
+            self.window.setdefault(key, StepStats()),
+        )
+
+    def _add_latency(self, key: str, elapsed_ms: float) -> None:
+        for stats in self._stats(key):
+            stats.histogram.record(elapsed_ms)
+
+    def _add_error(self, key: str, message: str) -> None:
+        for stats in self._stats(key):
+            stats.add_error(message)
+
+    def _roll_failures(self, failure_dir: str) -> None:
+        """Keep the first failure and the newest ones, up to --max-failures."""
+        self.failure_dirs.append(failure_dir)
+        rolled = False
+        while len(self.failure_dirs) > max(self.options.max_failures, 1):
+            shutil.rmtree(self.failure_dirs.pop(1), ignore_errors=True)
+            rolled = True
+        # Deduplicated artifacts also live in logs/blobs/; free the unlinked ones
+        if rolled:
+            store = BlobStore()
+            if store.enabled:
+                store.gc()
+
+    # ---- checkpoints ---------------------------------------------------
+
+    def checkpoint(self) -> dict:
+        """Aggregate the window since the last checkpoint and start a new one."""
+        elapsed = time.time() - self.started
+        record = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "elapsed_sec": round(elapsed, 1),
+            "iterations": self.window_iterations,
+            "failed": self.window_failed,
+            "total_iterations": self.iteration,
+            "total_failed": self.failed,
+            "restarts": self.restarts,
+            "rss_kb": _rss_kb(),
+            "steps": {
+                key: dict(stats.histogram.summary(), errors=stats.errors)
+                for key, stats in self.window.items()
+            },
+        }
+        with open(
+            os.path.join(self.run_dir, "checkpoints.ndjson"), "a", encoding="utf-8"
+        ) as f:
+            f.write(json.dumps(record) + "\n")
+        self.window = {}
+        self.window_iterations = 0
+        self.window_failed = 0
+        return record
+
+    def summary(self, project: str, status: str, last_checkpoint: dict) -> dict:
+        return {
+            "project": project,
+            "mode": "soak",
+            "status": status,
+            "error": (
+                f"{self.failed} of {self.iteration} iterations failed"
+                if self.failed
+                else None
+            ),
+            "timestamp": datetime.now().isoformat(),
+            "durationSec": round(time.time() - self.started, 1),
+            "soak": {
+                "flows": [label for label, _, _ in self.flows],
+                "iterations": self.iteration,
+                "failed": self.failed,
+                "restarts": self.restarts,
+                "iteration_columns": list(ITERATION_COLUMNS),
+                "kept_failures": [os.path.basename(d) for d in self.failure_dirs],
+                "last_checkpoint": last_checkpoint,
+                "steps": {
+                    key: dict(stats.histogram.summary(), errors=stats.errors)
+                    for key, stats in self.totals.items()
+                },
+                "errors": {
+                    key: stats.messages
+                    for key, stats in self.totals.items()
+                    if stats.errors
+                },
+            },
+        }
+
+    def close(self) -> None:
+        self._stop_browser()
+        append_chunk(self.steps_path, self.records)
+        self._iterations_file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Loop JSON flows for a time budget")
+    parser.add_argument("flows", nargs="+")
+    parser.add_argument("--project", default=os.getenv("PROJECT", "UNKNOWN"))
+    parser.add_argument("--duration", default="1h", help="e.g. 3600, 90m, 24h")
+    parser.add_argument("--checkpoint-every", default="5m")
+    parser.add_argument("--max-failures", type=int, default=20)
+    parser.add_argument("--recycle-every", type=int, default=0, help="iterations")
+    options = parser.parse_args()
+
+    # Unlike load users, a soak keeps failure screenshots by default. They are
+    # rolled (deleted) as it goes, so they are not shared through logs/blobs/
+    defaults = dict(LOAD_DEFAULTS, ARTIFACT_LEVEL="failure-minimal", ARTIFACT_DEDUP="0")
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+    from tests.base_test_engine import BaseTestEngine
+    from tests.json_runner import _validate_flow_json, prepare_flow
+
+    flows = []
+    for path in options.flows:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        errors = _validate_flow_json(data)
+        if errors:
+            print(f"Invalid flow JSON {path}:\n" + "\n".join(f" - {e}" for e in errors))
+            raise SystemExit(2)
+        label = os.path.splitext(os.path.basename(path))[0]
+        flows.append((label,) + prepare_flow(data, options.project))
+
+    project = flows[0][1].get("name")
+    coordinator = BaseTestEngine(dict(flows[0][1]))
+    run_dir = coordinator.create_run_dir("soak")
+    run_name = os.path.basename(run_dir)
+    print(f"RUN_DIR: {run_dir}")
+
+    duration = parse_duration(options.duration)
+    every = parse_duration(options.checkpoint_every)
+    runner = SoakRunner(flows, run_dir, options)
+    next_checkpoint = runner.started + every
+    last, status = None, "running"
+
+    def write_summary():
+        summary = runner.summary(project, status, last)
+        path = os.path.join(run_dir, "summary.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        coordinator._index("record_summary", run_name, summary, run_dir)
+
+    try:
+        while time.time() - runner.started < duration:
+            try:
+                runner.run_iteration()
+            except Exception as e:
+                # Browser could not start or died mid-iteration: retry fresh
+                logging.error(f"Soak iteration {runner.iteration} broke: {e}")
+                runner._stop_browser()
+                time.sleep(5)
+            if time.time() >= next_checkpoint:
+                next_checkpoint = time.time() + every
+                last = runner.checkpoint()
+                print(
+                    f"[{last['elapsed_sec'] / 3600:.1f}h] {last['total_iterations']} "
+                    f"iterations, {last['total_failed']} failed, "
+                    f"{last['restarts']} restarts, RSS {last['rss_kb']} KB",
+                    flush=True,
+                )
+                write_summary()
+    except KeyboardInterrupt:
+        print("Soak stopped by user")
+    finally:
+        last = runner.checkpoint()
+        runner.close()
+        status = "failed" if runner.failed else "passed"
+        write_summary()
+        coordinator._index(
+            "add_artifacts",
+            run_name,
+            [
+                os.path.join(run_dir, name)
+                for name in (
+                    "summary.json",
+                    "iterations.ndjson",
+                    "checkpoints.ndjson",
+                    STEPS_FILENAME,
+                )
+            ],
+        )
+    print(f"Soak finished: {runner.iteration} iterations, {runner.failed} failed")
+
+
+if __name__ == "__main__":
+    main()
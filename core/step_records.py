@@ -0,0 +1,190 @@
+"""Compact step execution records and their binary columnar file, steps.bin.
+
+StepRecords keeps one column per field in array.array (step name id,
+start, end, status code, retries), with step names interned, so a record
+costs 20 bytes instead of a dict. steps.bin is a sequence of chunks. Each
+chunk is a header, its own name table (JSON) and the five columns
+back to back, little-endian:
+
+    b"GSR1" | uint32 count | uint32 names_len | names JSON
+    uint16[count] step | float64[count] start | float64[count] end
+    uint8[count] status | uint8[count] retries
+
+Long soak and load runs flush a chunk every CHUNK_RECORDS records with
+append_chunk() so memory stays bounded; read_records() concatenates the
+chunks. A single run writes one chunk next to summary.json, whose "steps"
+list stays the compatible, human-readable view (records_view()).
+
+    python -m core.step_records logs/<run>/steps.bin [--json]
+"""
+
+import json
+import struct
+import sys
+from array import array
+
+STEPS_FILENAME = "steps.bin"
+STATUS_CODES = ("pass", "fail", "skip")
+CHUNK_RECORDS = 4096
+
+_MAGIC = b"GSR1"
+_HEADER = struct.Struct("<4sII")
+_COLUMNS = (
+    ("step", "H"),
+    ("start", "d"),
+    ("end", "d"),
+    ("status", "B"),
+    ("retries", "B"),
+)
+
+
+def _le(column: array) -> bytes:
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+class StepRecords:
+    __slots__ = ("names", "_ids", "step", "start", "end", "status", "retries")
+
+    def __init__(self):
+        self.names = []
+        self._ids = {}
+        for field, typecode in _COLUMNS:
+            setattr(self, field, array(typecode))
+
+    def __len__(self) -> int:
+        return len(self.step)
+
+    def intern(self, name: str) -> int:
+        step_id = self._ids.get(name)
+        if step_id is None:
+            step_id = self._ids[name] = len(self.names)
+            self.names.append(name)
+        return step_id
+
+    def append(self, name, start, end, status="pass", retries=0) -> None:
+        self.step.append(self.intern(name))
+        self.start.append(start or 0.0)
+        self.end.append(end or 0.0)
+        self.status.append(
+            STATUS_CODES.index(status) if status in STATUS_CODES else 1
+        )
+        self.retries.append(min(int(retries or 0), 255))
+
+    def extend(self, other: "StepRecords") -> None:
+        """Append another set of records, re-interning its names."""
+        remap = [self.intern(name) for name in other.names]
+        self.step.extend(remap[i] for i in other.step)
+        for field in ("start", "end", "status", "retries"):
+            getattr(self, field).extend(getattr(other, field))
+
+    def clear(self) -> None:
+        """Drop the records; interned names are kept."""
+        for field, typecode in _COLUMNS:
+            setattr(self, field, array(typecode))
+
+    def duration(self) -> float:
+        """First start to last end, in seconds (0 when empty)."""
+        first = min((s for s in self.start if s), default=None)
+        last = max(self.end, default=0.0)
+        return max(last - first, 0.0) if first and last else 0.0
+
+    def to_bytes(self) -> bytes:
+        names = json.dumps(self.names, ensure_ascii=False).encode("utf-8")
+        return b"".join(
+            [_HEADER.pack(_MAGIC, len(self), len(names)), names]
+            + [_le(getattr(self, field)) for field, _ in _COLUMNS]
+        )
+
+
+def append_chunk(path: str, records: StepRecords) -> None:
+    """Add the records to path as one chunk and clear them."""
+    if len(records):
+        with open(path, "ab") as f:
+            f.write(records.to_bytes())
+        records.clear()
+
+
+def parse_records(data: bytes) -> StepRecords:
+    """All chunks of a steps.bin payload as one StepRecords."""
+    records, offset = StepRecords(), 0
+    while offset < len(data):
+        magic, count, names_len = _HEADER.unpack_from(data, offset)
+        if magic != _MAGIC:
+            raise ValueError(f"not a steps.bin chunk at offset {offset}")
+        offset += _HEADER.size
+        chunk = StepRecords()
+        chunk.names = json.loads(data[offset : offset + names_len].decode("utf-8"))
+        offset += names_len
+        for field, typecode in _COLUMNS:
+            column = array(typecode)
+            size = column.itemsize * count
+            column.frombytes(data[offset : offset + size])
+            if sys.byteorder == "big":
+                column.byteswap()
+            setattr(chunk, field, column)
+            offset += size
+        records.extend(chunk)
+    return records
+
+
+def read_records(path: str) -> StepRecords:
+    with open(path, "rb") as f:
+        return parse_records(f.read())
+
+
+def records_view(records: StepRecords) -> list:
+    """summary.json-style step dicts (name, start, end, status, retries)."""
+    return [
+        {
+            "name": records.names[records.step[i]],
+            "start": records.start[i],
+            "end": records.end[i],
+            "status": STATUS_CODES[records.status[i]],
+            "retries": records.retries[i],
+        }
+        for i in range(len(records))
+    ]
+
+
+def step_totals(records: StepRecords) -> dict:
+    """{name: {count, failed, mean_sec, max_sec}} over all records."""
+    totals = {}
+    for i in range(len(records)):
+        item = totals.setdefault(
+            records.names[records.step[i]],
+            {"count": 0, "failed": 0, "total_sec": 0.0, "max_sec": 0.0},
+        )
+        elapsed = max(records.end[i] - records.start[i], 0.0)
+        item["count"] += 1
+        item["failed"] += 1 if records.status[i] else 0
+        item["total_sec"] += elapsed
+        item["max_sec"] = max(item["max_sec"], elapsed)
+    for item in totals.values():
+        item["mean_sec"] = round(item.pop("total_sec") / item["count"], 3)
+        item["max_sec"] = round(item["max_sec"], 3)
+    return totals
+
+
+def main():
+    """CLI: python -m core.step_records <steps.bin> [--json]"""
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python -m core.step_records <steps.bin> [--json]")
+        sys.exit(1)
+    records = read_records(sys.argv[1])
+    if sys.argv[2:] == ["--json"]:
+        json.dump(records_view(records), sys.stdout, indent=2)
+        print()
+        return
+    print(f"{len(records)} step executions over {records.duration():.1f}s")
+    for name, item in step_totals(records).items():
+        print(
+            f"{item['count']:>9} runs {item['failed']:>7} failed "
+            f"{item['mean_sec']:>8.3f}s mean {item['max_sec']:>8.3f}s max  {name}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""Step actions a flow may use.
+
+Kept free of Tk so the headless runner and the Flow Builder can share it.
+"""
+
+STEP_ACTIONS = ("navigate", "click", "fill", "wait", "assert_budget", "custom")
@@ -0,0 +1,254 @@
+"""Third-party impact experiment: rerun a flow with each third-party domain blocked.
+
+A baseline run of the flow (headless, per-step traffic on) lists every domain
+the flow loads. Domains outside the first party (the sites of the flow's
+navigate URLs, plus FIRST_PARTY_DOMAINS) are then blocked one at a time via
+BLOCK_DOMAINS, which the engine turns into Network.setBlockedURLs. Runs go
+through tests/json_runner.py in parallel, up to --workers at once. With
+--repeats N the baseline and every variant run N times and their medians are
+compared. The report lists, per blocked domain, the change in flow duration,
+largest LCP and bytes, and per-step duration deltas, largest saving first.
+It is printed and saved as logs/impact-<project>-<time>.json.
+
+    python -m core.third_party <flow.json> HOLLISTER --workers 4 --repeats 3
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def site_of(host: str) -> str:
+    """Registrable part of a host name, close enough for first-party checks."""
+    labels = (host or "").lower().strip(".").split(".")
+    # example.co.uk, shop.com.au: short second-level label under a country TLD
+    if len(labels) >= 3 and len(labels[-1]) == 2 and len(labels[-2]) <= 3:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+def first_party_sites(steps: list) -> set:
+    sites = {
+        site_of(urlsplit(step["url"]).hostname or "")
+        for step in steps
+        if step.get("action") == "navigate" and step.get("url")
+    }
+    extra = os.getenv("FIRST_PARTY_DOMAINS", "")
+    sites.update(site_of(d) for d in extra.split(",") if d.strip())
+    return sites - {""}
+
+
+def third_party_domains(summary: dict, first_party: set) -> list:
+    """Third-party domains of a run, by bytes transferred (largest first)."""
+    totals = {}
+    for step in summary.get("steps", []):
+        by_domain = (step.get("traffic") or {}).get("by_domain") or {}
+        for domain, (_, size) in by_domain.items():
+            totals[domain] = totals.get(domain, 0) + size
+    return [
+        domain
+        for domain, _ in sorted(totals.items(), key=lambda item: -item[1])
+        if "." in domain and site_of(domain) not in first_party
+    ]
+
+
+def run_metrics(summary: dict) -> dict:
+    """Flow duration, largest LCP, bytes and per-step durations of one run."""
+    steps = summary.get("steps", [])
+    durations = {
+        f"{idx}. {step.get('name', '?')}": step["end"] - step["start"]
+        for idx, step in enumerate(steps, 1)
+        if "start" in step and "end" in step
+    }
+    lcps = [
+        (step.get("perf") or {}).get("lcp_ms")
+        for step in steps
+        if (step.get("perf") or {}).get("lcp_ms") is not None
+    ]
+    return {
+        "status": summary.get("status"),
+        "duration_sec": sum(durations.values()),
+        "lcp_ms": max(lcps) if lcps else None,
+        "bytes": sum((s.get("traffic") or {}).get("bytes", 0) for s in steps),
+        "steps": durations,
+    }
+
+
+def _median(runs: list) -> dict:
+    """Median of each metric over repeated runs (failed runs are left out)."""
+    passed = [r for r in runs if r["status"] == "passed"] or runs
+
+    def median(values):
+        values = [v for v in values if v is not None]
+        return statistics.median(values) if values else None
+
+    return {
+        "runs": len(runs),
+        "failed": len([r for r in runs if r["status"] != "passed"]),
+        "duration_sec": median(r.get("duration_sec") for r in passed) or 0,
+        "lcp_ms": median(r.get("lcp_ms") for r in passed),
+        "bytes": median(r.get("bytes") for r in passed) or 0,
+        "steps": {
+            name: median(r["steps"].get(name) for r in passed)
+            for name in (passed[0]["steps"] if passed else {})
+        },
+    }
+
+
+def run_flow(flow_path: str, project: str, blocked: list = ()) -> dict:
+    """One headless run of the flow and its summary.json ({} if none was written)."""
+    env = dict(os.environ, HEADLESS="1", GAMMA_RETENTION_EXTERNAL="1")
+    env["BLOCK_DOMAINS"] = ",".join(blocked)
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (PROJECT_ROOT, env.get("PYTHONPATH")) if p
+    )
+    result = subprocess.run(
+        [sys.executable, "tests/json_runner.py", flow_path, project],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    for line in (result.stdout + result.stderr).splitlines():
+        if "RUN_DIR:" in line:
+            path = os.path.join(
+                PROJECT_ROOT, line.split("RUN_DIR:")[1].strip(), "summary.json"
+            )
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                break
+    return {}
+
+
+def _delta(new, old):
+    return None if new is None or old is None else round(new - old, 3)
+
+
+def impact_report(baseline: dict, variants: dict) -> list:
+    """Per-domain deltas against the baseline, largest duration saving first."""
+    rows = []
+    for domain, result in variants.items():
+        rows.append(
+            {
+                "domain": domain,
+                "failed": result["failed"],
+                "duration_sec": _delta(
+                    result["duration_sec"], baseline["duration_sec"]
+                ),
+                "lcp_ms": _delta(result["lcp_ms"], baseline["lcp_ms"]),
+                "bytes": _delta(result["bytes"], baseline["bytes"]),
+                "steps": {
+                    name: _delta(value, baseline["steps"].get(name))
+                    for name, value in result["steps"].items()
+                },
+            }
+        )
+    return sorted(rows, key=lambda r: r["duration_sec"] or 0)
+
+
+def run_experiment(
+    flow_path: str, project: str, workers: int = 2, repeats: int = 1, limit: int = 15
+) -> dict:
+    with open(flow_path, "r", encoding="utf-8") as f:
+        flow = json.load(f)
+    first = run_flow(flow_path, project)
+    if not first:
+        raise RuntimeError("Baseline run wrote no summary.json")
+    domains = third_party_domains(
+        first, first_party_sites(flow.get("TEST_STEPS", []))
+    )[:limit]
+    print(f"Baseline done; blocking {len(domains)} third-party domains in turn")
+    jobs = [(None, ())] * (repeats - 1) + [
+        (domain, (domain,)) for domain in domains for _ in range(repeats)
+    ]
+    results = {None: [run_metrics(first)]}
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        futures = [
+            (key, pool.submit(run_flow, flow_path, project, blocked))
+            for key, blocked in jobs
+        ]
+        for key, future in futures:
+            summary = future.result()
+            metrics = run_metrics(summary) if summary else None
+            results.setdefault(key, []).append(
+                metrics or {"status": "error", "steps": {}}
+            )
+            if key is not None and len(results[key]) == repeats:
+                print(f"  blocked {key}")
+    baseline = _median(results.pop(None))
+    return {
+        "project": project,
+        "flow": flow_path,
+        "timestamp": datetime.now().isoformat(),
+        "repeats": repeats,
+        "first_party": sorted(first_party_sites(flow.get("TEST_STEPS", []))),
+        "baseline": baseline,
+        "domains": impact_report(
+            baseline, {domain: _median(runs) for domain, runs in results.items()}
+        ),
+    }
+
+
+def format_report(report: dict) -> list:
+    base = report["baseline"]
+    lcp = f"{base['lcp_ms']:.0f}ms" if base["lcp_ms"] is not None else "n/a"
+    lines = [
+        f"Baseline: {base['duration_sec']:.1f}s, LCP {lcp}, "
+        f"{base['bytes'] / 1024:.0f} KB ({base['runs']} runs)",
+        f"{'Blocked domain':<40} {'Δ time':>9} {'Δ LCP':>9} {'Δ KB':>8}",
+    ]
+    for row in report["domains"]:
+        duration, lcp = "n/a", "n/a"
+        if row["duration_sec"] is not None:
+            duration = f"{row['duration_sec']:+.2f}s"
+        if row["lcp_ms"] is not None:
+            lcp = f"{row['lcp_ms']:+.0f}ms"
+        note = f"  ({row['failed']} failed)" if row["failed"] else ""
+        lines.append(
+            f"{row['domain'][:40]:<40} {duration:>9} {lcp:>9} "
+            f"{(row['bytes'] or 0) / 1024:>+8.0f}{note}"
+        )
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rerun a flow with each third-party domain blocked in turn"
+    )
+    parser.add_argument("flow")
+    parser.add_argument("project", nargs="?", default=os.getenv("PROJECT", "UNKNOWN"))
+    parser.add_argument("--workers", type=int, default=min(os.cpu_count() or 2, 4))
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--max-domains", type=int, default=15)
+    args = parser.parse_args()
+    report = run_experiment(
+        os.path.abspath(args.flow),
+        args.project,
+        args.workers,
+        max(args.repeats, 1),
+        args.max_domains,
+    )
+    print("\n".join(format_report(report)))
+    path = os.path.join(
+        PROJECT_ROOT,
+        "logs",
+        f"impact-{args.project}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json",
+    )
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report saved: {path}")
+
+
+if __name__ == "__main__":
+    main()
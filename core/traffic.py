@@ -0,0 +1,232 @@
+"""Per-step transfer accounting and a compact waterfall from CDP Network events.
+
+TrafficRecorder counts every request of the run against the step that issued
+it: requests, encoded bytes (Network.loadingFinished) and failures, in total
+and by domain and resource type ({name: [requests, bytes]}). The resource
+timing of each response (Network.responseReceived's ResourceTiming, which
+unlike the page's Resource Timing buffer survives navigations) goes into a
+waterfall of one short row per request, with domains and types interned, and
+is written as waterfall.json.gz at the end of the run.
+
+    python -m core.traffic waterfall logs/<run>/waterfall.json.gz [step]
+"""
+
+import gzip
+import json
+import threading
+from urllib.parse import urlsplit
+
+WATERFALL_FILENAME = "waterfall.json.gz"
+
+WATERFALL_COLUMNS = (
+    "step",
+    "start_ms",
+    "duration_ms",
+    "ttfb_ms",
+    "bytes",
+    "status",
+    "type",
+    "domain",
+    "path",
+)
+
+_MAX_IN_FLIGHT = 2000
+_MAX_ROWS = 20000
+_MAX_PATH = 120
+
+
+def _domain(url: str) -> str:
+    parts = urlsplit(url or "")
+    return parts.hostname or parts.scheme or "?"
+
+
+def _new_totals() -> dict:
+    return {"requests": 0, "bytes": 0, "failed": 0, "by_domain": {}, "by_type": {}}
+
+
+class TrafficRecorder:
+    def __init__(self, session):
+        self.session = session
+        self.step = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._steps = {}
+        self._rows = []
+        self._domains = {}
+        self._types = {}
+        self._origin = None
+        self.dropped = 0
+
+    def start(self) -> None:
+        for event, handler in (
+            ("Network.requestWillBeSent", self._on_request),
+            ("Network.responseReceived", self._on_response),
+            ("Network.loadingFinished", self._on_finished),
+            ("Network.loadingFailed", self._on_failed),
+        ):
+            self.session.on(event, handler)
+        self.session.send("Network.enable", {})
+
+    # ---- CDP handlers (reader thread) ----------------------------------
+
+    def _on_request(self, params: dict) -> None:
+        request_id = params.get("requestId")
+        redirect = params.get("redirectResponse")
+        if redirect and request_id in self._in_flight:
+            hop = self._in_flight.pop(request_id)
+            hop["status"] = redirect.get("status", 0)
+            hop["timing"] = redirect.get("timing")
+            self._finish(
+                hop, params.get("timestamp"), redirect.get("encodedDataLength")
+            )
+        if len(self._in_flight) >= _MAX_IN_FLIGHT:
+            self._in_flight.pop(next(iter(self._in_flight)))
+            self.dropped += 1
+        if self._origin is None:
+            self._origin = params.get("timestamp")
+        self._in_flight[request_id] = {
+            "url": (params.get("request") or {}).get("url", ""),
+            "type": params.get("type") or "Other",
+            "start": params.get("timestamp"),
+            "step": self.step,
+        }
+
+    def _on_response(self, params: dict) -> None:
+        entry = self._in_flight.get(params.get("requestId"))
+        if entry is not None:
+            response = params.get("response") or {}
+            entry["type"] = params.get("type") or entry["type"]
+            entry["status"] = response.get("status", 0)
+            entry["timing"] = response.get("timing")
+
+    def _on_finished(self, params: dict) -> None:
+        entry = self._in_flight.pop(params.get("requestId"), None)
+        if entry is not None:
+            self._finish(entry, params.get("timestamp"), params.get("encodedDataLength"))
+
+    def _on_failed(self, params: dict) -> None:
+        entry = self._in_flight.pop(params.get("requestId"), None)
+        if entry is not None:
+            entry["failed"] = True
+            self._finish(entry, params.get("timestamp"), 0)
+
+    def _finish(self, entry: dict, end_ts, size) -> None:
+        size = int(size or 0)
+        domain = _domain(entry["url"])
+        kind = entry["type"]
+        start = entry.get("start") or 0
+        timing = entry.get("timing") or {}
+        with self._lock:
+            totals = self._steps.setdefault(entry["step"], _new_totals())
+            totals["requests"] += 1
+            totals["bytes"] += size
+            totals["failed"] += 1 if entry.get("failed") else 0
+            for key, name in (("by_domain", domain), ("by_type", kind)):
+                counts = totals[key].setdefault(name, [0, 0])
+                counts[0] += 1
+                counts[1] += size
+            if len(self._rows) >= _MAX_ROWS:
+                self.dropped += 1
+                return
+            self._rows.append(
+                [
+                    entry["step"],
+                    round((start - (self._origin or start)) * 1000, 1),
+                    round(max((end_ts or start) - start, 0) * 1000, 1),
+                    round(timing.get("receiveHeadersEnd", -1), 1),
+                    size,
+                    -1 if entry.get("failed") else entry.get("status", 0),
+                    self._types.setdefault(kind, len(self._types)),
+                    self._domains.setdefault(domain, len(self._domains)),
+                    urlsplit(entry["url"]).path[:_MAX_PATH],
+                ]
+            )
+
+    # ---- results -------------------------------------------------------
+
+    def step_totals(self, step: int) -> dict:
+        """Copy of one step's totals (requests, bytes, failed, by_domain, by_type)."""
+        with self._lock:
+            totals = self._steps.get(step) or _new_totals()
+            return json.loads(json.dumps(totals))
+
+    def waterfall(self) -> dict:
+        with self._lock:
+            return {
+                "columns": list(WATERFALL_COLUMNS),
+                "types": list(self._types),
+                "domains": list(self._domains),
+                "rows": list(self._rows),
+            }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "file": WATERFALL_FILENAME,
+                "requests": sum(t["requests"] for t in self._steps.values()),
+                "bytes": sum(t["bytes"] for t in self._steps.values()),
+                "incomplete": len(self._in_flight),
+                "dropped": self.dropped,
+            }
+
+
+def encode_waterfall(waterfall: dict) -> bytes:
+    return gzip.compress(json.dumps(waterfall, separators=(",", ":")).encode("utf-8"))
+
+
+def compare_steps(old_steps: list, new_steps: list, top: int = 3) -> list:
+    """Lines describing how each step's traffic changed between two runs."""
+    lines = []
+    for idx, new in enumerate(new_steps, 1):
+        new_t = new.get("traffic")
+        if not new_t:
+            continue
+        old = old_steps[idx - 1] if idx <= len(old_steps) else {}
+        if old.get("name") != new.get("name"):
+            old = next((s for s in old_steps if s.get("name") == new.get("name")), {})
+        old_t = old.get("traffic") or _new_totals()
+        delta = new_t["bytes"] - old_t["bytes"]
+        lines.append(
+            f"{idx:2d}. {new.get('name', '?')}: "
+            f"{old_t['bytes'] / 1024:.0f} → {new_t['bytes'] / 1024:.0f} KB "
+            f"({delta / 1024:+.0f} KB), "
+            f"{old_t['requests']} → {new_t['requests']} requests"
+        )
+        domains = set(new_t["by_domain"]) | set(old_t["by_domain"])
+        changes = []
+        for domain in domains:
+            before = old_t["by_domain"].get(domain, [0, 0])
+            after = new_t["by_domain"].get(domain, [0, 0])
+            if after != before:
+                changes.append((after[1] - before[1], after[0] - before[0], domain))
+        changes.sort(key=lambda c: abs(c[0]), reverse=True)
+        for size, count, domain in changes[:top]:
+            lines.append(f"      {domain}: {size / 1024:+.0f} KB, {count:+d} requests")
+    return lines
+
+
+def main():
+    """CLI: python -m core.traffic waterfall <waterfall.json.gz> [step]"""
+    import sys
+
+    if len(sys.argv) not in (3, 4) or sys.argv[1] != "waterfall":
+        print("Usage: python -m core.traffic waterfall <waterfall.json.gz> [step]")
+        sys.exit(1)
+    with gzip.open(sys.argv[2], "rt", encoding="utf-8") as f:
+        data = json.load(f)
+    step = int(sys.argv[3]) if len(sys.argv) == 4 else None
+    rows = [r for r in data["rows"] if step is None or r[0] == step]
+    if not rows:
+        return
+    first = min(r[1] for r in rows)
+    span = max(r[1] + r[2] for r in rows) - first or 1
+    for row in sorted(rows, key=lambda r: r[1]):
+        offset = int((row[1] - first) / span * 40)
+        width = max(int(row[2] / span * 40), 1)
+        bar = " " * offset + "#" * width
+        name = data["domains"][row[7]] + row[8]
+        print(f"{row[0]:2d} {bar:<41} {row[2]:7.0f}ms {row[4]:>9} {name[:60]}")
+
+
+if __name__ == "__main__":
+    main()
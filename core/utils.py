@@ -2,6 +2,7 @@ import os
 import json
 from datetime import datetime
 from ui.theme import load_theme
+from core.web_vitals import format_perf
 
 
 def _hex_to_rgb(hex_color: str):
@@ -33,6 +34,9 @@ def _save_prefs(app) -> None:
             "project": (app.project_var.get() if hasattr(app, "project_var") else ""),
             "flow": app.flow_var.get() if hasattr(app, "flow_var") else "",
             "mode": (app.mode_var.get() if hasattr(app, "mode_var") else "headless"),
+            "priority": (
+                app.priority_var.get() if hasattr(app, "priority_var") else "normal"
+            ),
         }
         with open(app.prefs_path, "w", encoding="utf-8") as f:
             json.dump(data, f)
@@ -89,6 +93,11 @@ def on_project_change(app) -> None:
         app.add_log(f"⚠️ Unknown project: {project_name}", "warning")
 
 
+def normalize_prefix(name: str) -> str:
+    """Project name as an env var prefix: upper case, '-' and ' ' as '_'."""
+    return (name or "").upper().replace("-", "_").replace(" ", "_")
+
+
 def discover_projects() -> dict:
     """Scan tests/projects/* for project folders and return config dict (generic)."""
     projects_root = os.path.join("tests", "projects")
@@ -99,7 +108,7 @@ def discover_projects() -> dict:
             if not os.path.isdir(project_dir):
                 continue
             # Build env var keys from folder name (normalize to A-Z_)
-            env_prefix = entry.upper().replace("-", "_").replace(" ", "_")
+            env_prefix = normalize_prefix(entry)
             env_vars = {
                 f"{env_prefix}_EMAIL": os.getenv(f"{env_prefix}_EMAIL", ""),
                 f"{env_prefix}_PASSWORD": os.getenv(f"{env_prefix}_PASSWORD", ""),
@@ -168,11 +177,32 @@ def format_test_summary(summary: dict) -> str:
 
         for i, step in enumerate(summary["steps"], 1):
             step_status = step.get("status", "unknown")
-            step_emoji = "✅" if step_status == "ok" else "❌"
+            step_emoji = "✅" if step_status in ("ok", "pass") else "❌"
             step_name = step.get("name", "Unknown Step")
-            step_duration = step.get("durationSec", 0)
+            step_duration = step.get("durationSec")
+            if step_duration is None:
+                step_duration = (step.get("end") or 0) - (step.get("start") or 0)
 
             lines.append(f"{i:2d}. {step_emoji} {step_name} ({step_duration:.1f}s)")
+            if step.get("perf"):
+                lines.append(f"    ⚡ {format_perf(step['perf'])}")
+            main_thread = step.get("main_thread") or {}
+            if main_thread.get("tbt_ms"):
+                worst = (main_thread.get("worst_tasks") or [{}])[0]
+                script = next(
+                    (s["url"] for s in worst.get("scripts") or [] if s.get("url")), ""
+                )
+                lines.append(
+                    f"    🧵 blocked {main_thread['tbt_ms']:.0f}ms, longest task "
+                    f"{main_thread.get('longest_task_ms', 0):.0f}ms"
+                    + (f" ({script})" if script else "")
+                )
+            for budget in step.get("budget") or []:
+                if budget.get("status") == "fail":
+                    lines.append(
+                        f"    🚫 {budget['metric']} {budget['actual']:g} "
+                        f"> {budget['limit']:g}"
+                    )
 
         lines.append("")
 
@@ -187,4 +217,25 @@ def format_test_summary(summary: dict) -> str:
     log_lines = summary.get("logLines", 0)
     lines.append(f"📊 Log lines: {log_lines}")
 
+    # Memory growth across steps (engine runs report this)
+    memory = summary.get("memory")
+    if memory and memory.get("slopes"):
+        heap = memory["slopes"].get("js_heap_used_bytes", 0) / 1024
+        nodes = memory["slopes"].get("dom_nodes", 0)
+        flag = " ⚠️ possible leak" if memory.get("leak_suspected") else ""
+        lines.append(
+            f"🧠 Memory: heap {heap:+.0f} KB/step, {nodes:+.0f} nodes/step{flag}"
+        )
+
+    # Artifact cost (engine runs report this)
+    artifacts = summary.get("artifacts")
+    if artifacts:
+        lines.append(
+            f"🗂️ Artifacts ({artifacts.get('level', '?')}): "
+            f"{artifacts.get('files', 0)} files, "
+            f"{artifacts.get('bytes', 0) / 1024:.1f} KB, "
+            f"{artifacts.get('seconds', 0):.2f}s"
+            f" ({artifacts.get('reused', 0)} reused)"
+        )
+
     return "\n".join(lines)
@@ -0,0 +1,249 @@
+"""Core Web Vitals, navigation timing and Chrome metrics per step.
+
+OBSERVER_JS is installed with Page.addScriptToEvaluateOnNewDocument, so every
+document the run loads buffers LCP, layout shifts, long tasks and event
+timings from the start (observers added later would miss the early entries).
+collect_vitals() reads them together with Navigation Timing, paint timings and
+Performance.getMetrics after a step and returns a flat dict of numbers, stored
+as the step's "perf" in summary.json and as step_metrics rows in the index.
+
+INP and TBT are lab proxies: INP is the slowest event duration seen on the
+page, TBT the sum of long-task time over 50 ms since navigation start.
+
+The observers also buffer long tasks, long animation frames (which name the
+scripts that ran) and events slower than 100 ms; collect_main_thread() drains
+them after each step into its blocking time and worst tasks with their script
+URLs.
+"""
+
+import logging
+
+OBSERVER_JS = """
+(() => {
+  if (window.__gammaPerf) return;
+  try { performance.setResourceTimingBufferSize(5000); } catch (e) {}
+  const perf = window.__gammaPerf = {lcp: 0, cls: 0, tbt: 0, longTasks: 0, inp: 0,
+                                     tasks: [], frames: [], events: []};
+  const keep = (list, item) => { if (list.length < 500) list.push(item); };
+  const observe = (type, cb, extra) => {
+    try {
+      new PerformanceObserver(list => list.getEntries().forEach(cb))
+        .observe(Object.assign({type, buffered: true}, extra || {}));
+    } catch (e) {}
+  };
+  observe('largest-contentful-paint', e => { perf.lcp = e.renderTime || e.startTime; });
+  observe('layout-shift', e => { if (!e.hadRecentInput) perf.cls += e.value; });
+  observe('longtask', e => {
+    perf.longTasks++;
+    perf.tbt += Math.max(e.duration - 50, 0);
+    keep(perf.tasks, {start: e.startTime, duration: e.duration});
+  });
+  // Long animation frames name the scripts that ran (longtask entries do not)
+  observe('long-animation-frame', e => keep(perf.frames, {
+    start: e.startTime,
+    duration: e.duration,
+    scripts: (e.scripts || []).map(s => ({
+      url: s.sourceURL || '',
+      fn: s.sourceFunctionName || '',
+      invoker: s.invoker || '',
+      duration: s.duration
+    }))
+  }));
+  observe('event', e => {
+    perf.inp = Math.max(perf.inp, e.duration);
+    if (e.duration >= 100) keep(perf.events, {
+      name: e.name,
+      start: e.startTime,
+      duration: e.duration,
+      target: e.target ? e.target.tagName + (e.target.id ? '#' + e.target.id : '') : ''
+    });
+  }, {durationThreshold: 16});
+  observe('first-input', e => { perf.inp = Math.max(perf.inp, e.duration); });
+})();
+"""
+
+COLLECT_JS = """
+const nav = performance.getEntriesByType('navigation')[0] || {};
+const paint = {};
+performance.getEntriesByType('paint').forEach(p => { paint[p.name] = p.startTime; });
+const v = window.__gammaPerf || {};
+const resources = performance.getEntriesByType('resource');
+let pageBytes = nav.transferSize || 0;
+resources.forEach(r => { pageBytes += r.transferSize || 0; });
+return {
+  ttfb_ms: nav.responseStart || 0,
+  dom_content_loaded_ms: nav.domContentLoadedEventEnd || 0,
+  load_ms: nav.loadEventEnd || 0,
+  dom_interactive_ms: nav.domInteractive || 0,
+  transfer_bytes: nav.transferSize || 0,
+  requests: resources.length + 1,
+  page_bytes: pageBytes,
+  fp_ms: paint['first-paint'] || 0,
+  fcp_ms: paint['first-contentful-paint'] || 0,
+  lcp_ms: v.lcp || 0,
+  cls: v.cls || 0,
+  tbt_ms: v.tbt || 0,
+  long_tasks: v.longTasks || 0,
+  inp_ms: v.inp || 0
+};
+"""
+
+# Takes the long tasks, long animation frames and slow events buffered since
+# the previous call
+DRAIN_JS = """
+const p = window.__gammaPerf;
+if (!p || !p.tasks) return null;
+return {tasks: p.tasks.splice(0), frames: p.frames.splice(0),
+        events: p.events.splice(0)};
+"""
+
+# Worst tasks / events kept per step
+_WORST = 5
+
+# Fields filled in by COLLECT_JS
+PAGE_FIELDS = (
+    "ttfb_ms",
+    "dom_content_loaded_ms",
+    "load_ms",
+    "dom_interactive_ms",
+    "transfer_bytes",
+    "requests",
+    "page_bytes",
+    "fp_ms",
+    "fcp_ms",
+    "lcp_ms",
+    "cls",
+    "tbt_ms",
+    "long_tasks",
+    "inp_ms",
+)
+
+# Performance.getMetrics names kept per step, with their field names
+CDP_METRICS = {
+    "JSHeapUsedSize": "js_heap_used_bytes",
+    "JSHeapTotalSize": "js_heap_total_bytes",
+    "Nodes": "dom_nodes",
+    "JSEventListeners": "js_event_listeners",
+    "Documents": "documents",
+    "LayoutCount": "layout_count",
+    "RecalcStyleCount": "recalc_style_count",
+    "ScriptDuration": "script_ms",
+    "TaskDuration": "task_ms",
+}
+
+# Reported in seconds by Chrome, stored in milliseconds
+_SECONDS_METRICS = {"ScriptDuration", "TaskDuration"}
+
+
+def install_observers(driver) -> bool:
+    """Register the observers for every document loaded from now on."""
+    try:
+        driver.execute_cdp_cmd(
+            "Page.addScriptToEvaluateOnNewDocument", {"source": OBSERVER_JS}
+        )
+        return True
+    except Exception as e:
+        logging.warning(f"Web vitals observers unavailable: {e}")
+        return False
+
+
+def cdp_metrics(driver) -> dict:
+    """Selected Performance.getMetrics values as {field: number}."""
+    result = {}
+    try:
+        metrics = driver.execute_cdp_cmd("Performance.getMetrics", {})
+    except Exception:
+        return result
+    for metric in metrics.get("metrics", []):
+        field = CDP_METRICS.get(metric.get("name"))
+        if field is None:
+            continue
+        value = float(metric.get("value") or 0)
+        if metric["name"] in _SECONDS_METRICS:
+            value *= 1000
+        result[field] = round(value, 3)
+    return result
+
+
+def collect_vitals(driver) -> dict:
+    """Vitals, navigation/paint timing and Chrome metrics of the current page."""
+    perf = {}
+    try:
+        values = driver.execute_script(COLLECT_JS) or {}
+        for key, value in values.items():
+            perf[key] = round(float(value or 0), 4 if key == "cls" else 1)
+    except Exception as e:
+        logging.debug(f"Web vitals not collected: {e}")
+    perf.update(cdp_metrics(driver))
+    return perf
+
+
+def format_perf(perf: dict) -> str:
+    """One-line digest of a step's perf fields for logs and Results."""
+    parts = []
+    for key, label in (
+        ("ttfb_ms", "TTFB"),
+        ("fcp_ms", "FCP"),
+        ("lcp_ms", "LCP"),
+        ("tbt_ms", "TBT"),
+        ("inp_ms", "INP"),
+    ):
+        if perf.get(key):
+            parts.append(f"{label} {perf[key]:.0f}ms")
+    if "cls" in perf:
+        parts.append(f"CLS {perf['cls']:.3f}")
+    return ", ".join(parts)
+
+
+def _attribute(task: dict, frames: list) -> list:
+    """Scripts of the long animation frame that contains a long task."""
+    for frame in frames:
+        if frame["start"] <= task["start"] < frame["start"] + frame["duration"]:
+            scripts = sorted(frame["scripts"], key=lambda s: -s["duration"])
+            return [
+                {
+                    "url": s["url"],
+                    "function": s["fn"],
+                    "invoker": s["invoker"],
+                    "duration_ms": round(s["duration"], 1),
+                }
+                for s in scripts[:3]
+            ]
+    return []
+
+
+def collect_main_thread(driver, step_sec: float = None) -> dict:
+    """Blocking time and worst long tasks / events since the previous call."""
+    drained = driver.execute_script(DRAIN_JS)
+    if not drained:
+        return {}
+    tasks = drained.get("tasks") or []
+    frames = drained.get("frames") or []
+    events = drained.get("events") or []
+    tbt = sum(max(t["duration"] - 50, 0) for t in tasks)
+    result = {
+        "long_tasks": len(tasks),
+        "tbt_ms": round(tbt, 1),
+        "longest_task_ms": round(max((t["duration"] for t in tasks), default=0), 1),
+        "slow_events": len(events),
+    }
+    if step_sec:
+        # Share of the step spent with the main thread blocked
+        result["blocked_share"] = round(min(tbt / 1000 / step_sec, 1), 3)
+    result["worst_tasks"] = [
+        {
+            "start_ms": round(t["start"], 1),
+            "duration_ms": round(t["duration"], 1),
+            "scripts": _attribute(t, frames),
+        }
+        for t in sorted(tasks, key=lambda t: -t["duration"])[:_WORST]
+    ]
+    result["worst_events"] = [
+        {
+            "name": e["name"],
+            "target": e["target"],
+            "duration_ms": round(e["duration"], 1),
+        }
+        for e in sorted(events, key=lambda e: -e["duration"])[:_WORST]
+    ]
+    return result
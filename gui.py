@@ -24,12 +24,23 @@ from core.runner import (
     calculate_test_duration,
     add_log,
     clear_logs,
+    refresh_queue_view,
 )
+from core.run_queue import PRIORITIES, default_concurrency
 from core.history import (
     load_test_history,
     load_history_data,
     clear_all_logs,
+    apply_run_changes,
+    start_logs_watcher,
+    apply_history_filters,
+    sort_history,
+    on_history_scroll,
+    show_search_results,
+    compare_run_traffic,
 )
+from core.retention import RetentionWorker, read_run_text
+from core.run_index import get_run_index
 from core.results import (
     refresh_results,
     open_logs_folder,
@@ -128,6 +139,17 @@ class TestRunnerGUI:
         except Exception:
             pass
 
+        # Log retention (archive/prune) runs off the Tk thread
+        self.retention_worker = RetentionWorker()
+        self.retention_worker.start()
+        self.retention_worker.request()
+
+        # Keep History/Results in sync with logs/ incrementally
+        try:
+            start_logs_watcher(self)
+        except Exception as e:
+            print(f"Logs watcher unavailable: {e}")
+
         # Start log consumer
         self.root.after(100, lambda: self.consume_logs())
 
@@ -199,6 +221,24 @@ class TestRunnerGUI:
         mode_combo.pack(fill=tk.X, padx=12)
         mode_combo.bind("<<ComboboxSelected>>", lambda e: self._save_prefs())
 
+        # Queue priority: lower runs first when a slot frees up
+        self.priority_var = tk.StringVar(value=self.prefs.get("priority", "normal"))
+        tk.Label(
+            self.sidebar,
+            text="Priority",
+            bg=self.colors["surface"],
+            fg=self.colors["text_secondary"],
+            font=(self.fonts["default"], 10),
+        ).pack(anchor="w", padx=12, pady=(10, 2))
+        priority_combo = ttk.Combobox(
+            self.sidebar,
+            textvariable=self.priority_var,
+            values=list(PRIORITIES),
+            state="readonly",
+        )
+        priority_combo.pack(fill=tk.X, padx=12)
+        priority_combo.bind("<<ComboboxSelected>>", lambda e: self._save_prefs())
+
         # Actions
         actions = tk.Frame(self.sidebar, bg=self.colors["surface"])
         actions.pack(fill=tk.X, padx=12, pady=12)
@@ -253,6 +293,53 @@ class TestRunnerGUI:
             )
             self.stop_button.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(8, 0))
 
+        # Run queue: parallel runs and per-run state
+        queue_header = tk.Frame(self.sidebar, bg=self.colors["surface"])
+        queue_header.pack(fill=tk.X, padx=12)
+        tk.Label(
+            queue_header,
+            text="Queue",
+            bg=self.colors["surface"],
+            fg=self.colors["text_secondary"],
+            font=(self.fonts["default"], 10),
+        ).pack(side=tk.LEFT)
+        self.concurrency_var = tk.IntVar(value=default_concurrency())
+        concurrency_spin = tk.Spinbox(
+            queue_header,
+            from_=1,
+            to=8,
+            width=3,
+            textvariable=self.concurrency_var,
+            command=self.on_concurrency_change,
+        )
+        concurrency_spin.pack(side=tk.RIGHT)
+        concurrency_spin.bind("<Return>", lambda e: self.on_concurrency_change())
+        concurrency_spin.bind("<FocusOut>", lambda e: self.on_concurrency_change())
+        tk.Label(
+            queue_header,
+            text="Parallel",
+            bg=self.colors["surface"],
+            fg=self.colors["text_secondary"],
+            font=(self.fonts["default"], 9),
+        ).pack(side=tk.RIGHT, padx=(0, 4))
+        self.queue_tree = ttk.Treeview(
+            self.sidebar,
+            columns=("state", "run", "status"),
+            show="headings",
+            height=5,
+        )
+        for column, heading, width in (
+            ("state", "State", 80),
+            ("run", "Run", 160),
+            ("status", "Last line", 200),
+        ):
+            self.queue_tree.heading(column, text=heading)
+            self.queue_tree.column(column, width=width, stretch=column == "status")
+        self.queue_tree.tag_configure("failed", foreground=self.colors["danger"])
+        self.queue_tree.tag_configure("passed", foreground=self.colors["success"])
+        self.queue_tree.tag_configure("running", foreground=self.colors["warning"])
+        self.queue_tree.pack(fill=tk.X, padx=12, pady=(2, 12))
+
         # Navigation
         nav = tk.Frame(self.sidebar, bg=self.colors["surface"])
         nav.pack(fill=tk.X, padx=12)
@@ -952,29 +1039,40 @@ class TestRunnerGUI:
     def update_button_states(self):
         """Update button states based on test status and selection availability"""
         # If buttons are not yet created (early init), skip
-        if not hasattr(self, "start_button") or not hasattr(self, "stop_button"):
+        if not hasattr(self, "run_button") or not hasattr(self, "stop_button"):
             return
         has_flow = hasattr(self, "flow_var") and bool(self.flow_var.get())
-        if self.test_running:
-            self.run_button.config(state="disabled")
-            self.stop_button.config(state="normal")
-            self.status_label.config(text="Running", fg=self.colors["warning"])
-        else:
-            self.run_button.config(state=("normal" if has_flow else "disabled"))
-            self.stop_button.config(state="disabled")
-            self.status_label.config(text="Ready", fg=self.colors["success"])
+        # Run stays enabled while runs are active: it queues another one
+        self.run_button.config(state=("normal" if has_flow else "disabled"))
+        self.stop_button.config(state=("normal" if self.test_running else "disabled"))
+
+    def on_concurrency_change(self):
+        """Apply the Parallel spinbox to the run queue"""
+        try:
+            concurrency = int(self.concurrency_var.get())
+        except (tk.TclError, ValueError):
+            return
+        run_queue = getattr(self, "run_queue", None)
+        if run_queue is not None:
+            run_queue.set_concurrency(concurrency)
+
+    def refresh_queue_view(self):
+        """Show queue state in the sidebar"""
+        refresh_queue_view(self)
 
     def start_test(self):
         """Start the test execution"""
         start_test(self)
 
-    def run_test_process(self):
-        """Run the actual test process with proper artifact saving"""
-        run_test_process(self)
+    def run_test_process(self, request):
+        """Run one queued request with proper artifact saving"""
+        return run_test_process(self, request)
 
-    def create_test_summary(self, status, error_message=None, project_name=None):
+    def create_test_summary(
+        self, status, error_message=None, project_name=None, request=None
+    ):
         """Create a test summary file with proper artifacts"""
-        create_test_summary(self, status, error_message, project_name)
+        create_test_summary(self, status, error_message, project_name, request)
 
     def calculate_test_duration(self, log_content, log_dir=None):
         """Calculate test duration from summary.json or log timestamps"""
@@ -1142,45 +1240,26 @@ class TestRunnerGUI:
 
             # Try to load additional details from files
             try:
-                # Find the test directory
-                logs_dir = "logs"
-                if os.path.exists(logs_dir):
-                    test_dirs = [
-                        d
-                        for d in os.listdir(logs_dir)
-                        if os.path.isdir(os.path.join(logs_dir, d)) and "checkout" in d
-                    ]
-
-                    # Find matching test directory
-                    for test_dir in test_dirs:
-                        if (
-                            date.replace("-", "") in test_dir
-                            and time.replace(":", "") in test_dir
-                        ):
-                            test_path = os.path.join(logs_dir, test_dir)
-
-                            # Load error details if available
-                            error_file = os.path.join(test_path, "error_details.txt")
-                            if os.path.exists(error_file):
-                                with open(error_file, "r") as f:
-                                    error_content = f.read()
-                                details_text.insert(tk.END, "\n\n" + "=" * 60 + "\n")
-                                details_text.insert(
-                                    tk.END, "ERROR DETAILS FROM FILE:\n"
-                                )
-                                details_text.insert(tk.END, "=" * 60 + "\n")
-                                details_text.insert(tk.END, error_content)
-
-                            # Load test log if available
-                            log_file = os.path.join(test_path, "test_log.txt")
-                            if os.path.exists(log_file):
-                                with open(log_file, "r") as f:
-                                    log_content = f.read()
-                                details_text.insert(tk.END, "\n\n" + "=" * 60 + "\n")
-                                details_text.insert(tk.END, "FULL TEST LOG:\n")
-                                details_text.insert(tk.END, "=" * 60 + "\n")
-                                details_text.insert(tk.END, log_content)
-                            break
+                # Row iids are run names; the run may be a directory or an archive
+                run = get_run_index().get_run(selection[0])
+                if run:
+                    test_path = run["path"]
+
+                    # Load error details if available
+                    error_content = read_run_text(test_path, "error_details.txt")
+                    if error_content is not None:
+                        details_text.insert(tk.END, "\n\n" + "=" * 60 + "\n")
+                        details_text.insert(tk.END, "ERROR DETAILS FROM FILE:\n")
+                        details_text.insert(tk.END, "=" * 60 + "\n")
+                        details_text.insert(tk.END, error_content)
+
+                    # Load test log if available
+                    log_content = read_run_text(test_path, "test_log.txt")
+                    if log_content is not None:
+                        details_text.insert(tk.END, "\n\n" + "=" * 60 + "\n")
+                        details_text.insert(tk.END, "FULL TEST LOG:\n")
+                        details_text.insert(tk.END, "=" * 60 + "\n")
+                        details_text.insert(tk.END, log_content)
             except Exception as e:
                 details_text.insert(
                     tk.END, f"\n\n❌ Error loading additional details: {str(e)}"
@@ -1269,9 +1348,9 @@ class TestRunnerGUI:
         """View the selected artifact file (button handler)."""
         view_selected_artifact_button(self)
 
-    def open_text_artifact_internally(self, file_path, title):
+    def open_text_artifact_internally(self, file_path, title, content=None):
         """Metin tabanlı artifact'leri uygulama içinde yeni bir pencerede açar."""
-        open_text_artifact_internally(self, file_path, title)
+        open_text_artifact_internally(self, file_path, title, content)
 
     def open_file_externally(self, file_path):
         """Artifact'i sistemin varsayılan uygulamasıyla harici olarak açar."""
@@ -1293,9 +1372,33 @@ class TestRunnerGUI:
         """Delete all files and folders under the logs directory and refresh UI."""
         clear_all_logs(self)
 
-    def consume_test_logs(self):
-        """Consume test output in a separate thread"""
-        consume_test_logs(self)
+    def apply_run_changes(self, run_names):
+        """Insert, update or delete History rows for just the given runs."""
+        apply_run_changes(self, run_names)
+
+    def apply_history_filters(self):
+        """Read the History filter bar and reload with filters pushed to SQL."""
+        apply_history_filters(self)
+
+    def sort_history(self, column):
+        """Sort History by a column heading; clicking again flips the direction."""
+        sort_history(self, column)
+
+    def show_search_results(self):
+        """Show ranked full-text matches for the History search box."""
+        show_search_results(self)
+
+    def compare_run_traffic(self):
+        """Compare per-step requests, bytes and domains of History runs."""
+        compare_run_traffic(self)
+
+    def on_history_scroll(self, first, last):
+        """Fetch the next History page when scrolling near the end."""
+        on_history_scroll(self, first, last)
+
+    def consume_test_logs(self, request):
+        """Stream one run's output into the logs"""
+        return consume_test_logs(self, request)
 
     def setup_builder_tab(self):
         return None
@@ -62,6 +62,106 @@ def build_history_tab(app) -> None:
     )
     load_btn.pack(side=tk.RIGHT, padx=app.spacing["md"], pady=app.spacing["sm"])
 
+    compare_btn = (ttk.Button if platform.system() == "Darwin" else tk.Button)(
+        header_frame,
+        text="📶 Compare Traffic",
+        command=app.compare_run_traffic,
+        **(
+            {"style": "Secondary.TButton", "cursor": "hand2"}
+            if platform.system() == "Darwin"
+            else {
+                "bg": app.colors["secondary"],
+                "fg": app.contrast_on(app.colors["secondary"]),
+                "bd": 0,
+                "relief": "flat",
+                "cursor": "hand2",
+            }
+        )
+    )
+    compare_btn.pack(side=tk.RIGHT, pady=app.spacing["sm"])
+
+    # Filters are applied by the run index query, not by reloading rows
+    filter_frame = tk.Frame(history_content, bg=app.colors["background"])
+    filter_frame.pack(fill=tk.X, pady=(0, app.spacing["sm"]))
+    app.history_project_var = tk.StringVar()
+    app.history_status_var = tk.StringVar(value="All")
+    app.history_from_var = tk.StringVar()
+    app.history_to_var = tk.StringVar()
+    app.history_search_var = tk.StringVar()
+
+    def _label(text):
+        tk.Label(
+            filter_frame,
+            text=text,
+            bg=app.colors["background"],
+            fg=app.colors["text_secondary"],
+        ).pack(side=tk.LEFT, padx=(0, 4))
+
+    def _entry(var, width):
+        entry = tk.Entry(
+            filter_frame,
+            textvariable=var,
+            width=width,
+            bg=app.colors["surface"],
+            fg=app.colors["text_primary"],
+            insertbackground=app.colors["text_primary"],
+        )
+        entry.pack(side=tk.LEFT, padx=(0, app.spacing["sm"]))
+        entry.bind("<Return>", lambda e: app.apply_history_filters())
+        return entry
+
+    _label("Project")
+    app.history_project_combo = ttk.Combobox(
+        filter_frame, textvariable=app.history_project_var, state="readonly", width=14
+    )
+    app.history_project_combo.pack(side=tk.LEFT, padx=(0, app.spacing["sm"]))
+    _label("Status")
+    ttk.Combobox(
+        filter_frame,
+        textvariable=app.history_status_var,
+        values=["All", "Success", "Failed", "Aborted", "Running", "Error"],
+        state="readonly",
+        width=9,
+    ).pack(side=tk.LEFT, padx=(0, app.spacing["sm"]))
+    _label("From")
+    _entry(app.history_from_var, 11)
+    _label("To")
+    _entry(app.history_to_var, 11)
+    _label("Search")
+    _entry(app.history_search_var, 24)
+    (ttk.Button if platform.system() == "Darwin" else tk.Button)(
+        filter_frame,
+        text="Apply",
+        command=app.apply_history_filters,
+        **(
+            {"style": "Secondary.TButton", "cursor": "hand2"}
+            if platform.system() == "Darwin"
+            else {
+                "bg": app.colors["secondary"],
+                "fg": app.contrast_on(app.colors["secondary"]),
+                "bd": 0,
+                "relief": "flat",
+                "cursor": "hand2",
+            }
+        )
+    ).pack(side=tk.LEFT)
+    (ttk.Button if platform.system() == "Darwin" else tk.Button)(
+        filter_frame,
+        text="🔎 Matches",
+        command=app.show_search_results,
+        **(
+            {"style": "Secondary.TButton", "cursor": "hand2"}
+            if platform.system() == "Darwin"
+            else {
+                "bg": app.colors["secondary"],
+                "fg": app.contrast_on(app.colors["secondary"]),
+                "bd": 0,
+                "relief": "flat",
+                "cursor": "hand2",
+            }
+        )
+    ).pack(side=tk.LEFT, padx=(app.spacing["sm"], 0))
+
     columns = ("Date", "Time", "Project", "Mode", "Status", "Duration", "Details")
     app.history_tree = ttk.Treeview(
         history_content, columns=columns, show="headings", height=15
@@ -76,14 +176,19 @@ def build_history_tab(app) -> None:
         "Details": 400,
     }
     for col in columns:
-        app.history_tree.heading(col, text=col)
+        app.history_tree.heading(
+            col, text=col, command=lambda c=col: app.sort_history(c)
+        )
         app.history_tree.column(col, width=column_widths[col], anchor="center")
 
-    scrollbar = ttk.Scrollbar(
+    app.history_scrollbar = ttk.Scrollbar(
         history_content, orient="vertical", command=app.history_tree.yview
     )
-    app.history_tree.configure(yscrollcommand=scrollbar.set)
+    # Rows are fetched page by page as the scrollbar nears the end
+    app.history_tree.configure(
+        yscrollcommand=lambda first, last: app.on_history_scroll(first, last)
+    )
     app.history_tree.pack(side="left", fill="both", expand=True)
-    scrollbar.pack(side="right", fill="y")
+    app.history_scrollbar.pack(side="right", fill="y")
 
     app.history_tree.bind("<Double-1>", app.show_full_history_details)
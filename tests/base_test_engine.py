@@ -4,7 +4,11 @@ import logging
 import json
 import pathlib
 import traceback
-import shutil
+import base64
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
@@ -18,6 +22,63 @@ from selenium.common.exceptions import (
 from datetime import datetime
 import sys
 
+from core.artifact_policy import (
+    ArtifactPolicy,
+    HarOptions,
+    ReplayOptions,
+    ScreencastOptions,
+    ScreenshotOptions,
+)
+from core.blob_store import BlobStore
+from core.cdp_session import CDPSession
+from core.coverage import COVERAGE_FILENAME, CoverageRecorder, totals
+from core.emulation import ThrottlingProfile
+from core.har_capture import HAR_FILENAME, HarRecorder
+from core.memory_tracking import LeakThresholds, check_growth, sample_memory
+from core.perf_budget import BudgetExceeded, check_budgets
+from core.network_replay import RecordReplay
+from core.retention import enforce_retention
+from core.run_index import get_run_index
+from core.screencast import ScreencastRecorder
+from core.step_records import STEPS_FILENAME, StepRecords, records_view
+from core.steps import STEP_ACTIONS
+from core.traffic import WATERFALL_FILENAME, TrafficRecorder, encode_waterfall
+from core.web_vitals import (
+    collect_main_thread,
+    collect_vitals,
+    format_perf,
+    install_observers,
+)
+
+# Step fields kept in the compact records; anything else is a per-step extra
+_RECORD_FIELDS = ("name", "action", "start", "end", "status", "retries")
+
+# Screenshot region in page CSS pixels: the element (plus margin) clamped to
+# the viewport, or the whole viewport when there is no usable element
+_SCREENSHOT_REGION_JS = """
+const selector = arguments[0], margin = arguments[1];
+const vw = window.innerWidth, vh = window.innerHeight;
+let r = null;
+if (selector) {
+  try {
+    const el = document.querySelector(selector);
+    if (el) r = el.getBoundingClientRect();
+  } catch (e) {}
+}
+let left = 0, top = 0, right = vw, bottom = vh;
+if (r && r.width > 0 && r.height > 0) {
+  left = Math.max(0, r.left - margin);
+  top = Math.max(0, r.top - margin);
+  right = Math.min(vw, r.right + margin);
+  bottom = Math.min(vh, r.bottom + margin);
+  if (right <= left || bottom <= top) {
+    left = 0; top = 0; right = vw; bottom = vh;
+  }
+}
+return {x: left + window.scrollX, y: top + window.scrollY,
+        width: right - left, height: bottom - top};
+"""
+
 
 class BaseTestEngine:
     def __init__(self, project_config):
@@ -26,6 +87,13 @@ class BaseTestEngine:
         self.headless = os.getenv("HEADLESS", "0") == "1"
         self.console_min_level = os.getenv("CONSOLE_MIN_LEVEL", "WARNING")
         self.log_level = os.getenv("LOG_LEVEL", "INFO")
+        self.perf_metrics = os.getenv("PERF_METRICS", "1") != "0"
+        self.step_traffic = os.getenv("STEP_TRAFFIC", "1") != "0"
+        self.memory_tracking = os.getenv("MEMORY_TRACKING", "1") != "0"
+        coverage = os.getenv("COVERAGE") or (
+            project_config.get("artifacts") or {}
+        ).get("coverage")
+        self.code_coverage = str(coverage).lower() in {"1", "true"}
 
         # Setup logging
         logging.basicConfig(
@@ -35,9 +103,58 @@ class BaseTestEngine:
 
         self.driver = None
         self.run_dir = None
-        self.steps = []
+        # Executed steps: compact timing columns (written as steps.bin), the
+        # action codes, and the few extras (error, perf, memory...) by index
+        self.step_records = StepRecords()
+        self.step_actions = array("B")
+        self.step_extras = {}
+        self.step_attempts = 0
         self.failure_occurred = False
         self.aborted_by_user = False
+        self.run_index = None
+        self.blob_store = BlobStore()
+        self._artifact_writer = None
+        self._stats_lock = threading.Lock()
+        self.artifact_policy = ArtifactPolicy.resolve(
+            self.project_name, project_config.get("artifacts")
+        )
+        self.screenshot_options = ScreenshotOptions.resolve(
+            project_config.get("artifacts")
+        )
+        self.screencast_options = ScreencastOptions.resolve(
+            project_config.get("artifacts")
+        )
+        self.har_options = HarOptions.resolve(project_config.get("artifacts"))
+        self.replay_options = ReplayOptions.resolve(
+            self.project_name, project_config.get("artifacts")
+        )
+        self.throttling = ThrottlingProfile.resolve(
+            self.project_name, project_config.get("throttling")
+        )
+        self.leak_thresholds = LeakThresholds.resolve(self.project_name)
+        # Set by the third-party impact experiment (core/third_party.py)
+        self.blocked_domains = [
+            d.strip() for d in os.getenv("BLOCK_DOMAINS", "").split(",") if d.strip()
+        ]
+        self.cdp = None
+        self.screencast = None
+        self.screencast_stats = None
+        self.har = None
+        self.har_stats = None
+        self.network = None
+        self.network_stats = None
+        self.traffic = None
+        self.traffic_stats = None
+        self.memory_stats = None
+        self.coverage = None
+        self.coverage_stats = None
+        self.artifact_stats = {
+            "files": 0,
+            "bytes": 0,
+            "reused": 0,
+            "seconds": 0.0,
+            "sizes": {},
+        }
 
     def setup_driver(self):
         """Setup Chrome driver with appropriate options"""
@@ -103,6 +220,232 @@ class BaseTestEngine:
                 logging.warning(f"CDP commands failed: {e}")
         except Exception as e:
             logging.warning(f"Performance logging setup failed: {e}")
+        if self.throttling.name != "none":
+            try:
+                self.throttling.apply(self.driver)
+                logging.info(f"🐢 Throttling: {self.throttling.describe()}")
+            except Exception as e:
+                logging.warning(f"Throttling profile not applied: {e}")
+                self.throttling = ThrottlingProfile(name="none")
+        if self.blocked_domains:
+            patterns = [
+                pattern
+                for domain in self.blocked_domains
+                for pattern in (f"*://{domain}/*", f"*://*.{domain}/*")
+            ]
+            try:
+                self.driver.execute_cdp_cmd(
+                    "Network.setBlockedURLs", {"urls": patterns}
+                )
+                logging.info(f"⛔ Blocking {', '.join(self.blocked_domains)}")
+            except Exception as e:
+                logging.warning(f"Domain blocking not applied: {e}")
+        if self.perf_metrics:
+            self.perf_metrics = install_observers(self.driver)
+
+        if self.screencast_options.enabled:
+            self._start_screencast()
+        if self.har_options.enabled:
+            self._start_har()
+        if self.step_traffic:
+            self._start_traffic()
+        if self.code_coverage:
+            self._start_coverage()
+        if self.replay_options.enabled:
+            self._start_network_mode()
+
+    def _cdp_session(self):
+        """Event-capable DevTools connection to the page (None if unavailable)."""
+        if self.cdp is None and self.driver is not None:
+            try:
+                self.cdp = CDPSession.for_driver(self.driver)
+            except Exception as e:
+                logging.warning(f"CDP event session unavailable: {e}")
+        return self.cdp
+
+    def _start_screencast(self):
+        """Keep the last few seconds of the page in memory for failure replays."""
+        session = self._cdp_session()
+        if session is None:
+            return
+        try:
+            recorder = ScreencastRecorder(session, self.screencast_options)
+            recorder.start()
+            self.screencast = recorder
+            logging.info(
+                f"🎥 Screencast buffer on ({self.screencast_options.fps} fps, "
+                f"last {self.screencast_options.seconds}s)"
+            )
+        except Exception as e:
+            logging.warning(f"Screencast unavailable: {e}")
+
+    def _start_har(self):
+        """Stream CDP Network events of the run into network.har.ndjson.gz."""
+        session = self._cdp_session()
+        if session is None or not self.run_dir:
+            return
+        try:
+            recorder = HarRecorder(
+                session, os.path.join(self.run_dir, HAR_FILENAME), self.har_options
+            )
+            recorder.start()
+            self.har = recorder
+            logging.info(f"🌐 HAR capture on: {recorder.path}")
+        except Exception as e:
+            logging.warning(f"HAR capture unavailable: {e}")
+
+    def _stop_har(self):
+        if self.har is None:
+            return
+        try:
+            self.har_stats = self.har.stop()
+            self._index(
+                "add_artifacts", os.path.basename(self.run_dir), [self.har.path]
+            )
+            logging.info(f"🌐 HAR saved: {self.har_stats['entries']} entries")
+        except Exception as e:
+            logging.error(f"Failed to save HAR: {e}")
+        self.har = None
+
+    def _start_traffic(self):
+        """Count each step's requests and bytes and build the run's waterfall."""
+        session = self._cdp_session()
+        if session is None:
+            return
+        try:
+            recorder = TrafficRecorder(session)
+            recorder.start()
+            self.traffic = recorder
+        except Exception as e:
+            logging.warning(f"Step traffic accounting unavailable: {e}")
+
+    def _stop_traffic(self):
+        """Attach per-step totals to the steps and write waterfall.json.gz."""
+        if self.traffic is None:
+            return
+        try:
+            for idx in range(1, len(self.step_records) + 1):
+                extras = self.step_extras.setdefault(idx, {})
+                extras["traffic"] = self.traffic.step_totals(idx)
+            self.traffic_stats = self.traffic.stats()
+        except Exception as e:
+            logging.error(f"Failed to collect step traffic: {e}")
+            self.traffic = None
+            return
+        if self.run_dir:
+            try:
+                path = os.path.join(self.run_dir, WATERFALL_FILENAME)
+                self._store_artifact(path, encode_waterfall(self.traffic.waterfall()))
+                self._index("add_artifacts", os.path.basename(self.run_dir), [path])
+            except Exception as e:
+                logging.warning(f"Failed to save waterfall: {e}")
+        logging.info(
+            f"📶 Traffic: {self.traffic_stats['requests']} requests, "
+            f"{self.traffic_stats['bytes'] / 1024:.0f} KB"
+        )
+        self.traffic = None
+
+    def _start_coverage(self):
+        """Precise JS coverage and CSS rule usage, taken after every step."""
+        session = self._cdp_session()
+        if session is None:
+            return
+        try:
+            recorder = CoverageRecorder(session)
+            recorder.start()
+            self.coverage = recorder
+            logging.info("📐 JS/CSS coverage on")
+        except Exception as e:
+            logging.warning(f"Coverage unavailable: {e}")
+
+    def _stop_coverage(self):
+        """Write coverage.json and keep the per-kind totals for the summary."""
+        if self.coverage is None:
+            return
+        try:
+            report = self.coverage.stop()
+            self.coverage_stats = dict(totals(report), file=COVERAGE_FILENAME)
+        except Exception as e:
+            logging.error(f"Failed to collect coverage: {e}")
+            self.coverage = None
+            return
+        if self.run_dir:
+            try:
+                path = os.path.join(self.run_dir, COVERAGE_FILENAME)
+                data = json.dumps(report, separators=(",", ":")).encode("utf-8")
+                self._store_artifact(path, data)
+                self._index("add_artifacts", os.path.basename(self.run_dir), [path])
+            except Exception as e:
+                logging.warning(f"Failed to save coverage: {e}")
+        for kind in ("js", "css"):
+            kind_totals = self.coverage_stats[kind]
+            if kind_totals["total"]:
+                unused = kind_totals["total"] - kind_totals["used"]
+                logging.info(
+                    f"📐 {kind.upper()} coverage: {unused / 1024:.0f} of "
+                    f"{kind_totals['total'] / 1024:.0f} KB unused "
+                    f"in {kind_totals['files']} files"
+                )
+        self.coverage = None
+
+    def _start_network_mode(self):
+        """Record responses into the network archive, or serve them from it."""
+        options = self.replay_options
+        if options.mode == "replay" and not os.path.isfile(options.archive):
+            raise RuntimeError(f"Network archive not found: {options.archive}")
+        session = self._cdp_session()
+        if session is None:
+            if options.mode == "replay":
+                raise RuntimeError("Network replay needs a CDP session")
+            return
+        try:
+            network = RecordReplay(session, options)
+            network.start()
+            self.network = network
+            logging.info(f"📼 Network {options.mode}: {options.archive}")
+        except Exception as e:
+            if options.mode == "replay":
+                raise
+            logging.warning(f"Network recording unavailable: {e}")
+
+    def _stop_network_mode(self):
+        if self.network is None:
+            return
+        try:
+            self.network_stats = self.network.stop()
+            logging.info(
+                f"📼 Network {self.network_stats['mode']}: "
+                f"{self.network_stats['matched']}/{self.network_stats['requests']} "
+                f"requests, {self.network_stats['unmatched']} unmatched"
+            )
+        except Exception as e:
+            logging.warning(f"Failed to close network archive: {e}")
+        self.network = None
+
+    def _persist_screencast(self, tag):
+        """Write the buffered lead-up of a failure as <tag>-screencast.mjpeg."""
+        if self.screencast is None or not self.run_dir:
+            return
+        data, frames, span = self.screencast.snapshot()
+        if not frames:
+            return
+        path = os.path.join(self.run_dir, f"{tag}-screencast.mjpeg")
+
+        def _write():
+            size = self._store_artifact(path, data)
+            self.screencast.record_persisted(os.path.basename(path), size, frames, span)
+            self._index("add_artifacts", os.path.basename(self.run_dir), [path])
+            logging.info(f"🎥 Screencast saved: {path} ({frames} frames, {span}s)")
+
+        self._writer().submit(_write)
+
+    def _writer(self):
+        """Single background thread that decodes and writes artifacts."""
+        if self._artifact_writer is None:
+            self._artifact_writer = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="artifacts"
+            )
+        return self._artifact_writer
 
     def wait_element(self, selector, timeout=40, clickable=False):
         """Wait for element with a strict overall timeout, searching default and iframes."""
@@ -155,6 +498,7 @@ class BaseTestEngine:
         end_time = time.monotonic() + timeout
         last_err = None
         while time.monotonic() < end_time:
+            self.step_attempts += 1
             try:
                 remaining = max(0.5, end_time - time.monotonic())
                 per_attempt = max(1, int(min(2, remaining)))
@@ -210,8 +554,71 @@ class BaseTestEngine:
         element.send_keys(value)
         return element
 
-    def save_artifacts(self, tag):
-        """Save debugging artifacts"""
+    def _store_artifact(self, path, data):
+        """Write an artifact through the content-addressed blob store."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        reused = self.blob_store.write(path, data)
+        # Called from the engine and the artifact writer thread
+        with self._stats_lock:
+            self.artifact_stats["files"] += 1
+            self.artifact_stats["bytes"] += len(data)
+            self.artifact_stats["sizes"][os.path.basename(path)] = len(data)
+            if reused:
+                self.artifact_stats["reused"] += 1
+        if reused:
+            logging.info(f"♻️ Reused identical artifact: {os.path.basename(path)}")
+        return len(data)
+
+    def _capture_screenshot(self, base, selector=None):
+        """Grab a screenshot per ScreenshotOptions; returns a Future of its path.
+
+        Chrome encodes (format, quality, clip, downscale via clip.scale); the
+        base64 decode and the write happen on the artifact writer thread.
+        """
+        options = self.screenshot_options
+        ext, data_b64 = options.extension, None
+        if not options.plain:
+            try:
+                region = self.driver.execute_script(
+                    _SCREENSHOT_REGION_JS,
+                    selector if options.clip_element else None,
+                    options.clip_margin,
+                )
+                data_b64 = self.driver.execute_cdp_cmd(
+                    "Page.captureScreenshot", options.cdp_params(region)
+                ).get("data")
+            except Exception as e:
+                logging.warning(f"Encoded screenshot failed: {e}. Falling back to PNG")
+        if not data_b64:
+            ext = "png"
+            try:
+                data_b64 = self.driver.get_screenshot_as_base64()
+            except Exception as e:
+                logging.warning(f"Native screenshot failed: {e}. Trying CDP fallback...")
+                # Fallback: CDP captureScreenshot (Chrome only)
+                data_b64 = self.driver.execute_cdp_cmd(
+                    "Page.captureScreenshot", {"format": "png", "fromSurface": True}
+                ).get("data")
+        if not data_b64:
+            raise Exception("screenshot returned no data")
+
+        path = f"{base}.{ext}"
+
+        def _write():
+            size = self._store_artifact(path, base64.b64decode(data_b64))
+            logging.info(f"Screenshot saved: {path} ({size / 1024:.1f} KB)")
+            return path
+
+        return self._writer().submit(_write)
+
+    def save_artifacts(self, tag, full=None, selector=None):
+        """Save debugging artifacts (full=False: screenshot only).
+
+        selector, when given, lets the screenshot clip to that element.
+        """
+        if full is None:
+            full = self.artifact_policy.full
         if not self.run_dir or self.driver is None:
             logging.warning(
                 f"Cannot save artifacts: run_dir={self.run_dir}, driver={self.driver is not None}"
@@ -229,10 +636,13 @@ class BaseTestEngine:
 
         pathlib.Path(self.run_dir).mkdir(parents=True, exist_ok=True)
         base = os.path.join(self.run_dir, tag)
+        written = []
+        started = time.time()
 
         logging.info(f"Saving artifacts with tag: {tag}")
 
-        # Screenshot
+        # Screenshot: captured here, decoded and written on the artifact thread
+        shot = None
         try:
             # Ensure we're on default content and the page had a moment to paint
             try:
@@ -253,28 +663,27 @@ class BaseTestEngine:
             except Exception:
                 pass
 
-            ok = self.driver.save_screenshot(f"{base}.png")
-            if not ok:
-                raise Exception("native screenshot returned False")
-            logging.info(f"Screenshot saved: {base}.png")
+            shot = self._capture_screenshot(base, selector)
         except Exception as e:
-            logging.warning(f"Native screenshot failed: {e}. Trying CDP fallback...")
-            # Fallback: CDP captureScreenshot (Chrome only)
+            logging.error(f"Failed to capture screenshot: {e}")
+
+        # Page analysis, console and network errors (capture level failure-full)
+        if full:
+            self._save_page_diagnostics(base, written)
+
+        if shot is not None:
             try:
-                png_b64 = self.driver.execute_cdp_cmd(
-                    "Page.captureScreenshot", {"format": "png", "fromSurface": True}
-                ).get("data")
-                if png_b64:
-                    import base64
+                written.append(shot.result())
+            except Exception as e:
+                logging.error(f"Failed to save screenshot: {e}")
 
-                    with open(f"{base}.png", "wb") as f:
-                        f.write(base64.b64decode(png_b64))
-                    logging.info(f"Screenshot saved via CDP: {base}.png")
-                else:
-                    logging.error("CDP captureScreenshot returned no data")
-            except Exception as e2:
-                logging.error(f"Failed to save screenshot via CDP: {e2}")
+        self._index("add_artifacts", os.path.basename(self.run_dir), written)
+        with self._stats_lock:
+            self.artifact_stats["seconds"] += time.time() - started
+        logging.info(f"Artifacts saved for tag: {tag}")
 
+    def _save_page_diagnostics(self, base, written):
+        """Save page analysis, console errors and network errors next to base."""
         # Page analysis (without saving full HTML)
         try:
             page_source = self.driver.page_source
@@ -296,8 +705,11 @@ class BaseTestEngine:
                     ),
                 }
 
-                with open(f"{base}-page-analysis.json", "w", encoding="utf-8") as f:
-                    json.dump(debug_info, f, ensure_ascii=False, indent=2)
+                self._store_artifact(
+                    f"{base}-page-analysis.json",
+                    json.dumps(debug_info, ensure_ascii=False, indent=2),
+                )
+                written.append(f"{base}-page-analysis.json")
                 logging.info(f"Page analysis saved: {base}-page-analysis.json")
         except Exception as e:
             logging.error(f"Failed to save page analysis: {e}")
@@ -313,8 +725,11 @@ class BaseTestEngine:
                 for entry in logs
                 if str(entry.get("level", "")).upper() in {"SEVERE", "ERROR"}
             ]
-            with open(f"{base}-console.json", "w", encoding="utf-8") as f:
-                json.dump(severe_logs, f, ensure_ascii=False, indent=2)
+            self._store_artifact(
+                f"{base}-console.json",
+                json.dumps(severe_logs, ensure_ascii=False, indent=2),
+            )
+            written.append(f"{base}-console.json")
             logging.info(f"Console logs saved: {base}-console.json")
         except Exception as e:
             logging.error(f"Failed to save console logs: {e}")
@@ -345,30 +760,67 @@ class BaseTestEngine:
                             )
                 except Exception:
                     continue
-            with open(f"{base}-network-errors.json", "w", encoding="utf-8") as f:
-                json.dump(errors, f, ensure_ascii=False, indent=2)
+            self._store_artifact(
+                f"{base}-network-errors.json",
+                json.dumps(errors, ensure_ascii=False, indent=2),
+            )
+            written.append(f"{base}-network-errors.json")
             logging.info(f"Network errors saved: {base}-network-errors.json")
         except Exception as e:
             logging.error(f"Failed to save network errors: {e}")
 
-        logging.info(f"Artifacts saved for tag: {tag}")
-
     def create_run_dir(self, test_type="checkout"):
         """Create timestamped run directory"""
         timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
         self.run_dir = f"logs/{timestamp}-{test_type}"
-        pathlib.Path(self.run_dir).mkdir(parents=True, exist_ok=True)
+        pathlib.Path("logs").mkdir(exist_ok=True)
+        # Runs started in parallel within the same second get -2, -3, ...
+        for attempt in range(2, 100):
+            try:
+                pathlib.Path(self.run_dir).mkdir()
+                break
+            except FileExistsError:
+                self.run_dir = f"logs/{timestamp}-{test_type}-{attempt}"
+        try:
+            self.run_index = get_run_index()
+        except Exception as e:
+            logging.warning(f"Run index unavailable: {e}")
+            self.run_index = None
+        self._index(
+            "upsert_run",
+            os.path.basename(self.run_dir),
+            path=os.path.abspath(self.run_dir),
+            project=self.project_name,
+            mode="headless" if self.headless else "normal",
+            status="running",
+        )
         return self.run_dir
 
+    def _index(self, method, *args, **kwargs):
+        """Best-effort update of the run index; never fails the test."""
+        if self.run_index is None:
+            return
+        try:
+            getattr(self.run_index, method)(*args, **kwargs)
+        except Exception as e:
+            logging.warning(f"Run index update failed ({method}): {e}")
+
     def execute_step(self, step_config):
         """Execute a single test step"""
         step_name = step_config.get("name", "Unknown Step")
         action = step_config.get("action")
 
         step_data = {"name": step_name, "action": action, "start": time.time()}
+        # click_element counts its attempts here
+        self.step_attempts = 0
+        # Network entries from here on belong to this step
+        if self.har is not None:
+            self.har.step = len(self.step_records) + 1
+        if self.traffic is not None:
+            self.traffic.step = len(self.step_records) + 1
 
         try:
-            logging.info(f"[{len(self.steps) + 1}] {step_name}")
+            logging.info(f"[{len(self.step_records) + 1}] {step_name}")
 
             if action == "navigate":
                 self.driver.get(step_config["url"])
@@ -386,6 +838,9 @@ class BaseTestEngine:
                 selector = step_config["selector"]
                 self.wait_element(selector, step_config.get("timeout", 40))
 
+            elif action == "assert_budget":
+                self.assert_budget(step_config, step_data)
+
             elif action == "custom":
                 # Execute custom function
                 custom_func = step_config.get("function")
@@ -393,8 +848,15 @@ class BaseTestEngine:
                     custom_func(self.driver, step_config)
 
             step_data.update({"end": time.time(), "status": "pass"})
+            if self.step_attempts > 1:
+                step_data["retries"] = self.step_attempts - 1
             logging.info(f"✓ {step_name} completed")
 
+            # Page performance after navigations (or any step with "measure")
+            if self.perf_metrics and step_config.get("measure", action == "navigate"):
+                step_data["perf"] = collect_vitals(self.driver)
+                logging.info(f"⚡ {format_perf(step_data['perf'])}")
+
         except Exception as e:
             step_data.update(
                 {
@@ -410,16 +872,19 @@ class BaseTestEngine:
             if any(k in err_text for k in ["invalid session id", "chrome not reachable", "no such window"]):
                 self.aborted_by_user = True
                 # Do not attempt artifacts on abort
-                self.steps.append(step_data)
+                self._record_step(step_data)
                 raise Exception("Aborted: browser closed by user")
 
             # Save artifacts on failure
-            if self.driver:
+            if self.driver and self.artifact_policy.on_failure:
                 try:
                     tag = step_config.get(
                         "artifact_tag", step_name.lower().replace(" ", "-")
                     )
-                    self.save_artifacts(f"{tag}-failed")
+                    self._persist_screencast(f"{tag}-failed")
+                    self.save_artifacts(
+                        f"{tag}-failed", selector=step_config.get("selector")
+                    )
                 except Exception as artifact_error:
                     logging.error(f"Failed to save step artifacts: {artifact_error}")
             self.failure_occurred = True
@@ -430,11 +895,110 @@ class BaseTestEngine:
                     f"Critical step failed: {step_name} - {step_data['error']}"
                 )
 
-        self.steps.append(step_data)
+        # Heap/DOM counters after every step feed the leak check
+        if self.memory_tracking and self.driver:
+            try:
+                step_data["memory"] = sample_memory(
+                    self.driver, self.leak_thresholds.gc
+                )
+            except Exception as e:
+                logging.debug(f"Memory sample failed: {e}")
+        # Long tasks and slow events the page ran during this step
+        if self.perf_metrics and self.driver:
+            try:
+                main_thread = collect_main_thread(
+                    self.driver, step_data["end"] - step_data["start"]
+                )
+                if main_thread:
+                    step_data["main_thread"] = main_thread
+                    if main_thread["tbt_ms"]:
+                        logging.info(
+                            f"🧵 Main thread blocked {main_thread['tbt_ms']:.0f}ms "
+                            f"({main_thread['long_tasks']} long tasks)"
+                        )
+            except Exception as e:
+                logging.debug(f"Long task collection failed: {e}")
+        # A navigation discards the old document's coverage, so take it per step
+        if self.coverage is not None:
+            self.coverage.take()
+
+        self._record_step(step_data)
+        if self.run_dir:
+            self._index(
+                "add_step",
+                os.path.basename(self.run_dir),
+                len(self.step_records),
+                step_data,
+            )
+
+        # Capture level "trace": a full artifact set after every passing step
+        passed = step_data.get("status") == "pass"
+        if self.driver and passed and self.artifact_policy.every_step:
+            try:
+                tag = step_config.get(
+                    "artifact_tag", step_name.lower().replace(" ", "-")
+                )
+                self.save_artifacts(f"{len(self.step_records):02d}-{tag}")
+            except Exception as artifact_error:
+                logging.error(f"Failed to save step artifacts: {artifact_error}")
         return step_data
 
-    def run_test(self, test_steps):
-        """Run complete test with given steps"""
+    def _record_step(self, step_data):
+        """Append an executed step to the records; extras only if it has any."""
+        self.step_records.append(
+            step_data["name"],
+            step_data["start"],
+            step_data["end"],
+            step_data["status"],
+            step_data.get("retries"),
+        )
+        action = step_data.get("action")
+        self.step_actions.append(
+            STEP_ACTIONS.index(action) if action in STEP_ACTIONS else 255
+        )
+        extras = {k: v for k, v in step_data.items() if k not in _RECORD_FIELDS}
+        if extras:
+            self.step_extras[len(self.step_records)] = extras
+
+    def reset_steps(self):
+        """Forget the executed steps (soak and load reuse one engine)."""
+        self.step_records.clear()
+        self.step_actions = array("B")
+        self.step_extras.clear()
+
+    def steps_view(self) -> list:
+        """The steps as summary.json dicts: records, action and extras."""
+        steps = records_view(self.step_records)
+        for idx, step in enumerate(steps, 1):
+            code = self.step_actions[idx - 1]
+            step["action"] = STEP_ACTIONS[code] if code < len(STEP_ACTIONS) else None
+            step.update(self.step_extras.get(idx, ()))
+        return steps
+
+    def assert_budget(self, step_config, step_data):
+        """Check the current page (and the previous step) against budgets."""
+        perf = collect_vitals(self.driver)
+        target = step_config.get("step")
+        records = self.step_records
+        for i in reversed(range(len(records))):
+            if not target or records.names[records.step[i]] == target:
+                if records.end[i]:
+                    perf["step_duration_sec"] = round(
+                        records.end[i] - records.start[i], 3
+                    )
+                break
+        step_data["perf"] = perf
+        step_data["budget"] = check_budgets(step_config["budgets"], perf)
+        breaches = [r for r in step_data["budget"] if r["status"] == "fail"]
+        missing = [r["metric"] for r in step_data["budget"] if r["status"] == "missing"]
+        if missing:
+            logging.warning(f"Budget metrics not available: {', '.join(missing)}")
+        if breaches:
+            raise BudgetExceeded(breaches)
+        logging.info(f"💰 {len(step_data['budget'])} budgets met")
+
+    def run_test(self, test_steps) -> bool:
+        """Run complete test with given steps; True if it passed"""
         overall_error_message = None
 
         try:
@@ -469,9 +1033,6 @@ class BaseTestEngine:
                 pass
 
         finally:
-            # Save test summary
-            self.save_test_summary(overall_error_message)
-
             # Produce a final-failed set ONLY if no step-level artifacts were saved
             # (avoids duplicate screenshot/logs for the same failure).
             if (
@@ -479,24 +1040,65 @@ class BaseTestEngine:
                 and overall_error_message
                 and not self.failure_occurred
                 and not self.aborted_by_user
+                and self.artifact_policy.on_failure
             ):
                 try:
+                    self._persist_screencast("final-failed")
                     self.save_artifacts("final-failed")
                 except Exception as artifact_error:
                     logging.error(f"Failed to save failure artifacts: {artifact_error}")
 
-            # Save final artifacts only on full success (avoid duplicates)
+            # Save final artifacts only on full success (avoid duplicates),
+            # for the sampled share of passing runs
             if (
                 self.driver is not None
                 and not self.failure_occurred
                 and not overall_error_message
+                and self.artifact_policy.keep_success()
             ):
                 try:
                     self.save_artifacts("final-success")
                 except Exception as artifact_error:
                     logging.error(f"Failed to save final artifacts: {artifact_error}")
 
+            if self._artifact_writer is not None:
+                self._artifact_writer.shutdown(wait=True)
+                self._artifact_writer = None
+            if self.screencast is not None:
+                try:
+                    self.screencast_stats = self.screencast.stop()
+                except Exception as e:
+                    logging.error(f"Failed to stop screencast: {e}")
+                self.screencast = None
+            self._stop_har()
+            self._stop_traffic()
+            self._stop_coverage()
+            self._stop_network_mode()
+            if self.memory_tracking:
+                self.memory_stats = check_growth(
+                    [
+                        self.step_extras.get(idx, {}).get("memory")
+                        for idx in range(1, len(self.step_records) + 1)
+                    ],
+                    self.leak_thresholds,
+                )
+                if self.memory_stats["leak_suspected"]:
+                    slopes = self.memory_stats["slopes"]
+                    logging.warning(
+                        "🧠 Possible memory leak: "
+                        + ", ".join(
+                            f"{f} +{slopes[f]:g}/step"
+                            for f in self.memory_stats["flagged"]
+                        )
+                    )
+
+            # Save test summary (after artifacts so it reports their cost)
+            self.save_test_summary(overall_error_message)
+
             # Cleanup
+            if self.cdp is not None:
+                self.cdp.close()
+                self.cdp = None
             if self.driver:
                 try:
                     if self.headless or overall_error_message is None:
@@ -504,28 +1106,52 @@ class BaseTestEngine:
                 except Exception:
                     pass
 
+        return overall_error_message is None and not self.aborted_by_user
+
     def save_test_summary(self, error_message=None):
         """Save test execution summary"""
         if not self.run_dir:
             return
 
         status = "aborted" if self.aborted_by_user else ("failed" if error_message else "passed")
+        # Built once for the file; the engine itself keeps only the records
+        steps = self.steps_view()
         summary = {
             "project": self.project_name,
             "mode": "headless" if self.headless else "normal",
             "status": status,
             "error": None if self.aborted_by_user else error_message,
             "timestamp": datetime.now().isoformat(),
-            "steps": self.steps,
-            "total_steps": len(self.steps),
-            "passed_steps": len([s for s in self.steps if s.get("status") == "pass"]),
-            "failed_steps": len([s for s in self.steps if s.get("status") == "fail"]),
+            "steps": steps,
+            "total_steps": len(steps),
+            "passed_steps": len([s for s in steps if s["status"] == "pass"]),
+            "failed_steps": len([s for s in steps if s["status"] == "fail"]),
+            "screencast": self.screencast_stats,
+            "har": self.har_stats,
+            "network": self.network_stats,
+            "traffic": self.traffic_stats,
+            "throttling": asdict(self.throttling),
+            "memory": self.memory_stats,
+            "coverage": self.coverage_stats,
+            "blocked_domains": self.blocked_domains,
+            "artifacts": dict(
+                self.artifact_stats,
+                level=self.artifact_policy.level,
+                screenshot_format=self.screenshot_options.format,
+                success_sample=self.artifact_policy.success_sample,
+                seconds=round(self.artifact_stats["seconds"], 3),
+            ),
         }
 
         with open(
             os.path.join(self.run_dir, "summary.json"), "w", encoding="utf-8"
         ) as f:
-            json.dump(summary, f, ensure_ascii=False, indent=2)
+            json.dump(summary, f, ensure_ascii=False, separators=(",", ":"))
+        steps_path = os.path.join(self.run_dir, STEPS_FILENAME)
+        try:
+            self._store_artifact(steps_path, self.step_records.to_bytes())
+        except Exception as e:
+            logging.warning(f"Failed to save {STEPS_FILENAME}: {e}")
 
         if error_message and not self.aborted_by_user:
             # Append basic error header; traceback (if any) appended earlier
@@ -537,35 +1163,44 @@ class BaseTestEngine:
                 f.write(f"Mode: {'headless' if self.headless else 'normal'}\n")
                 f.write(f"Error: {error_message}\n")
 
+        run_name = os.path.basename(self.run_dir)
+        self._index("record_summary", run_name, summary, self.run_dir)
+        self._index(
+            "add_artifacts",
+            run_name,
+            [
+                os.path.join(self.run_dir, "summary.json"),
+                steps_path,
+                os.path.join(self.run_dir, "error_details.txt"),
+            ],
+        )
+        self._index(
+            "index_file",
+            run_name,
+            "error_details",
+            os.path.join(self.run_dir, "error_details.txt"),
+        )
+
         logging.info(f"📁 Test results saved to: {self.run_dir}")
 
-        # Prune old runs to keep only the most recent N runs (default: 10)
+        # Archive/prune older runs per the LOGS_* retention policy
         try:
-            self.prune_old_runs(max_runs=int(os.getenv("LOGS_MAX_RUNS", "10")))
+            self.prune_old_runs()
         except Exception as e:
             logging.warning(f"Log retention pruning failed: {e}")
 
-    def prune_old_runs(self, max_runs: int = 10):
-        """Keep only the latest max_runs directories in logs/; delete older ones."""
-        logs_root = os.path.join(os.getcwd(), "logs")
-        if not os.path.isdir(logs_root) or max_runs <= 0:
+    def prune_old_runs(self):
+        """Apply the log retention policy without blocking the end of the run.
+
+        When launched from the GUI its own retention worker takes care of this
+        (GAMMA_RETENTION_EXTERNAL=1). Otherwise a non-daemon thread does the
+        work so the process still finishes it before exiting.
+        """
+        if os.getenv("GAMMA_RETENTION_EXTERNAL") == "1":
             return
-        # Collect run directories
-        entries = []
-        for name in os.listdir(logs_root):
-            full = os.path.join(logs_root, name)
-            if os.path.isdir(full):
-                try:
-                    mtime = os.path.getmtime(full)
-                    entries.append((mtime, full))
-                except Exception:
-                    continue
-        # Sort newest first
-        entries.sort(key=lambda x: x[0], reverse=True)
-        # Delete older beyond max_runs
-        for _, dir_path in entries[max_runs:]:
-            try:
-                shutil.rmtree(dir_path, ignore_errors=True)
-                logging.info(f"🧹 Pruned old log directory: {dir_path}")
-            except Exception as e:
-                logging.warning(f"Failed to prune {dir_path}: {e}")
+        # This run is still being finished (driver, CDP, writers): leave it be
+        threading.Thread(
+            target=enforce_retention,
+            kwargs={"exclude": (os.path.basename(self.run_dir),)},
+            name="retention",
+        ).start()
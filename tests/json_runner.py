@@ -16,10 +16,11 @@ if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
 from tests.base_test_engine import BaseTestEngine
-
-
-def normalize_prefix(name: str) -> str:
-    return (name or "").upper().replace("-", "_").replace(" ", "_")
+from core.artifact_policy import CAPTURE_LEVELS
+from core.emulation import THROTTLING_PROFILES
+from core.perf_budget import validate_budgets
+from core.steps import STEP_ACTIONS
+from core.utils import normalize_prefix
 
 
 def _validate_flow_json(data: dict) -> list:
@@ -36,6 +37,24 @@ def _validate_flow_json(data: dict) -> list:
         if not isinstance(name, str) or not name.strip():
             errors.append("PROJECT_CONFIG.name is required and must be non-empty string")
 
+    artifacts = data.get("ARTIFACTS")
+    if artifacts is not None:
+        if not isinstance(artifacts, dict):
+            errors.append("ARTIFACTS must be an object")
+        else:
+            level = artifacts.get("level")
+            if level is not None and level not in CAPTURE_LEVELS:
+                errors.append(f"ARTIFACTS.level must be one of {'/'.join(CAPTURE_LEVELS)}")
+            sample = artifacts.get("success_sample")
+            if sample is not None and not (isinstance(sample, int) and sample >= 0):
+                errors.append("ARTIFACTS.success_sample must be a non-negative integer")
+
+    throttling = data.get("THROTTLING")
+    if isinstance(throttling, str) and throttling.lower() not in THROTTLING_PROFILES:
+        errors.append(f"THROTTLING must be one of {'/'.join(THROTTLING_PROFILES)}")
+    elif throttling is not None and not isinstance(throttling, (str, dict)):
+        errors.append("THROTTLING must be a profile name or an object")
+
     steps = data.get("TEST_STEPS")
     if not isinstance(steps, list) or len(steps) == 0:
         errors.append("TEST_STEPS must be a non-empty array")
@@ -49,8 +68,10 @@ def _validate_flow_json(data: dict) -> list:
         action = step.get("action")
         if not isinstance(name, str) or not name.strip():
             errors.append(f"Step {idx}: 'name' is required")
-        if action not in {"navigate", "click", "fill", "wait", "custom"}:
-            errors.append(f"Step {idx}: 'action' must be one of navigate/click/fill/wait/custom")
+        if action not in STEP_ACTIONS:
+            errors.append(
+                f"Step {idx}: 'action' must be one of {'/'.join(STEP_ACTIONS)}"
+            )
             continue
         if action == "navigate" and not (isinstance(step.get("url"), str) and step.get("url").strip()):
             errors.append(f"Step {idx}: 'url' is required for action=navigate")
@@ -58,34 +79,19 @@ def _validate_flow_json(data: dict) -> list:
             errors.append(f"Step {idx}: 'selector' is required for action={action}")
         if action == "fill" and not (isinstance(step.get("value"), str)):
             errors.append(f"Step {idx}: 'value' is required for action=fill")
+        if action == "assert_budget":
+            for err in validate_budgets(step.get("budgets")):
+                errors.append(f"Step {idx}: {err}")
+        if "measure" in step and not isinstance(step.get("measure"), bool):
+            errors.append(f"Step {idx}: 'measure' must be true or false if provided")
         timeout = step.get("timeout", 40)
         if timeout is not None and not (isinstance(timeout, int) and timeout > 0):
             errors.append(f"Step {idx}: 'timeout' must be a positive integer if provided")
     return errors
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: json_runner.py <flow.json> [PROJECT_NAME]")
-        sys.exit(1)
-    json_path = sys.argv[1]
-    project_name = (
-        sys.argv[2]
-        if len(sys.argv) > 2
-        else os.getenv("PROJECT", os.getenv("TARGET", os.getenv("BRAND", "UNKNOWN")))
-    )
-
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    # Minimal validation before running
-    validation_errors = _validate_flow_json(data)
-    if validation_errors:
-        print("Invalid flow JSON:")
-        for err in validation_errors:
-            print(f" - {err}")
-        sys.exit(2)
-
+def prepare_flow(data: dict, project_name: str):
+    """Project config (env creds, ARTIFACTS, THROTTLING) and resolved steps of a flow."""
     project_config = data.get("PROJECT_CONFIG", data.get("TARGET_CONFIG", data.get("BRAND_CONFIG", {})))
     if "name" not in project_config:
         project_config["name"] = project_name
@@ -96,11 +102,14 @@ def main():
     project_config.setdefault("email", os.getenv(f"{prefix}_EMAIL", ""))
     project_config.setdefault("password", os.getenv(f"{prefix}_PASSWORD", ""))
     project_config.setdefault("user_agent", os.getenv(f"{prefix}_USER_AGENT", default_ua))
+    # Flow-level artifact capture settings (run env and project env also apply)
+    if isinstance(data.get("ARTIFACTS"), dict):
+        project_config["artifacts"] = data["ARTIFACTS"]
+    # Flow-level throttling profile (THROTTLE_PROFILE in the run env wins)
+    if data.get("THROTTLING"):
+        project_config["throttling"] = data["THROTTLING"]
 
     test_steps = data.get("TEST_STEPS", [])
-    if not isinstance(test_steps, list) or not test_steps:
-        print("No TEST_STEPS found in JSON flow")
-        sys.exit(2)
 
     # Resolve special tokens in step values
     resolved_steps = []
@@ -125,9 +134,35 @@ def main():
         if "timeout" not in st:
             st["timeout"] = default_timeout
         resolved_steps.append(st)
+    return project_config, resolved_steps
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: json_runner.py <flow.json> [PROJECT_NAME]")
+        sys.exit(1)
+    json_path = sys.argv[1]
+    project_name = (
+        sys.argv[2]
+        if len(sys.argv) > 2
+        else os.getenv("PROJECT", os.getenv("TARGET", os.getenv("BRAND", "UNKNOWN")))
+    )
+
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    # Minimal validation before running
+    validation_errors = _validate_flow_json(data)
+    if validation_errors:
+        print("Invalid flow JSON:")
+        for err in validation_errors:
+            print(f" - {err}")
+        sys.exit(2)
 
+    project_config, resolved_steps = prepare_flow(data, project_name)
     engine = BaseTestEngine(project_config)
-    engine.run_test(resolved_steps)
+    # Queues, schedulers and CI go by the exit code
+    sys.exit(0 if engine.run_test(resolved_steps) else 1)
 
 
 if __name__ == "__main__":
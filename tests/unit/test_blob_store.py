@@ -0,0 +1,64 @@
+import os
+
+from core.blob_store import BlobStore
+from core.retention import _dir_size
+
+
+def _store(tmp_path, monkeypatch, dedup="1"):
+    monkeypatch.setenv("ARTIFACT_DEDUP", dedup)
+    return BlobStore(str(tmp_path / "blobs"))
+
+
+def test_identical_content_is_stored_once(tmp_path, monkeypatch):
+    store = _store(tmp_path, monkeypatch)
+    first, second = tmp_path / "run1.png", tmp_path / "run2.png"
+    assert store.write(str(first), b"same bytes") is False
+    assert store.write(str(second), b"same bytes") is True
+    assert (store.reused, store.reused_bytes) == (1, len(b"same bytes"))
+    assert os.path.samefile(first, second)
+    # Two runs and the store's own link
+    assert first.stat().st_nlink == 3
+    assert store.write(str(tmp_path / "other.png"), "different") is False
+
+
+def test_overwriting_a_link_leaves_other_runs_alone(tmp_path, monkeypatch):
+    store = _store(tmp_path, monkeypatch)
+    first, second = tmp_path / "run1.json", tmp_path / "run2.json"
+    store.write(str(first), b"old")
+    store.write(str(second), b"old")
+    store.write(str(second), b"new")
+    assert first.read_bytes() == b"old"
+    assert second.read_bytes() == b"new"
+
+
+def test_gc_removes_only_unreferenced_blobs(tmp_path, monkeypatch):
+    store = _store(tmp_path, monkeypatch)
+    kept, dropped = tmp_path / "kept.png", tmp_path / "dropped.png"
+    store.write(str(kept), b"kept")
+    store.write(str(dropped), b"dropped!")
+    assert store.gc() == (0, 0)
+    dropped.unlink()
+    assert store.gc() == (1, len(b"dropped!"))
+    assert store.gc() == (0, 0)
+    assert kept.read_bytes() == b"kept"
+    assert kept.stat().st_nlink == 2
+
+
+def test_run_size_splits_shared_blobs(tmp_path, monkeypatch):
+    store = _store(tmp_path, monkeypatch)
+    run1, run2 = tmp_path / "run1", tmp_path / "run2"
+    run1.mkdir()
+    run2.mkdir()
+    store.write(str(run1 / "shot.png"), b"x" * 100)
+    store.write(str(run2 / "shot.png"), b"x" * 100)
+    store.write(str(run1 / "own.txt"), b"y" * 10)
+    assert _dir_size(str(run1)) == 50 + 10
+    assert _dir_size(str(run2)) == 50
+
+
+def test_disabled_store_writes_plain_files(tmp_path, monkeypatch):
+    store = _store(tmp_path, monkeypatch, dedup="0")
+    path = tmp_path / "plain.png"
+    assert store.write(str(path), b"data") is False
+    assert path.stat().st_nlink == 1
+    assert not (tmp_path / "blobs").exists()
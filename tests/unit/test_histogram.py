@@ -0,0 +1,50 @@
+from core.histogram import LatencyHistogram
+
+
+def _histogram(values):
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    return histogram
+
+
+def test_percentile_nearest_rank():
+    histogram = _histogram(range(1, 101))
+    assert histogram.percentile(50) == 50
+    assert histogram.percentile(95) == 95
+    assert histogram.percentile(99) == 99
+    assert histogram.percentile(100) == 100
+    assert histogram.percentile(0) == 1
+
+    histogram = _histogram(range(1, 11))
+    assert histogram.percentile(50) == 5
+    assert histogram.percentile(90) == 9
+
+
+def test_percentile_within_bucket_precision():
+    histogram = _histogram(range(1, 10001))
+    for pct in (50, 95, 99):
+        exact = pct * 100
+        assert exact <= histogram.percentile(pct) <= exact * (1 + 1 / 64)
+
+
+def test_empty():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) is None
+    assert histogram.summary()["count"] == 0
+
+
+def test_merge_matches_single_histogram():
+    merged = _histogram(range(1, 501)).merge(_histogram(range(501, 1001)))
+    whole = _histogram(range(1, 1001))
+    assert merged.buckets == whole.buckets
+    assert merged.summary() == whole.summary()
+    assert (merged.min, merged.max) == (1, 1000)
+
+
+def test_merge_empty_and_round_trip():
+    histogram = _histogram([3, 7, 250])
+    histogram.merge(LatencyHistogram())
+    assert histogram.count == 3 and histogram.min == 3
+    restored = LatencyHistogram.from_dict(histogram.to_dict())
+    assert restored.summary() == histogram.summary()
@@ -0,0 +1,106 @@
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from core.retention import (
+    RetentionPolicy,
+    archive_run,
+    enforce_retention,
+    plan_retention,
+    read_run_text,
+    retention_lock,
+)
+from core.run_index import RunIndex
+
+NOW = datetime(2026, 10, 19, 12, 0)
+
+
+def _run(day, status="passed", project="demo", size=0, **extra):
+    name = f"202610{day:02d}-010000-checkout"
+    return dict(
+        name=name,
+        path=os.path.join("logs", name),
+        project=project,
+        status=status,
+        started_at=f"2026-10-{day:02d} 01:00:00",
+        size_bytes=size,
+        **extra,
+    )
+
+
+def _plan(runs, **policy):
+    policy.setdefault("max_project_bytes", 0)
+    plan = plan_retention(runs, RetentionPolicy(**policy), now=NOW)
+    return {run["name"][6:8]: action for action, run in plan}
+
+
+def test_newest_runs_stay_and_older_are_archived():
+    runs = [_run(day) for day in (19, 18, 17, 16)]
+    runs[3]["archived"] = 1
+    assert _plan(runs, keep_full=2) == {"17": "archive"}
+
+
+def test_age_limits_pin_failed_runs_longer():
+    runs = [_run(19), _run(10), _run(1, "failed"), _run(2)]
+    assert _plan(runs, keep_full=5, max_age_days=10, failed_max_age_days=30) == {
+        "02": "delete"
+    }
+
+
+def test_byte_quota_drops_oldest_passing_runs_first():
+    runs = [_run(19, size=10), _run(18, size=10), _run(17, "failed", size=10)]
+    runs.append(_run(16, size=10))
+    plan = _plan(runs, keep_full=1, archive=False, max_project_bytes=25)
+    assert plan == {"16": "delete", "18": "delete"}
+
+
+def test_running_and_excluded_runs_are_left_alone():
+    runs = [_run(19, "running"), _run(18), _run(17)]
+    plan = plan_retention(
+        runs,
+        RetentionPolicy(keep_full=1),
+        now=NOW,
+        exclude=(runs[2]["name"],),
+    )
+    assert plan == []
+
+
+def test_archive_round_trip(tmp_path):
+    logs = tmp_path / "logs"
+    index = RunIndex(str(logs / "index.db"))
+    run_dir = logs / "20261019-010000-checkout"
+    run_dir.mkdir()
+    (run_dir / "summary.json").write_text(json.dumps({"status": "passed"}))
+    (run_dir / "test_log.txt").write_text("step one\nstep two")
+    (run_dir / "shot.png").write_bytes(b"\x89PNG fake")
+    index.index_run_dir(str(run_dir))
+
+    archive_run(index, index.get_run(run_dir.name))
+    archive = str(run_dir) + ".zip"
+    assert not run_dir.exists() and os.path.isfile(archive)
+    run = index.get_run(run_dir.name)
+    assert (run["path"], run["archived"]) == (archive, 1)
+    assert read_run_text(archive, "test_log.txt") == "step one\nstep two"
+    assert read_run_text(archive, "missing.txt") is None
+    index.close()
+
+
+def test_enforce_skips_while_another_pass_holds_the_lock(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    logs = tmp_path / "logs"
+    index = RunIndex(str(logs / "index.db"))
+    policy = RetentionPolicy(keep_full=1)
+    with retention_lock(str(logs)) as locked:
+        assert locked
+        assert enforce_retention(policy, index) is None
+    counts = enforce_retention(policy, index)
+    assert counts == {"archive": 0, "bundle": 0, "delete": 0, "blobs": 0}
+    index.close()
+
+
+@pytest.mark.parametrize("keep_full", [0, 1])
+def test_newest_run_is_never_planned(keep_full):
+    runs = [_run(19), _run(18)]
+    assert "19" not in _plan(runs, keep_full=keep_full)
@@ -0,0 +1,53 @@
+import pytest
+
+from core.retention import read_run_text
+from core.run_bundle import RunBundle, pack_run_dir, unpack_bundle
+
+
+def _run_dir(tmp_path):
+    run_dir = tmp_path / "20261019-010000-checkout"
+    run_dir.mkdir()
+    (run_dir / "summary.json").write_text('{"status": "passed"}')
+    (run_dir / "test_log.txt").write_text("line one\nline two")
+    (run_dir / "shot.png").write_bytes(bytes(range(256)) * 4)
+    (run_dir / "empty.txt").write_bytes(b"")
+    (run_dir / "failures").mkdir()
+    return run_dir
+
+
+def test_pack_and_read_members(tmp_path):
+    run_dir = _run_dir(tmp_path)
+    path = pack_run_dir(str(run_dir), remove=True)
+    assert path == str(run_dir) + ".bundle"
+    assert not run_dir.exists()
+
+    with RunBundle(path) as bundle:
+        assert sorted(bundle.names()) == [
+            "empty.txt",
+            "shot.png",
+            "summary.json",
+            "test_log.txt",
+        ]
+        assert bundle.read("shot.png") == bytes(range(256)) * 4
+        assert bundle.size("shot.png") == 1024
+        assert bundle.read("empty.txt") == b""
+    assert read_run_text(path, "test_log.txt") == "line one\nline two"
+    assert read_run_text(path, "missing.txt") is None
+
+
+def test_unpack_restores_the_directory(tmp_path):
+    run_dir = _run_dir(tmp_path)
+    originals = {p.name: p.read_bytes() for p in run_dir.iterdir() if p.is_file()}
+    path = pack_run_dir(str(run_dir), remove=True)
+    restored = unpack_bundle(path, remove=True)
+    assert restored == str(run_dir)
+    assert {p.name: p.read_bytes() for p in run_dir.iterdir()} == originals
+    assert not (tmp_path / (run_dir.name + ".bundle")).exists()
+
+
+@pytest.mark.parametrize("data", [b"", b"GRBUNDL1", b"not a bundle at all" * 4])
+def test_rejects_files_that_are_not_bundles(tmp_path, data):
+    path = tmp_path / "bad.bundle"
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        RunBundle(str(path))
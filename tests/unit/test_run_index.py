@@ -0,0 +1,119 @@
+import json
+import zipfile
+
+import pytest
+
+from core.run_index import RunIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = RunIndex(str(tmp_path / "logs" / "index.db"))
+    yield index
+    index.close()
+
+
+def _summary(status, project="demo", error=None, steps=()):
+    return {
+        "project": project,
+        "mode": "headless",
+        "status": status,
+        "error": error,
+        "steps": [
+            {"name": name, "start": 100.0 + i, "end": 101.0 + i, "status": state}
+            for i, (name, state) in enumerate(steps)
+        ],
+    }
+
+
+def _write_run(logs, name, summary, log_text=None):
+    run_dir = logs / name
+    run_dir.mkdir(parents=True)
+    (run_dir / "summary.json").write_text(json.dumps(summary))
+    if log_text is not None:
+        (run_dir / "test_log.txt").write_text(log_text)
+    return run_dir
+
+
+def test_upsert_updates_only_given_columns(index):
+    index.upsert_run(
+        "20261019-010000-checkout", path="/runs/a", project="demo", status="running"
+    )
+    index.upsert_run("20261019-010000-checkout", status="passed")
+    run = index.get_run("20261019-010000-checkout")
+    assert (run["path"], run["project"], run["status"]) == ("/runs/a", "demo", "passed")
+    # The start time comes from the run name
+    assert run["started_at"] == "2026-10-19 01:00:00"
+
+
+def test_record_summary_counts_steps(index):
+    index.record_summary(
+        "20261019-010000-checkout",
+        _summary("failed", steps=[("open", "pass"), ("pay", "fail")]),
+    )
+    run = index.get_run("20261019-010000-checkout")
+    assert (run["total_steps"], run["passed_steps"], run["failed_steps"]) == (2, 1, 1)
+    assert run["duration_sec"] == pytest.approx(2.0)
+    assert [s["name"] for s in index.list_steps(run["name"])] == ["open", "pay"]
+
+
+def test_query_filters_sort_and_pages(index):
+    names = [f"20261019-01000{i}-checkout" for i in range(4)]
+    projects = [("a", "passed"), ("b", "failed"), ("a", "failed"), ("a", "passed")]
+    for name, (project, status) in zip(names, projects):
+        index.record_summary(name, _summary(status, project))
+
+    assert [r["name"] for r in index.query_runs()] == names[::-1]
+    filters = {"project": "a", "statuses": ["failed"]}
+    assert [r["name"] for r in index.query_runs(filters)] == [names[2]]
+    assert index.count_runs({"project": "a"}) == 3
+    page = index.query_runs({"project": "a"}, descending=False, limit=2, offset=1)
+    assert [r["name"] for r in page] == names[2:]
+    assert index.position_of(names[1]) == 2
+    assert index.position_of(names[2], {"project": "a"}) == 1
+
+
+def test_search_errors_steps_and_logs(index, tmp_path):
+    if not index.fts_enabled:
+        pytest.skip("SQLite built without FTS5")
+    logs = tmp_path / "logs"
+    summary = _summary(
+        "failed", error="Timeout waiting for #pay", steps=[("Checkout", "fail")]
+    )
+    run_dir = _write_run(
+        logs, "20261019-010000-checkout", summary, log_text="retrying payment gateway"
+    )
+    index.index_run_dir(str(run_dir))
+
+    kinds = {hit["kind"] for hit in index.search("pay")}
+    assert kinds == {"error", "log"}
+    hit = index.search("checkout")[0]
+    assert (hit["kind"], hit["step_idx"], hit["step_name"]) == ("step", 1, "Checkout")
+    assert index.count_runs({"text": "gateway"}) == 1
+    assert index.count_runs({"text": "missing"}) == 0
+
+    # Re-indexing replaces the documents instead of adding to them
+    index.index_run_dir(str(run_dir))
+    assert len(index.search("gateway")) == 1
+    index.delete_run("20261019-010000-checkout")
+    assert index.search("gateway") == []
+
+
+def test_rebuild_from_logs(index, tmp_path):
+    logs = tmp_path / "logs"
+    _write_run(logs, "20261019-010000-checkout", _summary("passed"))
+    packed = _write_run(logs, "20261019-020000-checkout", _summary("failed"))
+    with zipfile.ZipFile(logs / "20261019-020000-checkout.zip", "w") as zf:
+        zf.write(packed / "summary.json", "summary.json")
+    for path in packed.iterdir():
+        path.unlink()
+    packed.rmdir()
+    (logs / "not-a-run").mkdir()
+
+    index.upsert_run("20261018-000000-gone", status="passed")
+    assert index.rebuild_from_logs() == 2
+    runs = {r["name"]: r for r in index.list_runs()}
+    assert set(runs) == {"20261019-010000-checkout", "20261019-020000-checkout"}
+    assert runs["20261019-020000-checkout"]["archived"] == 1
+    assert runs["20261019-020000-checkout"]["status"] == "failed"
+    assert index.get_meta("rebuilt_at") is not None
@@ -0,0 +1,88 @@
+import threading
+
+from core.run_queue import PRIORITIES, RunQueue, RunRequest, parse_priority
+
+
+class _Launcher:
+    """launch() that blocks each run until the test releases it."""
+
+    def __init__(self):
+        self.started = []
+        self.changed = threading.Condition()
+        self.release = threading.Semaphore(0)
+        self.done = threading.Semaphore(0)
+
+    def __call__(self, request):
+        with self.changed:
+            self.started.append(request.script)
+            self.changed.notify_all()
+        self.release.acquire(timeout=5)
+        self.done.release()
+        return "passed"
+
+    def wait_started(self, count):
+        with self.changed:
+            assert self.changed.wait_for(lambda: len(self.started) >= count, 5)
+        return self.started
+
+    def finish(self, count=1):
+        for _ in range(count):
+            self.release.release()
+            assert self.done.acquire(timeout=5)
+
+
+def _request(script, priority="normal", project="p"):
+    return RunRequest(project, f"{script}.json", priority=parse_priority(priority))
+
+
+def test_parse_priority():
+    assert parse_priority("smoke") == PRIORITIES["smoke"]
+    assert parse_priority(" HIGH ") == PRIORITIES["high"]
+    assert parse_priority("3") == 3
+    assert parse_priority("urgent") == PRIORITIES["normal"]
+
+
+def test_lower_priority_number_runs_first():
+    launch = _Launcher()
+    queue = RunQueue(launch, concurrency=1)
+    queue.enqueue(_request("long"))
+    queue.enqueue(_request("low", "low"))
+    queue.enqueue(_request("normal"))
+    queue.enqueue(_request("smoke", "smoke"))
+    assert launch.wait_started(1) == ["long.json"]
+    launch.finish(4)
+    assert launch.started == ["long.json", "smoke.json", "normal.json", "low.json"]
+    assert queue.counts()["passed"] == 4
+
+
+def test_equal_requests_coalesce_and_keep_the_higher_priority():
+    launch = _Launcher()
+    queue = RunQueue(launch, concurrency=1)
+    queue.enqueue(_request("running"))
+    launch.wait_started(1)
+    first, coalesced = queue.enqueue(_request("flow", "low"))
+    assert not coalesced
+    queue.enqueue(_request("other", "normal"))
+    same, coalesced = queue.enqueue(_request("flow", "high"))
+    assert coalesced and same is first
+    assert (first.coalesced, first.priority) == (1, PRIORITIES["high"])
+    # Another project's run of the same flow is a different request
+    _, coalesced = queue.enqueue(_request("flow", "low", project="q"))
+    assert not coalesced
+    assert queue.counts()["queued"] == 3
+
+    launch.finish(4)
+    assert launch.started == ["running.json", "flow.json", "other.json", "flow.json"]
+
+
+def test_concurrency_limit_and_cancel():
+    launch = _Launcher()
+    queue = RunQueue(launch, concurrency=2)
+    requests = [queue.enqueue(_request(f"r{i}"))[0] for i in range(4)]
+    assert queue.counts()["running"] == 2
+    assert queue.cancel(requests[3].id)
+    assert not queue.cancel(requests[3].id)
+    launch.finish(3)
+    assert launch.started == ["r0.json", "r1.json", "r2.json"]
+    assert requests[3].state == "stopped"
+    assert not queue.busy
@@ -0,0 +1,114 @@
+import json
+import time
+from datetime import datetime
+
+import pytest
+
+from core.run_queue import RunRequest
+from core.scheduler import CronSchedule, Rollups, Schedule, Scheduler
+
+
+def _next(expression, moment):
+    return CronSchedule(expression).next_after(datetime.fromisoformat(moment))
+
+
+def test_cron_next_after():
+    assert _next("*/10 * * * *", "2026-10-19 01:35:20") == datetime(2026, 10, 19, 1, 40)
+    # Strictly after: a matching minute is not returned again
+    assert _next("*/10 * * * *", "2026-10-19 01:40:00") == datetime(2026, 10, 19, 1, 50)
+    # Saturday -> Monday 09:00
+    assert _next("0 9 * * 1-5", "2026-10-17 10:00") == datetime(2026, 10, 19, 9, 0)
+    assert _next("30 2 29 2 *", "2026-03-01 00:00") == datetime(2028, 2, 29, 2, 30)
+    assert _next("15 14 1 12 *", "2026-12-31 23:59") == datetime(2027, 12, 1, 14, 15)
+
+
+def test_cron_day_fields_and_aliases():
+    # Both day fields restricted: either matches (the 1st or a Sunday)
+    assert _next("0 0 1 * 0", "2026-10-19 00:00") == datetime(2026, 10, 25)
+    # 7 is Sunday too
+    assert _next("0 0 * * 7", "2026-10-19 00:00") == datetime(2026, 10, 25)
+    assert _next("@weekly", "2026-10-19 00:00") == datetime(2026, 10, 25)
+    assert _next("@hourly", "2026-10-19 00:10") == datetime(2026, 10, 19, 1, 0)
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "61 * * * *", "0 0 30 2 *"])
+def test_cron_invalid(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression).next_after(datetime(2026, 1, 1))
+
+
+def test_interval_plan_is_anchored():
+    schedule = Schedule("s", "p", "f.json", every=60)
+    schedule.plan(1000.0)
+    assert schedule.slot == schedule.due == 1000.0
+    # Late by 2.5 intervals: skips the missed slots, no drift from the anchor
+    schedule.plan(1150.0)
+    assert schedule.slot == 1180.0
+
+
+def test_plan_jitter_bounds():
+    schedule = Schedule("s", "p", "f.json", cron=CronSchedule("* * * * *"), jitter=30)
+    now = datetime(2026, 10, 19, 1, 0, 10).timestamp()
+    for _ in range(50):
+        schedule.plan(now)
+        assert schedule.slot == datetime(2026, 10, 19, 1, 1).timestamp()
+        assert schedule.slot <= schedule.due <= schedule.slot + 30
+
+
+def _finished(state, run_dir=None):
+    request = RunRequest("p", "f.json", state=state, run_dir=run_dir)
+    request.started_at = time.time() - 2
+    request.finished_at = time.time()
+    return request
+
+
+def test_rollup_counts_states(tmp_path):
+    rollups = Rollups(str(tmp_path), bucket=3600)
+    rollups.add_run("a", _finished("passed"))
+    rollups.add_run("a", _finished("failed", "logs/20261019-010000-checkout"))
+    rollups.add_run("a", _finished("stopped"))
+    rollups.add_skip("a")
+    rollups.add_run("b", _finished("passed"))
+    assert rollups.flush() == 0  # the current hour is still open
+    assert rollups.flush(everything=True) == 2
+
+    lines = (tmp_path / "rollups.ndjson").read_text().splitlines()
+    rows = {row["schedule"]: row for row in map(json.loads, lines)}
+    a = rows["a"]
+    assert (a["runs"], a["passed"], a["failed"], a["stopped"], a["skipped"]) == (
+        3,
+        1,
+        1,
+        1,
+        1,
+    )
+    assert a["last_failure"] == "20261019-010000-checkout"
+    assert a["histogram"]["count"] == 1
+    assert 1900 <= a["duration"]["p50_ms"] <= 2100
+    assert rows["b"]["failed"] == 0
+
+
+def test_scheduler_tracks_failures_and_skips(tmp_path):
+    schedule = Schedule("a", "p", "f.json", every=60)
+    scheduler = Scheduler([schedule], 1, Rollups(str(tmp_path)))
+    results = iter(["failed", "failed", "passed"])
+    scheduler.queue.launch = lambda request: next(results)
+
+    for expected in (1, 2, 0):
+        schedule.due = 0
+        scheduler.tick()
+        deadline = time.time() + 5
+        while scheduler.pending():
+            assert time.time() < deadline
+            time.sleep(0.01)
+        assert schedule.consecutive_failures == expected
+    assert schedule.last_state == "passed"
+
+    # Still running when the next slot comes up: skipped, not stacked
+    schedule.request = RunRequest("p", "f.json", state="running")
+    schedule.due = 0
+    scheduler.tick()
+    assert scheduler.queue.counts()["queued"] == 0
+    scheduler.rollups.flush(everything=True)
+    row = json.loads((tmp_path / "rollups.ndjson").read_text().splitlines()[0])
+    assert (row["runs"], row["failed"], row["passed"], row["skipped"]) == (3, 2, 1, 1)
@@ -0,0 +1,74 @@
+import pytest
+
+from core.step_records import (
+    StepRecords,
+    append_chunk,
+    parse_records,
+    read_records,
+    records_view,
+    step_totals,
+)
+
+
+def _records(rows):
+    records = StepRecords()
+    for row in rows:
+        records.append(*row)
+    return records
+
+
+def test_to_bytes_round_trip():
+    records = _records(
+        [
+            ("open", 100.0, 101.5, "pass", 0),
+            ("pay", 101.5, 103.0, "fail", 2),
+            ("open", 103.0, 103.25, "skip", 300),
+        ]
+    )
+    parsed = parse_records(records.to_bytes())
+    view = [tuple(step.values()) for step in records_view(parsed)]
+    assert view == [
+        ("open", 100.0, 101.5, "pass", 0),
+        ("pay", 101.5, 103.0, "fail", 2),
+        # Retries saturate at one byte
+        ("open", 103.0, 103.25, "skip", 255),
+    ]
+    assert list(records_view(parsed)[0]) == [
+        "name",
+        "start",
+        "end",
+        "status",
+        "retries",
+    ]
+    assert parsed.names == ["open", "pay"]
+
+
+def test_chunks_with_their_own_names_concatenate(tmp_path):
+    path = str(tmp_path / "steps.bin")
+    records = _records([("a", 1.0, 2.0), ("b", 2.0, 4.0)])
+    append_chunk(path, records)
+    assert len(records) == 0
+    # The second chunk interns its names in another order
+    records.append("c", 4.0, 5.0, "fail")
+    records.append("a", 5.0, 8.0)
+    append_chunk(path, records)
+    append_chunk(path, records)  # empty: writes nothing
+
+    parsed = read_records(path)
+    assert [step["name"] for step in records_view(parsed)] == ["a", "b", "c", "a"]
+    assert parsed.duration() == pytest.approx(7.0)
+    totals = step_totals(parsed)
+    assert totals["a"] == {"count": 2, "failed": 0, "mean_sec": 2.0, "max_sec": 3.0}
+    assert totals["c"]["failed"] == 1
+
+
+def test_unknown_status_counts_as_failed_and_empty_duration():
+    records = _records([("x", None, None, "error")])
+    assert records_view(records)[0]["status"] == "fail"
+    assert StepRecords().duration() == 0.0
+    assert parse_records(b"").names == []
+
+
+def test_rejects_corrupt_chunks():
+    with pytest.raises(ValueError):
+        parse_records(b"XXXX" + bytes(8))